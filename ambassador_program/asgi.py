@@ -13,12 +13,13 @@ from channels.routing import ProtocolTypeRouter, URLRouter
 from django.core.asgi import get_asgi_application
 from django.urls import path
 
-from notifications.consumers import NotificationConsumer
-
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ambassador_program.settings')
 
 django_asgi_app = get_asgi_application()
 
+# Consumers import models, so they must be loaded after the app registry is ready
+from notifications.consumers import NotificationConsumer  # noqa: E402
+
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
     "websocket": URLRouter([
@@ -83,6 +83,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'utils.deadline.DeadlineMiddleware',
 ]
 
 ROOT_URLCONF = 'ambassador_program.urls'
@@ -106,15 +107,40 @@ TEMPLATES = [
 WSGI_APPLICATION = 'ambassador_program.wsgi.application'
 ASGI_APPLICATION = "ambassador_program.asgi.application"
 
+REDIS_HOST = getenv("REDIS_HOST", "redis")
+REDIS_PORT = int(getenv("REDIS_PORT", 6379))
+REDIS_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}/0"
+
 # Redis channel layer
 CHANNEL_LAYERS = {
     "default": {
         "BACKEND": "channels_redis.core.RedisChannelLayer",
         "CONFIG": {
-            "hosts": [(getenv("REDIS_HOST", "redis"), int(getenv("REDIS_PORT", 6379)))],
+            "hosts": [(REDIS_HOST, REDIS_PORT)],
         },
     },
 }
+# Seconds a channel layer call may take (shortened by request deadlines)
+CHANNEL_LAYER_TIMEOUT = float(getenv("CHANNEL_LAYER_TIMEOUT", 2))
+
+# Shared cache for integration tokens and lookups (separate Redis database from channels)
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": f"redis://{REDIS_HOST}:{REDIS_PORT}/1",
+    },
+}
+
+# Notifications
+NOTIFICATION_RETENTION_DAYS = int(getenv("NOTIFICATION_RETENTION_DAYS", 14))
+NOTIFICATION_CLEANUP_BATCH_SIZE = int(getenv("NOTIFICATION_CLEANUP_BATCH_SIZE", 1000))
+NOTIFICATION_CLEANUP_MAX_SECONDS = int(getenv("NOTIFICATION_CLEANUP_MAX_SECONDS", 300))
+# Max notifications replayed to a websocket client on reconnect
+NOTIFICATION_REPLAY_LIMIT = int(getenv("NOTIFICATION_REPLAY_LIMIT", 100))
+# Seconds a websocket user's active state is cached per worker
+WEBSOCKET_USER_CACHE_TTL = int(getenv("WEBSOCKET_USER_CACHE_TTL", 30))
+# Seconds without a heartbeat after which a websocket connection is not counted as present
+PRESENCE_TTL = int(getenv("PRESENCE_TTL", 90))
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -186,15 +212,137 @@ EMAIL_PORT = 587
 EMAIL_USE_TLS = True
 EMAIL_HOST_USER = "no-reply@savefryoil.com"
 EMAIL_HOST_PASSWORD = getenv("EMAIL_SEND_GRID_API_KEY")
+EMAIL_TIMEOUT = int(getenv("EMAIL_TIMEOUT", 10))
 DEFAULT_FROM_EMAIL = "SaveFryOil Ambassador<no-reply@savefryoil.com>"
 ADMIN_EMAIL_RECIPIENTS = getenv("ADMIN_EMAIL_RECIPIENTS").split(",")
 
+# Email outbox worker
+EMAIL_OUTBOX_BATCH_SIZE = int(getenv("EMAIL_OUTBOX_BATCH_SIZE", 50))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", 6))
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = int(getenv("EMAIL_OUTBOX_RETRY_BASE_SECONDS", 30))
+EMAIL_OUTBOX_RETRY_MAX_SECONDS = int(getenv("EMAIL_OUTBOX_RETRY_MAX_SECONDS", 3600))
+# Hour (UTC) when daily notification digests are sent
+DIGEST_DAILY_HOUR = int(getenv("DIGEST_DAILY_HOUR", 8))
+
+# Third party base urls. With FAKE_INTEGRATIONS_URL set (utils/fake_integrations.py served there),
+# every integration without its own url setting goes to the local stand-ins
+FAKE_INTEGRATIONS_URL = getenv("FAKE_INTEGRATIONS_URL")
+
+
+def integration_url(setting, url, fake_path):
+    return getenv(setting) or (f"{FAKE_INTEGRATIONS_URL}{fake_path}" if FAKE_INTEGRATIONS_URL else url)
+
+
+STRIPE_API_BASE_URL = integration_url("STRIPE_API_BASE_URL", "https://api.stripe.com", "/stripe")
+GHL_API_BASE_URL = integration_url("GHL_API_BASE_URL", "https://services.leadconnectorhq.com", "/ghl")
+SFO_BACKEND_BASE_URL = integration_url("SFO_BACKEND_BASE_URL", "https://api.savefryoil.com", "/sfo")
+QR_TIGER_API_BASE_URL = integration_url("QR_TIGER_API_BASE_URL", "https://api.qrtiger.com/api", "/qrtiger")
+QR_TIGER_WEB_BASE_URL = integration_url("QR_TIGER_WEB_BASE_URL", "https://qrtiger.com", "/qrtiger-web")
+MAILCHIMP_API_BASE_URL = integration_url("MAILCHIMP_API_BASE_URL", "https://us11.api.mailchimp.com/3.0", "/mailchimp")
+TELEGRAM_API_BASE_URL = integration_url("TELEGRAM_API_BASE_URL", "https://api.telegram.org", "/telegram")
+EXPO_API_BASE_URL = integration_url("EXPO_API_BASE_URL", "https://exp.host", "/expo")
+APPLE_KEYS_URL = integration_url("APPLE_KEYS_URL", "https://appleid.apple.com/auth/keys", "/apple/auth/keys")
+GOOGLE_CERTS_URL = integration_url(
+    "GOOGLE_CERTS_URL", "https://www.googleapis.com/oauth2/v3/certs", "/google/oauth2/v3/certs"
+)
+
+# Time budget of a request (utils/deadline.py) in seconds, by url name; 0 for none.
+# Outbound calls shrink their timeouts to what is left and fail fast once it's spent.
+REQUEST_DEADLINE_DEFAULT = float(getenv("REQUEST_DEADLINE_DEFAULT", 20))
+REQUEST_DEADLINES = {
+    "claim-commission": 45,  # Payout method, quote and outbound payment at Stripe
+    "stripe-recipients": 20,
+    "prospect-sales": 15,
+    "prospect-complete-deal": 10,
+    "prospect-complete-deal-bulk": 30,
+    "ghl-webhook-handler": 5,
+    "google-login": 10,
+    "apple-login": 10,
+    "qr-codes": 15,
+    "bundle-qr-codes": 20,
+}
+
+# Outbound HTTP to integrations (utils/http_client.py): default (connect, read) timeout and retries
+HTTP_CONNECT_TIMEOUT = float(getenv("HTTP_CONNECT_TIMEOUT", 3.05))
+HTTP_READ_TIMEOUT = float(getenv("HTTP_READ_TIMEOUT", 10))
+HTTP_RETRIES = int(getenv("HTTP_RETRIES", 2))
+HTTP_RETRY_BACKOFF = float(getenv("HTTP_RETRY_BACKOFF", 0.5))
+# Consecutive failures that open an integration's circuit breaker, and seconds it stays open
+HTTP_BREAKER_FAILURES = int(getenv("HTTP_BREAKER_FAILURES", 5))
+HTTP_BREAKER_RESET_TIMEOUT = int(getenv("HTTP_BREAKER_RESET_TIMEOUT", 30))
+STRIPE_TIMEOUT = (HTTP_CONNECT_TIMEOUT, float(getenv("STRIPE_READ_TIMEOUT", 30)))
+# Cluster-wide rate limits (requests per second and burst), shared by all workers through Redis.
+# Requests wait up to RATE_LIMIT_MAX_WAIT seconds for a token or slot.
+RATE_LIMIT_MAX_WAIT = float(getenv("RATE_LIMIT_MAX_WAIT", 30))
+STRIPE_RATE_LIMIT = float(getenv("STRIPE_RATE_LIMIT", 20))  # Per account, Stripe allows 100/s
+STRIPE_BURST = int(getenv("STRIPE_BURST", 40))
+EXPO_RATE_LIMIT = float(getenv("EXPO_RATE_LIMIT", 100))  # Expo allows 600/s per project
+EXPO_BURST = int(getenv("EXPO_BURST", 200))
+# Coalescing of identical in-flight integration calls across workers (utils/single_flight.py):
+# longest call a worker waits for, and how long the shared result is kept
+SINGLE_FLIGHT_LOCK_TIMEOUT = int(getenv("SINGLE_FLIGHT_LOCK_TIMEOUT", 30))
+SINGLE_FLIGHT_RESULT_TTL = int(getenv("SINGLE_FLIGHT_RESULT_TTL", 10))
+
+# GoHighLevel API
+GHL_SUBMIT_CONCURRENCY = int(getenv("GHL_SUBMIT_CONCURRENCY", 8))
+# Claims of a sync job that fails as a whole before its remaining items are marked failed
+GHL_SYNC_JOB_MAX_ATTEMPTS = int(getenv("GHL_SYNC_JOB_MAX_ATTEMPTS", 3))
+# GHL allows 100 requests per 10 seconds per location
+GHL_LOCATION_RATE_LIMIT = float(getenv("GHL_LOCATION_RATE_LIMIT", 10))
+GHL_LOCATION_BURST = int(getenv("GHL_LOCATION_BURST", 20))
+# Used when the location token expiry can't be read from the token
+GHL_TOKEN_CACHE_TTL = int(getenv("GHL_TOKEN_CACHE_TTL", 1800))
+# Stored webhooks processed per batch
+GHL_WEBHOOK_BATCH_SIZE = int(getenv("GHL_WEBHOOK_BATCH_SIZE", 200))
+# Failed webhook batches are retried with exponential backoff, up to this many attempts
+GHL_WEBHOOK_MAX_ATTEMPTS = int(getenv("GHL_WEBHOOK_MAX_ATTEMPTS", 5))
+GHL_WEBHOOK_RETRY_BASE_SECONDS = int(getenv("GHL_WEBHOOK_RETRY_BASE_SECONDS", 60))
+# Processed webhooks are kept this long, so redeliveries within it are still deduplicated
+GHL_WEBHOOK_RETENTION_DAYS = int(getenv("GHL_WEBHOOK_RETENTION_DAYS", 30))
+
+# Main SFO backend: (connect, read) timeout and cache of user lookups
+SFO_BACKEND_TIMEOUT = (HTTP_CONNECT_TIMEOUT, float(getenv("SFO_BACKEND_READ_TIMEOUT", 10)))
+SFO_BACKEND_USER_CACHE_TTL = int(getenv("SFO_BACKEND_USER_CACHE_TTL", 6 * 60 * 60))
+SFO_BACKEND_NEGATIVE_CACHE_TTL = int(getenv("SFO_BACKEND_NEGATIVE_CACHE_TTL", 5 * 60))
+SFO_BACKEND_PREFETCH_CONCURRENCY = int(getenv("SFO_BACKEND_PREFETCH_CONCURRENCY", 8))
+
+# QR Code Tiger: cache of QR code data (image urls don't change until a code is regenerated)
+QR_TIGER_TIMEOUT = (HTTP_CONNECT_TIMEOUT, float(getenv("QR_TIGER_READ_TIMEOUT", 15)))
+QR_TIGER_CACHE_TTL = int(getenv("QR_TIGER_CACHE_TTL", 24 * 60 * 60))
+QR_TIGER_CONCURRENCY = int(getenv("QR_TIGER_CONCURRENCY", 4))
+QR_TIGER_RATE_LIMIT = float(getenv("QR_TIGER_RATE_LIMIT", 5))
+QR_TIGER_BURST = int(getenv("QR_TIGER_BURST", 10))
+# Requests in flight across all workers
+QR_TIGER_MAX_IN_FLIGHT = int(getenv("QR_TIGER_MAX_IN_FLIGHT", 8))
+QR_PROVISIONING_BATCH_SIZE = int(getenv("QR_PROVISIONING_BATCH_SIZE", 20))
+QR_PROVISIONING_MAX_ATTEMPTS = int(getenv("QR_PROVISIONING_MAX_ATTEMPTS", 5))
+
+# Mailchimp audience sync, sent in batch operations by the scheduler
+MAILCHIMP_TIMEOUT = (HTTP_CONNECT_TIMEOUT, float(getenv("MAILCHIMP_READ_TIMEOUT", 10)))
+MAILCHIMP_SYNC_BATCH_SIZE = int(getenv("MAILCHIMP_SYNC_BATCH_SIZE", 500))
+MAILCHIMP_SYNC_MAX_ATTEMPTS = int(getenv("MAILCHIMP_SYNC_MAX_ATTEMPTS", 5))
+
+# Locally rendered QR codes: content-addressed files and optional logo overlay
+QR_CODE_DIR = Path(getenv("QR_CODE_DIR", BASE_DIR / "media" / "qr"))
+QR_LOGO_PATH = getenv("QR_LOGO_PATH")
+# Mapping of QR Tiger image urls to mirrored files (utils/qr_mirror.py)
+QR_MIRROR_CACHE_TTL = int(getenv("QR_MIRROR_CACHE_TTL", 60 * 60 * 24 * 7))
+
+# Email templates with inlined CSS, built by `manage.py build_email_templates`
+EMAIL_TEMPLATES_BUILD_DIR = BASE_DIR / "build" / "templates"
+
 FRONTEND_URL = f"{getenv("SERVER_URL")}/users/auth"
 
 GOOGLE_OAUTH_CLIENT_ID = getenv("GOOGLE_OAUTH_CLIENT_ID")
 GOOGLE_OAUTH_CLIENT_SECRET = getenv("GOOGLE_OAUTH_CLIENT_SECRET")
 GOOGLE_OAUTH_REDIRECT_URI = getenv("GOOGLE_OAUTH_REDIRECT_URI")
 
+# Apple/Google sign-in signing keys, cached for the provider's Cache-Control max-age
+SIGNING_KEYS_TIMEOUT = (HTTP_CONNECT_TIMEOUT, float(getenv("SIGNING_KEYS_READ_TIMEOUT", 5)))
+SIGNING_KEYS_DEFAULT_TTL = int(getenv("SIGNING_KEYS_DEFAULT_TTL", 3600))
+# Unknown kids trigger a refresh at most this often
+SIGNING_KEYS_MIN_REFRESH_INTERVAL = int(getenv("SIGNING_KEYS_MIN_REFRESH_INTERVAL", 60))
+
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
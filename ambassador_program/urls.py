@@ -19,7 +19,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.views.generic import TemplateView
 
-from ambassador_program.views import openapi_yaml, QRCodeView, GetUserByEmailView
+from ambassador_program.views import openapi_yaml, QRCodeView, QRCodeFileView, GetUserByEmailView, MetricsView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -39,4 +39,6 @@ urlpatterns = [
         name='redoc',
     ),
     path('qr/static/', QRCodeView.as_view(), name='qr-static'),
+    path('qr/files/<str:name>', QRCodeFileView.as_view(), name='qr-file'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
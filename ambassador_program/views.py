@@ -3,12 +3,14 @@ from os import path
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.http import HttpResponse
+from django.http import HttpResponse, FileResponse, Http404
+from django.urls import reverse
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from utils.ghl_api import GHL_API
-from utils.qr_code_tiger_api import qrTigerAPI
+from utils.metrics import metrics
+from utils.qr_renderer import QRStyle, get_or_render, FILE_NAME_RE
 
 
 def openapi_yaml(request):
@@ -30,17 +32,61 @@ class QRCodeView(APIView):
 
             data = request.data
             qr_url = data["qr_url"]
-            color = data.get("color")
-            qr_code_data = qrTigerAPI.create_static_qr_code(qr_url, color)
+            style = QRStyle(
+                color=data.get("color") or QRStyle.color,
+                frame_text=data.get("frame_text", "Scan me"),
+                logo=data.get("logo", True),
+            )
+            files = get_or_render(qr_url, style)
             logger.info(
                 f"QR Code created successfully. QR Code URL: {qr_url}"
             )
-            return Response(qr_code_data, status=200)
+            png_url = request.build_absolute_uri(reverse("qr-file", args=[files["png"]]))
+            svg_url = request.build_absolute_uri(reverse("qr-file", args=[files["svg"]]))
+            return Response({
+                # Shape of QR Tiger's response, which callers of this endpoint read
+                "data": {"qrImage": png_url, "svgImage": svg_url},
+                "qr_url": qr_url,
+                "key": files["key"],
+                "png_url": png_url,
+                "svg_url": svg_url,
+            }, status=200)
 
         except Exception as e:
             return Response(f"Error: {e}", status=400)
 
 
+class QRCodeFileView(APIView):
+
+    def get(self, request, name):
+        """
+        Rendered QR code file. Names are content hashes, so responses never change.
+        """
+        if not FILE_NAME_RE.match(name):
+            raise Http404
+        file_path = settings.QR_CODE_DIR / name
+        if not file_path.exists():
+            raise Http404
+        response = FileResponse(
+            open(file_path, "rb"), content_type="image/png" if name.endswith(".png") else "image/svg+xml"
+        )
+        response["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+
+class MetricsView(APIView):
+    """
+    Counters and timings collected by the worker process that serves the request
+    """
+
+    def get(self, request):
+        try:
+            check_auth_key(request.headers)
+            return Response(metrics.snapshot(), status=200)
+        except PermissionError as e:
+            return Response({"error": str(e)}, status=403)
+
+
 class GetUserByEmailView(APIView):
     def get(self, request):
         logger.info(f"Received request to retrieve user by email. /users/admin/")
@@ -1,15 +1,40 @@
 from log.logger_config import logger
 
-import requests
 import stripe
 from django.conf import settings
 
 from commission.models import Commission
 from prospect.utils import get_country_code_by_currency
 from user.models import User
+from utils.http_client import IntegrationSession
+from utils.rate_limit import RedisTokenBucket
+from utils.single_flight import single_flight
 
 STRIPE_SECRET_KEY = settings.STRIPE_SECRET_KEY
+STRIPE_API_BASE_URL = settings.STRIPE_API_BASE_URL
 stripe.api_key = STRIPE_SECRET_KEY
+stripe.api_base = STRIPE_API_BASE_URL
+
+
+def stripe_account_key(method, url, headers):
+    """
+    Stripe rate limits apply per account: the connected account a request acts on, or ours.
+    """
+    return headers.get("Stripe-Context") or headers.get("Stripe-Account") or "platform"
+
+
+stripe_rate_limit = RedisTokenBucket("stripe", settings.STRIPE_RATE_LIMIT, settings.STRIPE_BURST)
+# The SDK retries with idempotency keys, so its session doesn't retry by itself
+stripe.max_network_retries = settings.HTTP_RETRIES
+stripe.default_http_client = stripe.RequestsClient(
+    timeout=settings.STRIPE_TIMEOUT,
+    session=IntegrationSession(
+        "stripe", retries=0, rate_limit=stripe_rate_limit, limit_key=stripe_account_key
+    ),
+)
+stripe_session = IntegrationSession(
+    "stripe", timeout=settings.STRIPE_TIMEOUT, rate_limit=stripe_rate_limit, limit_key=stripe_account_key
+)
 
 STRIPE_FINANCIAL_ACCOUNT = settings.STRIPE_FINANCIAL_ACCOUNT
 STRIPE_FINANCIAL_ACCOUNT_CURRENCY = settings.STRIPE_FINANCIAL_ACCOUNT_CURRENCY
@@ -54,22 +79,25 @@ def create_stripe_transfer(user: User, commission: Commission):
 
 def retrieve_recipient_stripe(user: User):
     recipient_id = user.stripe_account_id
-    url = f"https://api.stripe.com/v2/core/accounts/{recipient_id}?include=configuration.recipient"
+    url = f"{STRIPE_API_BASE_URL}/v2/core/accounts/{recipient_id}?include=configuration.recipient"
 
-    response = requests.get(
-        url,
-        headers=HEADERS
-    )
+    def retrieve():
+        response = stripe_session.get(
+            url,
+            headers=HEADERS
+        )
+        logger.info(f"Retrieve stripe recipient account for user {user.id}: {response.json()}")
+        return response.json()
 
-    logger.info(f"Retrieve stripe recipient account for user {user.id}: {response.json()}")
-    return response.json()
+    # Double taps and parallel tabs share one Stripe request
+    return single_flight.do(f"stripe:recipient:{recipient_id}", retrieve, distributed=True)
 
 
 def create_stripe_recipient(user: User):
     name = f"{user.first_name} {user.last_name}"
     country = get_country_code_by_currency(user.currency)
 
-    url = "https://api.stripe.com/v2/core/accounts"
+    url = f"{STRIPE_API_BASE_URL}/v2/core/accounts"
 
     data = {
         "configuration": {
@@ -96,7 +124,7 @@ def create_stripe_recipient(user: User):
         ]
     }
 
-    response = requests.post(
+    response = stripe_session.post(
         url,
         json=data,
         headers=HEADERS
@@ -109,7 +137,7 @@ def create_stripe_recipient(user: User):
 
 
 def create_bank_account_onboarding_link(recipient_id: str):
-    url = "https://api.stripe.com/v2/core/account_links"
+    url = f"{STRIPE_API_BASE_URL}/v2/core/account_links"
 
     data = {
         "account": recipient_id,
@@ -125,7 +153,7 @@ def create_bank_account_onboarding_link(recipient_id: str):
         }
     }
 
-    response = requests.post(
+    response = stripe_session.post(
         url,
         json=data,
         headers=HEADERS
@@ -136,7 +164,7 @@ def create_bank_account_onboarding_link(recipient_id: str):
 
 
 def create_bank_account_update_link(recipient_id: str):
-    url = "https://api.stripe.com/v2/core/account_links"
+    url = f"{STRIPE_API_BASE_URL}/v2/core/account_links"
 
     data = {
         "account": recipient_id,
@@ -152,7 +180,7 @@ def create_bank_account_update_link(recipient_id: str):
         }
     }
 
-    response = requests.post(
+    response = stripe_session.post(
         url,
         json=data,
         headers=HEADERS
@@ -167,7 +195,7 @@ def create_stripe_outbound_payment_quote(user: User, commission: Commission, amo
     Creates an OutboundPaymentQuote, required for cross-border payments
     (e.g. GBP financial account -> USD payout method).
     """
-    url = "https://api.stripe.com/v2/money_management/outbound_payment_quotes"
+    url = f"{STRIPE_API_BASE_URL}/v2/money_management/outbound_payment_quotes"
 
     data = {
         "from": {
@@ -184,7 +212,7 @@ def create_stripe_outbound_payment_quote(user: User, commission: Commission, amo
         },
     }
 
-    response = requests.post(
+    response = stripe_session.post(
         url=url,
         json=data,
         headers={
@@ -202,8 +230,8 @@ def create_stripe_outbound_payment_quote(user: User, commission: Commission, amo
 
 
 def get_stripe_payout_method_for_currency(stripe_account_id: str, currency: str):
-    url = "https://api.stripe.com/v2/money_management/payout_methods"
-    response = requests.get(
+    url = f"{STRIPE_API_BASE_URL}/v2/money_management/payout_methods"
+    response = stripe_session.get(
         url,
         headers={
             **HEADERS,
@@ -222,7 +250,7 @@ def get_stripe_payout_method_for_currency(stripe_account_id: str, currency: str)
 
 
 def create_stripe_transfer_from_commission(user: User, commission: Commission):
-    url = "https://api.stripe.com/v2/money_management/outbound_payments"
+    url = f"{STRIPE_API_BASE_URL}/v2/money_management/outbound_payments"
 
     payout_method_id = get_stripe_payout_method_for_currency(user.stripe_account_id, commission.currency)
     amount_value = int(commission.money_amount * 100)
@@ -255,7 +283,7 @@ def create_stripe_transfer_from_commission(user: User, commission: Commission):
         "outbound_payment_quote": quote_id,
     }
 
-    response = requests.post(
+    response = stripe_session.post(
         url=url,
         json=data,
         headers={
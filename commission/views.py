@@ -12,12 +12,13 @@ from rest_framework.views import APIView
 
 from commission.models import Commission
 from commission.serializers import CommissionListSerializer
+from notifications.models import DigestEvent
 from notifications.utils import send_notification_to_multiple_users, send_notification
 from prospect.models import Prospect
 from prospect.permissions import IsSuperUser
 from prospect.utils import get_invitation_user_chain_from_prospect, get_currency_by_country_code
 from prospect.validation import validate_prospect, ValidationError
-from utils.send_email import send_html_email
+from utils.send_email import send_html_email, send_or_digest_html_email
 
 
 DIRECT_SALE_AMOUNT = 50
@@ -100,7 +101,7 @@ class CommissionClaimView(APIView):
                 "info",
                 "Prospect claimed"
             )
-            send_html_email(
+            send_or_digest_html_email(
                 subject="Ambassador claimed a prospect. Review and approve the commissions",
                 recipients=settings.ADMIN_EMAIL_RECIPIENTS,
                 email_body={
@@ -110,7 +111,12 @@ class CommissionClaimView(APIView):
                     "claimed_at": datetime.now().strftime("%Y-%m-%d %H:%M UTC"),
                     "commissions": Commission.objects.filter(prospect=prospect),
                 },
-                template_name="emails/commission_approval_email.html"
+                template_name="emails/commission_approval_email.html",
+                event_type=DigestEvent.ADMIN_PROSPECT_CLAIMED,
+                summary=(
+                    f"{request_user.email} claimed {prospect.restaurant_organisation_name} "
+                    f"({number_of_frylows} frylows)"
+                ),
             )
             return Response({"detail": "success"}, status=status.HTTP_201_CREATED)
 
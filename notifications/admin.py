@@ -1,6 +1,8 @@
 from django.contrib import admin
 
-from notifications.models import Notification, PushNotificationDeviceToken
+from notifications.models import (
+    Notification, PushNotificationDeviceToken, OutgoingEmail, EmailDigestPreference, DigestEntry
+)
 
 
 @admin.register(Notification)
@@ -28,3 +30,47 @@ class NotificationAdmin(admin.ModelAdmin):
     list_filter = ("created_at", "user", "created_at")
     search_fields = ("user",)
     readonly_fields = ("created_at",)
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "subject",
+        "recipients",
+        "status",
+        "attempts",
+        "next_attempt_at",
+        "sent_at",
+    )
+    list_filter = ("status", "created_at")
+    search_fields = ("subject", "recipients")
+    readonly_fields = ("created_at", "sent_at")
+
+
+@admin.register(EmailDigestPreference)
+class EmailDigestPreferenceAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "email",
+        "event_type",
+        "frequency",
+        "updated_at",
+    )
+    list_filter = ("event_type", "frequency")
+    search_fields = ("email",)
+
+
+@admin.register(DigestEntry)
+class DigestEntryAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "recipient_email",
+        "event_type",
+        "summary",
+        "deliver_after",
+        "sent_at",
+    )
+    list_filter = ("event_type", "deliver_after")
+    search_fields = ("recipient_email", "summary")
+    readonly_fields = ("created_at", "sent_at")
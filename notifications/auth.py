@@ -0,0 +1,62 @@
+from dataclasses import dataclass
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, TokenError
+
+from log.logger_config import logger
+from utils.metrics import metrics
+from utils.ttl_cache import TTLCache
+
+# user_id -> {"id", "email", "is_active"}, or None when the user does not exist
+websocket_users_cache = TTLCache(ttl=settings.WEBSOCKET_USER_CACHE_TTL)
+
+
+@dataclass(frozen=True)
+class WebsocketUser:
+    id: int
+    email: str
+
+
+def get_user_id_from_token(token):
+    """
+    Validates JWT signature, expiry and token type without touching the DB.
+    Returns user id from the token claims or None.
+    """
+    if not token:
+        return None
+    try:
+        access_token = AccessToken(token)
+        return int(access_token[api_settings.USER_ID_CLAIM])
+    except (TokenError, KeyError, TypeError, ValueError):
+        return None
+
+
+@database_sync_to_async
+def get_user_state(user_id):
+    return get_user_model().objects.filter(id=user_id).values("id", "email", "is_active").first()
+
+
+async def authenticate_websocket_token(token):
+    with metrics.timer("ws.auth.latency"):
+        user_id = get_user_id_from_token(token)
+        if user_id is None:
+            metrics.incr("ws.auth.rejected.invalid_token")
+            return None
+
+        user_state = websocket_users_cache.get(user_id, False)
+        if user_state is False:
+            metrics.incr("ws.auth.cache.miss")
+            user_state = await get_user_state(user_id)
+            websocket_users_cache.set(user_id, user_state)
+        else:
+            metrics.incr("ws.auth.cache.hit")
+
+        if not user_state or not user_state["is_active"]:
+            logger.warning(f"Websocket auth rejected for inactive or missing user: {user_id}")
+            metrics.incr("ws.auth.rejected.inactive_user")
+            return None
+
+        return WebsocketUser(id=user_state["id"], email=user_state["email"])
@@ -1,52 +1,106 @@
+from urllib.parse import parse_qs
+
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.conf import settings
 
 from log.logger_config import logger
+from notifications import presence
+from notifications.auth import authenticate_websocket_token
+from utils.metrics import metrics
 
 
 class NotificationConsumer(AsyncJsonWebsocketConsumer):
 
     async def connect(self):
-        query_string = self.scope["query_string"].decode()
-        token = None
-
-        if "token=" in query_string:
-            token = query_string.split("token=")[-1]
+        query_params = parse_qs(self.scope["query_string"].decode())
+        token = query_params.get("token", [None])[0]
 
-        self.user = await self.authenticate_user(token)
+        self.user = await authenticate_websocket_token(token)
 
         if self.user:
+            metrics.mark("ws.connect.accepted")
             await self.accept()
             await self.channel_layer.group_add(f"user_{self.user.id}", self.channel_name)
+            await presence.register_connection(self.user.id, self.channel_name)
             logger.success(f"✅ Connected: {self.user.email}")
+            # Subscribe first and replay after, so nothing published in between is lost.
+            # Clients de-duplicate frames by notification id.
+            last_notification_id = query_params.get("last_notification_id", [None])[0]
+            await self.sync_notifications(last_notification_id)
         else:
+            metrics.mark("ws.connect.rejected")
             logger.error("❌ Invalid or expired token")
             await self.close()
 
     @database_sync_to_async
-    def authenticate_user(self, token):
-        from django.contrib.auth import get_user_model
-        from rest_framework_simplejwt.tokens import AccessToken, TokenError
-        user = get_user_model()
-        if not token:
-            return None
+    def get_missed_notifications(self, last_notification_id):
+        """
+        Returns notifications created after `last_notification_id` (one query, capped by
+        NOTIFICATION_REPLAY_LIMIT) and the number of unread notifications.
+        """
+        from notifications.models import Notification
+
+        notifications = Notification.objects.filter(user_id=self.user.id)
+        missed = []
+        if last_notification_id is not None:
+            missed = list(
+                notifications.filter(id__gt=last_notification_id)
+                .order_by("id")
+                .values("id", "title", "message", "notification_type", "created_at", "read")
+                [:settings.NOTIFICATION_REPLAY_LIMIT + 1]
+            )
+        unread_count = notifications.filter(read=False).count()
+        return missed, unread_count
+
+    async def sync_notifications(self, last_notification_id):
         try:
-            access_token = AccessToken(token)
-            user_id = access_token["user_id"]
-            return user.objects.get(id=user_id)
-        except (TokenError, user.DoesNotExist):
-            return None
+            last_notification_id = int(last_notification_id) if last_notification_id else None
+        except ValueError:
+            logger.warning(f"Invalid last_notification_id: {last_notification_id}")
+            last_notification_id = None
+
+        missed, unread_count = await self.get_missed_notifications(last_notification_id)
+        replay_truncated = len(missed) > settings.NOTIFICATION_REPLAY_LIMIT
+        for notification in missed[:settings.NOTIFICATION_REPLAY_LIMIT]:
+            await self.send_json({
+                "type": "notification",
+                "id": notification["id"],
+                "message": notification["message"],
+                "title": notification["title"],
+                "notification_type": notification["notification_type"],
+                "created_at": notification["created_at"].isoformat(),
+                "read": notification["read"],
+                "replayed": True,
+            })
+
+        await self.send_json({
+            "type": "unread_count",
+            "count": unread_count,
+            # More missed notifications than the replay limit: client should re-fetch the list
+            "replay_truncated": replay_truncated,
+        })
+        logger.trace(f"Replayed {len(missed)} notifications, unread: {unread_count}")
+
+    async def receive_json(self, content, **kwargs):
+        # Clients send {"type": "heartbeat"} periodically (more often than PRESENCE_TTL)
+        if content.get("type") == "heartbeat":
+            await presence.heartbeat(self.user.id, self.channel_name)
+            await self.send_json({"type": "heartbeat"})
 
     async def disconnect(self, code):
         if self.user:
             await self.channel_layer.group_discard(f"user_{self.user.id}", self.channel_name)
+            await presence.unregister_connection(self.user.id, self.channel_name)
 
     async def send_notification(self, event):
         # Called when notification sent via channel_layer.group_send
         await self.send_json({
             "type": "notification",
+            "id": event.get("id"),
             "message": event["message"],
             "title": event["title"],
             "notification_type": event["notification_type"],
+            "created_at": event.get("created_at"),
         })
         logger.trace("Notification sent to websocket")
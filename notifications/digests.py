@@ -0,0 +1,101 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from log.logger_config import logger
+from notifications.models import DigestEntry, DigestEvent, EmailDigestPreference
+from utils.metrics import metrics
+
+Frequency = EmailDigestPreference.Frequency
+
+
+def digest_window_end(frequency, now=None):
+    """
+    Time the current window closes. Every event in the same window gets the same
+    deliver_after, so one digest covers all of them.
+    """
+    now = now or timezone.now()
+    if frequency == Frequency.HOURLY:
+        return now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    send_at = now.replace(hour=settings.DIGEST_DAILY_HOUR, minute=0, second=0, microsecond=0)
+    if send_at <= now:
+        send_at += timedelta(days=1)
+    return send_at
+
+
+def get_digest_frequencies(emails, event_type):
+    """
+    {email: frequency} for the recipients, one query. Missing preferences are immediate.
+    """
+    preferences = dict(
+        EmailDigestPreference.objects.filter(email__in=emails, event_type=event_type)
+        .values_list("email", "frequency")
+    )
+    return {email: preferences.get(email, Frequency.IMMEDIATE) for email in emails}
+
+
+def add_digest_entries(frequencies, event_type, summary):
+    """
+    Save the event for every recipient with a digest frequency.
+    Returns recipients that want the email immediately.
+    """
+    now = timezone.now()
+    immediate = []
+    entries = []
+    for email, frequency in frequencies.items():
+        if frequency == Frequency.IMMEDIATE:
+            immediate.append(email)
+            continue
+        entries.append(DigestEntry(
+            recipient_email=email,
+            event_type=event_type,
+            summary=summary[:255],
+            deliver_after=digest_window_end(frequency, now),
+        ))
+    if entries:
+        DigestEntry.objects.bulk_create(entries)
+        metrics.incr("email.digest.queued", len(entries))
+    return immediate
+
+
+def claim_due_digests():
+    """
+    Lock due entries and group them per recipient: {email: {event label: [entries]}}.
+    Must be called inside a transaction; the caller marks entries as sent.
+    """
+    entries = list(
+        DigestEntry.objects.select_for_update(skip_locked=True)
+        .filter(sent_at__isnull=True, deliver_after__lte=timezone.now())
+        .order_by("recipient_email", "event_type", "created_at")
+    )
+    labels = dict(DigestEvent.choices)
+    digests = defaultdict(lambda: defaultdict(list))
+    for entry in entries:
+        digests[entry.recipient_email][labels.get(entry.event_type, entry.event_type)].append(entry)
+    return entries, digests
+
+
+def send_due_digests(send):
+    """
+    Render one digest per recipient for every closed window and hand it to `send(email, subject, context)`.
+    Delivery is atomic with marking entries as sent, so a crash doesn't duplicate digests.
+    """
+    with transaction.atomic():
+        entries, digests = claim_due_digests()
+        for email, sections in digests.items():
+            total = sum(len(section) for section in sections.values())
+            send(
+                email,
+                f"Your SaveFryOil digest: {total} update{'s' if total != 1 else ''}",
+                {"sections": {label: list(section) for label, section in sections.items()}, "total": total},
+            )
+        if entries:
+            DigestEntry.objects.filter(id__in=[entry.id for entry in entries]).update(sent_at=timezone.now())
+
+    metrics.incr("email.digest.sent", len(digests))
+    if digests:
+        logger.info(f"Sent {len(digests)} digests covering {len(entries)} events")
+    return {"digests": len(digests), "events": len(entries)}
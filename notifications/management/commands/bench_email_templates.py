@@ -0,0 +1,75 @@
+"""
+Render time per email template: source template through render_to_string
+vs. compiled template from the in-memory cache.
+
+    python manage.py bench_email_templates --iterations 500
+"""
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+
+from utils.email_templates import email_templates
+
+
+def sample_context():
+    user = SimpleNamespace(first_name="Alex", last_name="Smith", email="alex@example.com")
+    prospect = SimpleNamespace(
+        contact_name="Sam Jones",
+        restaurant_organisation_name="Fry House",
+        email="sam@example.com",
+        phone="+441234567890",
+        country="GB",
+    )
+    commission = SimpleNamespace(commission_tree_level=0, currency="GBP", money_amount=150.0)
+    return {
+        "user": user,
+        "inviter_user": user,
+        "ambassador": user,
+        "claiming_ambassador": user,
+        "prospect": prospect,
+        "commission": commission,
+        "commissions": [commission] * 7,
+        "number_of_frylows": 3,
+        "password": "secret",
+        "confirm_url": "https://example.com/confirm",
+        "reset_url": "https://example.com/reset",
+        "onboarding_url": "https://example.com/onboarding",
+        "SOP_URL": "https://example.com/sop",
+        "claimed_at": "2025-01-01 12:00 UTC",
+        "approved_at": "2025-01-01 12:00 UTC",
+    }
+
+
+class Command(BaseCommand):
+    help = "Benchmark email template rendering"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=200)
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        context = sample_context()
+        email_templates.load()
+
+        self.stdout.write(f"{'template':45} {'source ms':>10} {'compiled ms':>12} {'source B':>9} {'compiled B':>11}")
+        for path in sorted((Path(settings.BASE_DIR) / "templates" / "emails").glob("*.html")):
+            template_name = f"emails/{path.name}"
+
+            started_at = time.perf_counter()
+            for _ in range(iterations):
+                source_html = render_to_string(template_name, context)
+            source_ms = (time.perf_counter() - started_at) / iterations * 1000
+
+            started_at = time.perf_counter()
+            for _ in range(iterations):
+                compiled_html = email_templates.render(template_name, context)
+            compiled_ms = (time.perf_counter() - started_at) / iterations * 1000
+
+            self.stdout.write(
+                f"{template_name:45} {source_ms:10.3f} {compiled_ms:12.3f} "
+                f"{len(source_html.encode()):9} {len(compiled_html.encode()):11}"
+            )
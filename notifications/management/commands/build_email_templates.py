@@ -0,0 +1,97 @@
+"""
+Build step for email templates: inline <style> rules into style attributes and minify markup.
+Output goes to EMAIL_TEMPLATES_BUILD_DIR and is loaded into memory by utils.email_templates.
+
+    python manage.py build_email_templates
+"""
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+DJANGO_TAG = re.compile(r"{%.*?%}|{{.*?}}|{#.*?#}", re.DOTALL)
+PLACEHOLDER = re.compile(r"<!--djtpl(\d+)x-->|djtpl(\d+)x")
+HTML_TAG = re.compile(r"(<[^>]*>)")
+COMMENT = re.compile(r"<!--(?!\[if|\s*\[endif|djtpl).*?-->", re.DOTALL)
+BLOCK_TAG = re.compile(
+    r"\s*(</?(?:html|head|body|meta|title|style|link|table|thead|tbody|tr|td|th|div|p|h[1-6]|ul|ol|li|br|hr)\b[^>]*>)\s*",
+    re.IGNORECASE,
+)
+WHITESPACE = re.compile(r"\s+")
+# `* {...}` rules get inlined into elements that are never rendered
+HEAD_STYLE = re.compile(r"(<(?:head|meta|title|style|link)\b[^>]*?) style=\"[^\"]*\"", re.IGNORECASE)
+
+
+def protect_template_tags(source):
+    """
+    Replace Django tags with placeholders the HTML parser leaves alone:
+    plain tokens inside HTML tags (attribute values), comments in text, so that
+    `{% for %}` between table rows isn't moved around by the parser.
+    """
+    tags = []
+
+    def to_token(match):
+        tags.append(match.group(0))
+        return f"djtpl{len(tags) - 1}x"
+
+    source = DJANGO_TAG.sub(to_token, source)
+    parts = HTML_TAG.split(source)
+    for index in range(0, len(parts), 2):  # even parts are text between HTML tags
+        parts[index] = re.sub(r"djtpl(\d+)x", r"<!--djtpl\1x-->", parts[index])
+    return "".join(parts), tags
+
+
+def restore_template_tags(source, tags):
+    return PLACEHOLDER.sub(lambda match: tags[int(match.group(1) or match.group(2))], source)
+
+
+def inline_css(source):
+    import css_inline
+
+    # Rules that can't be inlined (:hover, @media, @import) stay in the <style> tag
+    inliner = css_inline.CSSInliner(
+        keep_style_tags=True,
+        remove_inlined_selectors=True,
+        load_remote_stylesheets=False,
+    )
+    return HEAD_STYLE.sub(r"\1", inliner.inline(source))
+
+
+def minify_html(source):
+    if "<pre" in source or "<textarea" in source:
+        return source
+    source = COMMENT.sub("", source)
+    source = WHITESPACE.sub(" ", source)
+    return BLOCK_TAG.sub(r"\1", source).strip()
+
+
+def build_template(source):
+    protected, tags = protect_template_tags(source)
+    if "<style" in protected:
+        protected = inline_css(protected)
+    return restore_template_tags(minify_html(protected), tags)
+
+
+class Command(BaseCommand):
+    help = "Inline CSS and minify email templates into EMAIL_TEMPLATES_BUILD_DIR"
+
+    def handle(self, *args, **options):
+        source_dir = Path(settings.BASE_DIR) / "templates"
+        build_dir = Path(settings.EMAIL_TEMPLATES_BUILD_DIR)
+        total_before = total_after = 0
+
+        for path in sorted((source_dir / "emails").glob("*.html")):
+            source = path.read_text(encoding="utf-8")
+            compiled = build_template(source)
+            target = build_dir / path.relative_to(source_dir)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_text(compiled, encoding="utf-8")
+
+            total_before += len(source.encode())
+            total_after += len(compiled.encode())
+            self.stdout.write(f"{path.name}: {len(source.encode())} -> {len(compiled.encode())} bytes")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Built email templates into {build_dir}: {total_before} -> {total_after} bytes"
+        ))
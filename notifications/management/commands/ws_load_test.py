@@ -0,0 +1,289 @@
+"""
+Websocket load test for the notification layer.
+
+Opens N authenticated NotificationConsumer connections, publishes notifications through
+`send_notification` at a fixed rate and reports connect time, delivery latency and memory
+per connection.
+
+In-process (ASGI app is driven directly, in-memory or Redis channel layer):
+    python manage.py ws_load_test --connections 500 --rate 50 --duration 20 --layer memory
+
+Against a running server (needs the Redis channel layer shared with the server):
+    python manage.py ws_load_test --url ws://127.0.0.1:8001/ws/notifications/ --server-pid <pid>
+
+Load test users are `ws-loadtest-<n>@example.com`, created on demand; remove them with --cleanup.
+"""
+import asyncio
+import json
+import time
+import tracemalloc
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.tokens import AccessToken
+
+from notifications.utils import send_notification
+from utils.metrics import percentile
+
+LOAD_TEST_EMAIL = "ws-loadtest-{}@example.com"
+LOAD_TEST_MESSAGE_PREFIX = "ws-load-test"
+
+
+class ConnectionClosed(Exception):
+    pass
+
+
+class InProcessClient:
+    """Drives the ASGI application directly through its receive/send queues."""
+
+    def __init__(self, application, query_string):
+        self.application = application
+        self.scope = {
+            "type": "websocket",
+            "path": "/ws/notifications/",
+            "query_string": query_string.encode(),
+            "headers": [],
+            "subprotocols": [],
+        }
+        self.input_queue = asyncio.Queue()
+        self.output_queue = asyncio.Queue()
+        self.task = None
+
+    async def connect(self):
+        self.task = asyncio.create_task(
+            self.application(self.scope, self.input_queue.get, self.output_queue.put)
+        )
+        await self.input_queue.put({"type": "websocket.connect"})
+        message = await self.output_queue.get()
+        return message["type"] == "websocket.accept"
+
+    async def receive(self):
+        while True:
+            message = await self.output_queue.get()
+            if message["type"] == "websocket.send":
+                return message["text"]
+            if message["type"] == "websocket.close":
+                raise ConnectionClosed()
+
+    async def close(self):
+        if self.task and not self.task.done():
+            await self.input_queue.put({"type": "websocket.disconnect", "code": 1000})
+            try:
+                await asyncio.wait_for(self.task, timeout=5)
+            except (asyncio.TimeoutError, Exception):
+                self.task.cancel()
+
+
+class NetworkClient:
+    """Connects over a real socket to a running uvicorn/gunicorn server."""
+
+    def __init__(self, url, query_string):
+        self.url = f"{url}?{query_string}"
+        self.websocket = None
+
+    async def connect(self):
+        import websockets
+
+        try:
+            self.websocket = await websockets.connect(self.url, max_queue=None)
+        except Exception:
+            return False
+        return True
+
+    async def receive(self):
+        import websockets
+
+        try:
+            return await self.websocket.recv()
+        except websockets.ConnectionClosed:
+            raise ConnectionClosed()
+
+    async def close(self):
+        if self.websocket:
+            await self.websocket.close()
+
+
+def read_rss_kb(pid="self"):
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def summarize(values):
+    values = sorted(values)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "avg": round(sum(values) / len(values) * 1000, 3),
+        "p50": round(percentile(values, 50) * 1000, 3),
+        "p95": round(percentile(values, 95) * 1000, 3),
+        "p99": round(percentile(values, 99) * 1000, 3),
+        "max": round(values[-1] * 1000, 3),
+    }
+
+
+class Command(BaseCommand):
+    help = "Load test websocket notification delivery"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--connections", type=int, default=100, help="Number of websocket clients")
+        parser.add_argument("--users", type=int, default=None, help="Distinct users (default: one per connection)")
+        parser.add_argument("--rate", type=float, default=10, help="Notifications per second")
+        parser.add_argument("--duration", type=float, default=10, help="Seconds to publish notifications")
+        parser.add_argument("--url", default=None, help="ws:// URL of a running server, in-process if omitted")
+        parser.add_argument(
+            "--layer", choices=["redis", "memory"], default="redis",
+            help="Channel layer for in-process runs",
+        )
+        parser.add_argument("--server-pid", type=int, default=None, help="Server pid to sample RSS from")
+        parser.add_argument("--drain-timeout", type=float, default=5, help="Seconds to wait for late deliveries")
+        parser.add_argument("--json", action="store_true", help="Print report as JSON")
+        parser.add_argument("--cleanup", action="store_true", help="Delete load test users and exit")
+
+    def handle(self, *args, **options):
+        if options["cleanup"]:
+            deleted, _ = get_user_model().objects.filter(email__startswith="ws-loadtest-").delete()
+            self.stdout.write(f"Deleted {deleted} load test objects")
+            return
+
+        if not options["url"] and options["layer"] == "memory":
+            from channels.layers import DEFAULT_CHANNEL_LAYER, InMemoryChannelLayer, channel_layers
+
+            channel_layers.set(DEFAULT_CHANNEL_LAYER, InMemoryChannelLayer(capacity=1000))
+
+        users = self.get_users(options["users"] or options["connections"])
+        report = asyncio.run(self.run(users, options))
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        for key, value in report.items():
+            self.stdout.write(f"{key}: {value}")
+
+    def get_users(self, count):
+        user_model = get_user_model()
+        emails = [LOAD_TEST_EMAIL.format(index) for index in range(count)]
+        existing = set(user_model.objects.filter(email__in=emails).values_list("email", flat=True))
+        # bulk_create skips post_save signals (Mailchimp) and referral notifications
+        user_model.objects.bulk_create([
+            user_model(email=email, first_name="Load", last_name="Test", is_active=True)
+            for email in emails if email not in existing
+        ])
+        return list(user_model.objects.filter(email__in=emails).order_by("id"))
+
+    async def run(self, users, options):
+        connections = options["connections"]
+        tokens = {user.id: str(AccessToken.for_user(user)) for user in users}
+        user_ids = [users[index % len(users)].id for index in range(connections)]
+
+        if options["url"]:
+            def make_client(user_id):
+                return NetworkClient(options["url"], urlencode({"token": tokens[user_id]}))
+        else:
+            from ambassador_program.asgi import application
+
+            def make_client(user_id):
+                return InProcessClient(application, urlencode({"token": tokens[user_id]}))
+
+        server_pid = options["server_pid"] or (None if options["url"] else "self")
+        rss_before = read_rss_kb(server_pid) if server_pid else None
+        if not options["url"]:
+            tracemalloc.start()
+        traced_before = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+
+        # 1. Connect
+        connect_times = []
+        clients = []
+
+        async def open_connection(user_id):
+            client = make_client(user_id)
+            started_at = time.perf_counter()
+            if await client.connect():
+                connect_times.append(time.perf_counter() - started_at)
+                clients.append((user_id, client))
+
+        connect_started_at = time.perf_counter()
+        await asyncio.gather(*(open_connection(user_id) for user_id in user_ids))
+        connect_total = time.perf_counter() - connect_started_at
+
+        traced_after = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        rss_after = read_rss_kb(server_pid) if server_pid else None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+        # 2. Receive
+        latencies = []
+        expected_deliveries = 0
+        connections_per_user = {}
+        for user_id, _ in clients:
+            connections_per_user[user_id] = connections_per_user.get(user_id, 0) + 1
+
+        async def read_frames(client):
+            while True:
+                try:
+                    frame = json.loads(await client.receive())
+                except ConnectionClosed:
+                    return
+                message = frame.get("message") or ""
+                if frame.get("type") == "notification" and message.startswith(LOAD_TEST_MESSAGE_PREFIX):
+                    latencies.append(time.time() - float(message.split()[-1]))
+
+        readers = [asyncio.create_task(read_frames(client)) for _, client in clients]
+
+        # 3. Publish at the requested rate
+        total_notifications = int(options["rate"] * options["duration"])
+        target_user_ids = list(connections_per_user) or [user.id for user in users]
+        publish = sync_to_async(send_notification, thread_sensitive=False)
+        send_tasks = []
+        publish_started_at = time.perf_counter()
+        for index in range(total_notifications):
+            delay = publish_started_at + index / options["rate"] - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            user_id = target_user_ids[index % len(target_user_ids)]
+            expected_deliveries += connections_per_user.get(user_id, 0)
+            send_tasks.append(asyncio.create_task(
+                publish(user_id, f"{LOAD_TEST_MESSAGE_PREFIX} {index} {time.time()}", "info", "Load test")
+            ))
+        send_results = await asyncio.gather(*send_tasks, return_exceptions=True)
+        publish_elapsed = time.perf_counter() - publish_started_at
+        send_errors = [result for result in send_results if isinstance(result, Exception)]
+
+        # 4. Wait for late deliveries and close
+        drain_deadline = time.perf_counter() + options["drain_timeout"]
+        while len(latencies) < expected_deliveries and time.perf_counter() < drain_deadline:
+            await asyncio.sleep(0.05)
+        for reader in readers:
+            reader.cancel()
+        await asyncio.gather(*(client.close() for _, client in clients), return_exceptions=True)
+
+        connected = len(clients)
+        return {
+            "mode": "network" if options["url"] else f"in-process ({options['layer']} layer)",
+            "connections_requested": connections,
+            "connections_open": connected,
+            "connect_total_seconds": round(connect_total, 3),
+            "connect_ms": summarize(connect_times),
+            "notifications_sent": total_notifications - len(send_errors),
+            "send_errors": len(send_errors),
+            "publish_rate_achieved": round(total_notifications / publish_elapsed, 2) if publish_elapsed else None,
+            "deliveries_expected": expected_deliveries,
+            "deliveries_received": len(latencies),
+            "delivery_latency_ms": summarize(latencies),
+            "python_heap_kb_per_connection": (
+                round((traced_after - traced_before) / 1024 / connected, 2)
+                if connected and traced_before is not None else None
+            ),
+            "rss_kb_per_connection": (
+                round((rss_after - rss_before) / connected, 2)
+                if connected and rss_before is not None and rss_after is not None else None
+            ),
+        }
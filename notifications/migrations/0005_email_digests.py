@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_outgoingemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DigestEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipient_email', models.EmailField(max_length=254)),
+                ('event_type', models.CharField(choices=[('new_ambassador', 'New ambassador in your team'), ('new_prospect', 'New prospect in your team'), ('admin_new_prospect', 'New prospect registered'), ('admin_prospect_claimed', 'Prospect claimed')], max_length=32)),
+                ('summary', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('deliver_after', models.DateTimeField()),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['sent_at', 'deliver_after'], name='digest_entry_due_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='EmailDigestPreference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254)),
+                ('event_type', models.CharField(choices=[('new_ambassador', 'New ambassador in your team'), ('new_prospect', 'New prospect in your team'), ('admin_new_prospect', 'New prospect registered'), ('admin_prospect_claimed', 'Prospect claimed')], max_length=32)),
+                ('frequency', models.CharField(choices=[('immediate', 'Immediate'), ('hourly', 'Hourly'), ('daily', 'Daily')], default='immediate', max_length=10)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('email', 'event_type'), name='unique_digest_preference')],
+            },
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class Notification(models.Model):
@@ -10,6 +11,12 @@ class Notification(models.Model):
     notification_type = models.CharField(max_length=10)
     read = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Retention scans read notifications by age
+            models.Index(fields=["read", "created_at"], name="notification_read_created_idx"),
+        ]
+
     def __str__(self):
         return f"{self.user}: {self.message}"
 
@@ -22,3 +29,87 @@ class PushNotificationDeviceToken(models.Model):
 
     def __str__(self):
         return f"FCM Token for: {self.user}"
+
+
+class OutgoingEmail(models.Model):
+    """
+    Email outbox. Rows are written in the caller's transaction and delivered by
+    `notifications.tasks.send_queued_emails` over one SMTP connection per batch.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        SENT = "sent", "Sent"
+        FAILED = "failed", "Failed"
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    content_subtype = models.CharField(max_length=16, default="html")
+    from_email = models.CharField(max_length=255)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="outgoing_email_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.status})"
+
+
+class DigestEvent(models.TextChoices):
+    NEW_AMBASSADOR = "new_ambassador", "New ambassador in your team"
+    NEW_PROSPECT = "new_prospect", "New prospect in your team"
+    ADMIN_NEW_PROSPECT = "admin_new_prospect", "New prospect registered"
+    ADMIN_PROSPECT_CLAIMED = "admin_prospect_claimed", "Prospect claimed"
+
+
+class EmailDigestPreference(models.Model):
+    """
+    Delivery mode of one event type for one recipient. No row means immediate delivery.
+    Keyed by email, because admin recipients come from ADMIN_EMAIL_RECIPIENTS and may not be users.
+    """
+
+    class Frequency(models.TextChoices):
+        IMMEDIATE = "immediate", "Immediate"
+        HOURLY = "hourly", "Hourly"
+        DAILY = "daily", "Daily"
+
+    email = models.EmailField()
+    event_type = models.CharField(max_length=32, choices=DigestEvent.choices)
+    frequency = models.CharField(max_length=10, choices=Frequency.choices, default=Frequency.IMMEDIATE)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["email", "event_type"], name="unique_digest_preference"),
+        ]
+
+    def __str__(self):
+        return f"{self.email}: {self.event_type} {self.frequency}"
+
+
+class DigestEntry(models.Model):
+    """
+    Event waiting for the recipient's digest window to close.
+    """
+    recipient_email = models.EmailField()
+    event_type = models.CharField(max_length=32, choices=DigestEvent.choices)
+    summary = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+    deliver_after = models.DateTimeField()
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["sent_at", "deliver_after"], name="digest_entry_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.recipient_email}: {self.summary}"
@@ -0,0 +1,135 @@
+import smtplib
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from log.logger_config import logger
+from notifications.models import OutgoingEmail
+from utils.deadline import timeout_for
+from utils.metrics import metrics
+
+# While claimed by a worker, rows are hidden from other workers for this long.
+# If the worker dies mid-batch they become due again afterwards.
+CLAIM_LEASE = timedelta(minutes=10)
+
+
+def claim_due_emails(batch_size):
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutgoingEmail.Status.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        if emails:
+            OutgoingEmail.objects.filter(id__in=[email.id for email in emails]).update(
+                next_attempt_at=now + CLAIM_LEASE
+            )
+    return emails
+
+
+def is_permanent_error(error):
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 500 <= error.smtp_code < 600
+    return False
+
+
+def is_connection_error(error):
+    """
+    Socket level failure or a dropped connection, as opposed to an SMTP error reply
+    (SMTPException subclasses OSError too).
+    """
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+def release(emails):
+    """
+    Make claimed but unsent emails due again, without counting an attempt.
+    """
+    now = timezone.now()
+    for email in emails:
+        email.next_attempt_at = now
+
+
+def schedule_retry(email, error):
+    email.attempts += 1
+    email.last_error = str(error)[:2000]
+    if is_permanent_error(error) or email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = OutgoingEmail.Status.FAILED
+        metrics.incr("email.outbox.failed")
+        logger.error(f"Email {email.id} to {email.recipients} failed permanently: {error}")
+        return
+    backoff = min(
+        settings.EMAIL_OUTBOX_RETRY_BASE_SECONDS * 2 ** (email.attempts - 1),
+        settings.EMAIL_OUTBOX_RETRY_MAX_SECONDS,
+    )
+    email.next_attempt_at = timezone.now() + timedelta(seconds=backoff)
+    metrics.incr("email.outbox.retried")
+    logger.warning(f"Email {email.id} attempt {email.attempts} failed, retry in {backoff}s: {error}")
+
+
+def send_queued_emails(batch_size=None):
+    """
+    Deliver one batch of due outbox emails over a single SMTP connection.
+    Returns counts of sent and failed (rescheduled or given up) emails.
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    emails = claim_due_emails(batch_size)
+    if not emails:
+        return {"sent": 0, "failed": 0}
+
+    started_at = time.monotonic()
+    sent = failed = 0
+    connection = get_connection(timeout=timeout_for("smtp", settings.EMAIL_TIMEOUT))
+    try:
+        connection.open()
+    except Exception as e:
+        logger.error(f"Could not open SMTP connection: {e}")
+        for email in emails:
+            schedule_retry(email, e)
+        OutgoingEmail.objects.bulk_update(emails, ["attempts", "last_error", "status", "next_attempt_at"])
+        return {"sent": 0, "failed": len(emails)}
+
+    try:
+        for index, email in enumerate(emails):
+            message = EmailMessage(
+                email.subject, email.body, email.from_email, email.recipients, connection=connection
+            )
+            message.content_subtype = email.content_subtype
+            try:
+                message.send()
+                email.status = OutgoingEmail.Status.SENT
+                email.sent_at = timezone.now()
+                email.attempts += 1
+                sent += 1
+            except Exception as e:
+                schedule_retry(email, e)
+                failed += 1
+                if is_connection_error(e):
+                    # Connection is broken, reconnect for the rest of the batch
+                    connection.close()
+                    try:
+                        connection.open()
+                    except Exception as reopen_error:
+                        logger.error(f"Could not reopen SMTP connection: {reopen_error}")
+                        release(emails[index + 1:])
+                        break
+    finally:
+        connection.close()
+        OutgoingEmail.objects.bulk_update(
+            emails, ["status", "sent_at", "attempts", "last_error", "next_attempt_at"]
+        )
+
+    elapsed = time.monotonic() - started_at
+    metrics.incr("email.outbox.sent", sent)
+    metrics.observe("email.outbox.batch", elapsed)
+    logger.info(f"Email outbox batch: {sent} sent, {failed} failed in {elapsed:.2f}s")
+    return {"sent": sent, "failed": failed}
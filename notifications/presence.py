@@ -0,0 +1,86 @@
+"""
+Websocket presence registry.
+
+Every user has a Redis hash `presence:user:<id>` with one field per open websocket
+(channel name -> last heartbeat timestamp). A connection counts as present while its
+heartbeat is younger than PRESENCE_TTL, so connections of a crashed worker expire on their own.
+"""
+import time
+
+from django.conf import settings
+from redis.exceptions import RedisError
+
+from log.logger_config import logger
+from utils.redis_client import get_async_redis, get_redis
+
+
+def presence_key(user_id):
+    return f"presence:user:{user_id}"
+
+
+async def register_connection(user_id, channel_name):
+    try:
+        client = get_async_redis()
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.hset(presence_key(user_id), channel_name, time.time())
+            pipe.expire(presence_key(user_id), settings.PRESENCE_TTL)
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Presence register failed for user {user_id}: {e}")
+
+
+# Heartbeat refreshes the same fields as the initial registration
+heartbeat = register_connection
+
+
+async def unregister_connection(user_id, channel_name):
+    try:
+        client = get_async_redis()
+        key = presence_key(user_id)
+        await client.hdel(key, channel_name)
+        # Drop connections left behind by crashed workers
+        stale_before = time.time() - settings.PRESENCE_TTL
+        connections = await client.hgetall(key)
+        stale = [name for name, seen_at in connections.items() if float(seen_at) < stale_before]
+        if stale:
+            await client.hdel(key, *stale)
+    except RedisError as e:
+        logger.warning(f"Presence unregister failed for user {user_id}: {e}")
+
+
+def get_presence(user_ids):
+    """
+    Bulk presence lookup in one Redis round trip.
+    Returns {user_id: {"connections": int, "last_seen": float | None}}.
+    When Redis is unavailable every user is reported as offline.
+    """
+    user_ids = list(user_ids)
+    presence = {user_id: {"connections": 0, "last_seen": None} for user_id in user_ids}
+    if not user_ids:
+        return presence
+
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for user_id in user_ids:
+            pipe.hvals(presence_key(user_id))
+        results = pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Presence lookup failed: {e}")
+        return presence
+
+    stale_before = time.time() - settings.PRESENCE_TTL
+    for user_id, heartbeats in zip(user_ids, results):
+        fresh = [float(seen_at) for seen_at in heartbeats if float(seen_at) >= stale_before]
+        presence[user_id] = {
+            "connections": len(fresh),
+            "last_seen": max(fresh) if fresh else None,
+        }
+    return presence
+
+
+def get_online_user_ids(user_ids):
+    return {user_id for user_id, state in get_presence(user_ids).items() if state["connections"]}
+
+
+def is_user_online(user_id):
+    return user_id in get_online_user_ids([user_id])
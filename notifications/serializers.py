@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from notifications.models import Notification, PushNotificationDeviceToken
+from notifications.models import Notification, PushNotificationDeviceToken, EmailDigestPreference
 
 
 class NotificationSerializer(serializers.ModelSerializer):
@@ -14,3 +14,11 @@ class PushNotificationDeviceTokenSerializer(serializers.ModelSerializer):
     class Meta:
         model = PushNotificationDeviceToken
         fields = ["push_token", "device_type", "created_at"]
+
+
+class EmailDigestPreferenceSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = EmailDigestPreference
+        fields = ["event_type", "frequency", "updated_at"]
+        read_only_fields = ["updated_at"]
@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from log.logger_config import logger
+from notifications.digests import send_due_digests
+from notifications.outbox import send_queued_emails
+from notifications.utils import delete_read_notifications
+from utils.send_email import send_digest_email
+
+
+def cleanup_read_notifications():
+    """
+    Scheduled retention of read notifications older than NOTIFICATION_RETENTION_DAYS.
+    """
+    cutoff_date = timezone.now() - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS)
+    logger.info(f"🧹 Starting cleanup of read notifications older than {cutoff_date}")
+    return delete_read_notifications(
+        cutoff_date,
+        max_seconds=settings.NOTIFICATION_CLEANUP_MAX_SECONDS,
+    )
+
+
+def send_outbox_emails():
+    """
+    Drain the email outbox until there is nothing due.
+    """
+    totals = {"sent": 0, "failed": 0}
+    while True:
+        result = send_queued_emails()
+        totals["sent"] += result["sent"]
+        totals["failed"] += result["failed"]
+        if result["sent"] + result["failed"] < settings.EMAIL_OUTBOX_BATCH_SIZE:
+            return totals
+
+
+def send_digests():
+    """
+    Aggregate events of closed hourly/daily windows into one email per recipient.
+    """
+    return send_due_digests(send_digest_email)
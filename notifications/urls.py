@@ -1,9 +1,14 @@
 from django.urls import path
 
-from notifications.views import NotificationView, NotificationCleanUpView, PushNotificationDeviceView
+from notifications.views import (
+    NotificationView, NotificationCleanUpView, PushNotificationDeviceView, PresenceView,
+    EmailDigestPreferenceView,
+)
 
 urlpatterns = [
     path('', NotificationView.as_view(), name='retrieve-notifications'),
     path('register-device/', PushNotificationDeviceView.as_view(), name='fcm-token'),
     path('cleanup/', NotificationCleanUpView.as_view(), name='notifications-cleanup'),
+    path('presence/', PresenceView.as_view(), name='notifications-presence'),
+    path('digest-preferences/', EmailDigestPreferenceView.as_view(), name='digest-preferences'),
 ]
@@ -1,15 +1,25 @@
+import time
 from log.logger_config import logger
 
-import requests
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
+from django.conf import settings
 from django.db import transaction
 from dotenv import load_dotenv
 
 from notifications.models import Notification, PushNotificationDeviceToken
+from notifications.presence import get_online_user_ids, is_user_online
+from utils.deadline import wait_for
+from utils.http_client import IntegrationSession
+from utils.metrics import metrics
+from utils.rate_limit import RedisTokenBucket
 
 load_dotenv()
 
+expo_session = IntegrationSession(
+    "expo", rate_limit=RedisTokenBucket("expo", settings.EXPO_RATE_LIMIT, settings.EXPO_BURST)
+)
+
 
 def send_push_notification(push_token, title, message, data=None):
     payload = {
@@ -24,7 +34,7 @@ def send_push_notification(push_token, title, message, data=None):
         'Content-Type': 'application/json',
         'Accept': 'application/json'
     }
-    response = requests.post('https://exp.host/--/api/v2/push/send', json=payload, headers=headers)
+    response = expo_session.post(f'{settings.EXPO_API_BASE_URL}/--/api/v2/push/send', json=payload, headers=headers)
     logger.info(f"Push Notification sent response: {response.json()}")
     return response.json()
 
@@ -36,9 +46,14 @@ def push_notify_user(user_id, title, message):
         send_push_notification(token, title, message)
 
 
-def send_notification(user_id, message, notification_type, notification_title):
+def send_notification(user_id, message, notification_type, notification_title, user_online=None):
+    """
+    Store notification, publish it to user's websocket group and send push notification.
+    Push is skipped while the user has a live websocket connection.
+    `user_online` can be passed by callers that already looked presence up in bulk.
+    """
     with transaction.atomic():
-        Notification.objects.create(
+        notification = Notification.objects.create(
             user_id=user_id,
             message=message,
             title=notification_title,
@@ -46,18 +61,73 @@ def send_notification(user_id, message, notification_type, notification_title):
         )
         logger.info("Notification created in DB")
         channel_layer = get_channel_layer()
-        async_to_sync(channel_layer.group_send)(
-            f"user_{user_id}",
-            {
-                "type": "send_notification",
-                "message": message,
-                "title": notification_title,
-                "notification_type": notification_type
-            },
+        async_to_sync(wait_for)(
+            "channel_layer",
+            channel_layer.group_send(
+                f"user_{user_id}",
+                {
+                    "type": "send_notification",
+                    "id": notification.id,
+                    "created_at": notification.created_at.isoformat(),
+                    "message": message,
+                    "title": notification_title,
+                    "notification_type": notification_type
+                },
+            ),
+            settings.CHANNEL_LAYER_TIMEOUT,
         )
-        push_notify_user(user_id, message, notification_title)
+        if user_online is None:
+            user_online = is_user_online(user_id)
+        if user_online:
+            logger.info(f"User {user_id} has live websocket connection, push notification skipped")
+            metrics.incr("push.skipped.online")
+        else:
+            push_notify_user(user_id, message, notification_title)
 
 
 def send_notification_to_multiple_users(users, message, notification_type, notification_title):
+    online_user_ids = get_online_user_ids([user.id for user in users])
     for user in users:
-        send_notification(user.id, message, notification_type, notification_title)
+        send_notification(
+            user.id,
+            message,
+            notification_type,
+            notification_title,
+            user_online=user.id in online_user_ids
+        )
+
+
+def delete_read_notifications(cutoff_date, batch_size=None, max_seconds=None):
+    """
+    Delete read notifications created before `cutoff_date` in bounded chunks.
+    Every chunk is a separate short transaction, so the cost of one run depends on
+    the chunk size rather than on the size of the backlog.
+    Returns number of deleted rows, number of chunks and time spent.
+    """
+    batch_size = batch_size or settings.NOTIFICATION_CLEANUP_BATCH_SIZE
+    started_at = time.monotonic()
+    deleted_count = 0
+    batches = 0
+
+    while True:
+        batch_ids = list(
+            Notification.objects.filter(read=True, created_at__lt=cutoff_date)
+            .order_by("created_at")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not batch_ids:
+            break
+
+        batch_deleted, _ = Notification.objects.filter(id__in=batch_ids).delete()
+        deleted_count += batch_deleted
+        batches += 1
+
+        if len(batch_ids) < batch_size:
+            break
+        if max_seconds and time.monotonic() - started_at >= max_seconds:
+            logger.warning(f"Notification cleanup stopped after {max_seconds}s time budget")
+            break
+
+    elapsed = round(time.monotonic() - started_at, 3)
+    logger.info(f"Deleted {deleted_count} read notifications in {batches} batches ({elapsed}s)")
+    return {"deleted": deleted_count, "batches": batches, "elapsed_seconds": elapsed}
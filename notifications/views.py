@@ -1,14 +1,21 @@
 from log.logger_config import logger
 from datetime import timedelta
 
+from django.conf import settings
 from django.utils import timezone
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from notifications.models import Notification
-from notifications.serializers import NotificationSerializer, PushNotificationDeviceTokenSerializer
+from notifications.models import Notification, DigestEvent, EmailDigestPreference
+from notifications.presence import get_presence
+from notifications.serializers import (
+    NotificationSerializer, PushNotificationDeviceTokenSerializer, EmailDigestPreferenceSerializer
+)
+from notifications.utils import delete_read_notifications
 from ambassador_program.views import check_auth_key
+from prospect.permissions import IsSuperUser
+from utils.deadline import timeout_for
 
 
 class NotificationView(APIView):
@@ -43,16 +50,37 @@ class NotificationCleanUpView(APIView):
         try:
             check_auth_key(headers)
             logger.info("🧹 Starting cleanup of old read notifications...")
-            cutoff_date = timezone.now() - timedelta(weeks=2)
-            deleted_count, _ = Notification.objects.filter(
-                read=True, created_at__lt=cutoff_date
-            ).delete()
-            logger.info(f"🧹 Deleted {deleted_count} old notifications.")
-            return Response({"detail": f"Successfully deleted {deleted_count} old notifications"}, status=200)
+            cutoff_date = timezone.now() - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS)
+            # Bounded like the scheduled task (and by the request deadline); it deletes the rest
+            result = delete_read_notifications(
+                cutoff_date, max_seconds=timeout_for("notification_cleanup", settings.NOTIFICATION_CLEANUP_MAX_SECONDS)
+            )
+            logger.info(f"🧹 Deleted {result['deleted']} old notifications.")
+            return Response(
+                {
+                    "detail": f"Successfully deleted {result['deleted']} old notifications",
+                    **result,
+                },
+                status=200
+            )
         except Exception as e:
             return Response(f"Error: {e}", status=400)
 
 
+class PresenceView(APIView):
+    permission_classes = (IsSuperUser,)
+
+    def get(self, request):
+        """
+        Bulk presence lookup: ?user_ids=1,2,3
+        """
+        try:
+            user_ids = [int(user_id) for user_id in request.query_params.get("user_ids", "").split(",") if user_id]
+        except ValueError:
+            return Response({"error": "user_ids must be a comma separated list of ids"}, status=400)
+        return Response(get_presence(user_ids))
+
+
 class PushNotificationDeviceView(APIView):
     permission_classes = (IsAuthenticated,)
 
@@ -77,3 +105,37 @@ class PushNotificationDeviceView(APIView):
         except Exception as e:
             logger.error(f"Push Notification Device Error: {e}")
             return Response(f"error: {e}", status=400)
+
+
+class EmailDigestPreferenceView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        """
+        Delivery frequency of every event type for the current user, immediate when not set.
+        """
+        preferences = dict(
+            EmailDigestPreference.objects.filter(email=request.user.email).values_list("event_type", "frequency")
+        )
+        return Response([
+            {
+                "event_type": event_type,
+                "label": label,
+                "frequency": preferences.get(event_type, EmailDigestPreference.Frequency.IMMEDIATE),
+            }
+            for event_type, label in DigestEvent.choices
+        ])
+
+    def put(self, request):
+        serializer = EmailDigestPreferenceSerializer(data=request.data)
+        if not serializer.is_valid():
+            logger.error(f"Invalid digest preference {serializer.errors}")
+            return Response({"error": f"Request data is not valid: {serializer.errors}"}, status=400)
+
+        preference, _ = EmailDigestPreference.objects.update_or_create(
+            email=request.user.email,
+            event_type=serializer.validated_data["event_type"],
+            defaults={"frequency": serializer.validated_data["frequency"]},
+        )
+        logger.info(f"Digest preference updated: {preference}")
+        return Response(EmailDigestPreferenceSerializer(preference).data)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Prospect
+from .models import Prospect, GhlSyncJob, GhlSyncItem, GhlReconcileCursor, GhlWebhookEvent
 
 
 @admin.register(Prospect)
@@ -30,3 +30,63 @@ class ProspectAdmin(admin.ModelAdmin):
             return f"{obj.registered_user.email}"
         return "-"
     registered_user_link.short_description = "Registered User"
+
+
+@admin.register(GhlSyncJob)
+class GhlSyncJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "created_by",
+        "status",
+        "total",
+        "succeeded",
+        "failed",
+        "attempts",
+        "created_at",
+        "finished_at",
+    )
+    list_filter = ("status", "created_at")
+    readonly_fields = ("created_at", "updated_at", "finished_at")
+
+
+@admin.register(GhlSyncItem)
+class GhlSyncItemAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "job",
+        "prospect",
+        "status",
+        "attempts",
+        "ghl_contact_id",
+        "updated_at",
+    )
+    list_filter = ("status",)
+    search_fields = ("prospect__email", "ghl_contact_id")
+    raw_id_fields = ("job", "prospect")
+
+
+@admin.register(GhlReconcileCursor)
+class GhlReconcileCursorAdmin(admin.ModelAdmin):
+    list_display = (
+        "location_id",
+        "start_after_id",
+        "contacts_seen",
+        "updated_at",
+        "last_completed_at",
+    )
+
+
+@admin.register(GhlWebhookEvent)
+class GhlWebhookEventAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "event_type",
+        "location_id",
+        "status",
+        "attempts",
+        "received_at",
+        "processed_at",
+    )
+    list_filter = ("status", "event_type", "received_at")
+    search_fields = ("webhook_id", "location_id")
+    readonly_fields = ("received_at", "claimed_at", "processed_at")
@@ -0,0 +1,100 @@
+from collections import defaultdict
+
+from django.db import transaction
+
+from log.logger_config import logger
+from notifications.presence import get_online_user_ids
+from notifications.utils import send_notification
+from prospect.models import Prospect
+from utils.send_email import send_html_email
+
+COMPLETED = "completed"
+ALREADY_COMPLETED = "already_completed"
+NOT_FOUND = "not_found"
+
+
+def notify_deals_completed(prospects):
+    """
+    One in-app notification per ambassador and one email per completed prospect.
+    Runs after the deals are committed, so a failed delivery is logged and the rest still go out.
+    """
+    by_ambassador = defaultdict(list)
+    for prospect in prospects:
+        if prospect.invited_by_user:
+            by_ambassador[prospect.invited_by_user].append(prospect)
+
+    online_user_ids = get_online_user_ids([ambassador.id for ambassador in by_ambassador])
+    for ambassador, ambassador_prospects in by_ambassador.items():
+        if len(ambassador_prospects) == 1:
+            message = "Your invited prospect's deal is completed"
+        else:
+            message = f"{len(ambassador_prospects)} of your invited prospects' deals are completed"
+        try:
+            send_notification(
+                ambassador.id,
+                message,
+                "info",
+                "Prospect's Deal Completed",
+                user_online=ambassador.id in online_user_ids,
+            )
+        except Exception as e:
+            logger.error(f"Deal completed notification to ambassador {ambassador.id} failed: {e}")
+        for prospect in ambassador_prospects:
+            try:
+                send_html_email(  # Email to ambassador that his prospect deal completed
+                    subject="Your Save Fry Oil Prospect's deal is completed",
+                    recipients=[ambassador.email],
+                    email_body={
+                        "prospect": prospect,
+                        "ambassador": ambassador,
+                    },
+                    template_name="emails/ambassador_to_claim_a_commission.html"
+                )
+            except Exception as e:
+                logger.error(f"Deal completed email of prospect {prospect.id} to {ambassador.email} failed: {e}")
+
+
+def complete_deals(pairs):
+    """
+    Mark deals of (ghl_contact_id, ghl_location_id) pairs completed with one query and one UPDATE.
+    Ambassadors are notified after the transaction commits.
+
+    Returns {(ghl_contact_id, ghl_location_id): outcome}.
+    """
+    pairs = list(dict.fromkeys(pairs))
+    if not pairs:
+        return {}
+    contact_ids = {contact_id for contact_id, _ in pairs}
+    location_ids = {location_id for _, location_id in pairs}
+
+    with transaction.atomic():
+        prospects = {
+            (prospect.ghl_contact_id, prospect.ghl_location_id): prospect
+            for prospect in Prospect.objects.select_for_update(of=("self",))
+            .select_related("invited_by_user")
+            .filter(ghl_location_id__in=location_ids, ghl_contact_id__in=contact_ids)
+        }
+
+        outcomes = {}
+        completed = []
+        for pair in pairs:
+            prospect = prospects.get(pair)
+            if not prospect:
+                outcomes[pair] = NOT_FOUND
+            elif prospect.deal_completed:
+                outcomes[pair] = ALREADY_COMPLETED
+            else:
+                prospect.deal_completed = True
+                completed.append(prospect)
+                outcomes[pair] = COMPLETED
+
+        if completed:
+            Prospect.objects.filter(id__in=[prospect.id for prospect in completed]).update(deal_completed=True)
+            transaction.on_commit(lambda: notify_deals_completed(completed), robust=True)
+
+    logger.info(
+        f"Deals completed: {len(completed)}, already completed: "
+        f"{sum(outcome == ALREADY_COMPLETED for outcome in outcomes.values())}, "
+        f"not found: {sum(outcome == NOT_FOUND for outcome in outcomes.values())}"
+    )
+    return outcomes
@@ -0,0 +1,153 @@
+from collections import Counter, defaultdict
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from log.logger_config import logger
+from prospect.models import Prospect, GhlReconcileCursor
+from utils.ghl_api import GHL_API
+
+PAGE_SIZE = 100
+
+
+def normalize_email(email):
+    return (email or "").strip().lower()
+
+
+def match_contacts(location_id, contacts):
+    """
+    Match one page of GHL contacts to prospects by contact id, then by normalised email.
+    Email only links prospects without a contact that aren't linked to another location;
+    a stored contact id is only replaced after it's unlinked as missing (--clear-missing).
+    Returns (prospects to update, discrepancies, stats).
+    """
+    stats = Counter()
+    discrepancies = []
+    contact_ids = [contact["id"] for contact in contacts]
+    emails = [normalize_email(contact.get("email")) for contact in contacts if contact.get("email")]
+
+    by_id = {prospect.ghl_contact_id: prospect for prospect in Prospect.objects.filter(ghl_contact_id__in=contact_ids)}
+    by_email = defaultdict(list)
+    for prospect in (
+        Prospect.objects.annotate(email_normalized=Lower("email"))
+        .filter(email_normalized__in=emails)
+        .filter(Q(ghl_location_id__isnull=True) | Q(ghl_location_id=location_id))
+    ):
+        by_email[prospect.email_normalized].append(prospect)
+
+    changed = {}
+    for contact in contacts:
+        contact_id = contact["id"]
+        prospect = by_id.get(contact_id)
+        if prospect:
+            stats["matched_by_id"] += 1
+            if prospect.ghl_location_id != location_id:
+                discrepancies.append({
+                    "type": "location_mismatch", "prospect": prospect.id, "contact_id": contact_id,
+                    "stored": prospect.ghl_location_id, "actual": location_id,
+                })
+                prospect.ghl_location_id = location_id
+                changed[prospect.id] = prospect
+            continue
+
+        prospects = by_email.get(normalize_email(contact.get("email")), [])
+        if not prospects:
+            stats["unmatched"] += 1  # Contact isn't one of our prospects
+            continue
+
+        stats["matched_by_email"] += 1
+        if len(prospects) > 1:
+            discrepancies.append({
+                "type": "ambiguous", "prospects": [prospect.id for prospect in prospects], "contact_id": contact_id,
+            })
+            continue
+        prospect = prospects[0]
+        if prospect.ghl_contact_id:
+            # Linked to another contact with this email, a GHL duplicate
+            discrepancies.append({
+                "type": "duplicate_contact", "prospect": prospect.id, "contact_id": contact_id,
+                "stored": prospect.ghl_contact_id,
+            })
+            continue
+        discrepancies.append({"type": "linked", "prospect": prospect.id, "contact_id": contact_id})
+        prospect.ghl_contact_id = contact_id
+        prospect.ghl_location_id = location_id
+        changed[prospect.id] = prospect
+
+    return list(changed.values()), discrepancies, stats
+
+
+def find_missing_contacts(location_id, seen_contact_ids):
+    """Prospects linked to a contact of the location that GHL no longer has."""
+    return list(
+        Prospect.objects.filter(ghl_location_id=location_id, ghl_contact_id__isnull=False)
+        .exclude(ghl_contact_id__in=seen_contact_ids)
+    )
+
+
+def reconcile_location(location_id, max_pages=None, dry_run=False, reset=False, clear_missing=False):
+    """
+    Page through the location's contacts from the stored cursor and fix drifted prospect links.
+    Missing contacts are only detected when the whole list is read in this run.
+    """
+    try:
+        cursor, _ = GhlReconcileCursor.objects.get_or_create(location_id=location_id)
+        if reset:
+            cursor.start_after_id = cursor.start_after = None
+            cursor.contacts_seen = 0
+        full_pass = cursor.start_after_id is None
+
+        report = {"location_id": location_id, "pages": 0, "updated": 0, "discrepancies": [], "completed": False}
+        stats = Counter()
+        seen_contact_ids = set()
+
+        while max_pages is None or report["pages"] < max_pages:
+            page = GHL_API.list_contacts(location_id, cursor.start_after_id, cursor.start_after, PAGE_SIZE)
+            contacts = page.get("contacts", [])
+            report["pages"] += 1
+
+            prospects, discrepancies, page_stats = match_contacts(location_id, contacts)
+            stats.update(page_stats)
+            report["discrepancies"] += discrepancies
+            if prospects and not dry_run:
+                Prospect.objects.bulk_update(prospects, ["ghl_contact_id", "ghl_location_id"])
+            report["updated"] += len(prospects)
+            seen_contact_ids.update(contact["id"] for contact in contacts)
+
+            meta = page.get("meta", {})
+            cursor.contacts_seen += len(contacts)
+            if len(contacts) < PAGE_SIZE or not meta.get("startAfterId"):
+                report["completed"] = True
+                break
+            cursor.start_after_id = meta["startAfterId"]
+            cursor.start_after = meta.get("startAfter")
+            if not dry_run:
+                cursor.save()
+
+        if report["completed"]:
+            if full_pass:
+                missing = find_missing_contacts(location_id, seen_contact_ids)
+                report["discrepancies"] += [
+                    {"type": "missing_in_ghl", "prospect": prospect.id, "contact_id": prospect.ghl_contact_id}
+                    for prospect in missing
+                ]
+                if missing and clear_missing and not dry_run:
+                    Prospect.objects.filter(id__in=[prospect.id for prospect in missing]).update(
+                        ghl_contact_id=None, ghl_location_id=None
+                    )
+            cursor.start_after_id = cursor.start_after = None
+            cursor.contacts_seen = 0
+            cursor.last_completed_at = timezone.now()
+            if not dry_run:
+                cursor.save()
+
+        report.update(stats)
+        logger.info(
+            f"GHL reconcile {location_id}: {report['pages']} pages, {report['updated']} updated, "
+            f"{len(report['discrepancies'])} discrepancies"
+        )
+        return report
+    finally:
+        connections.close_all()  # Runs in a worker thread with its own connection
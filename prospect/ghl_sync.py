@@ -0,0 +1,77 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from log.logger_config import logger
+from prospect.models import Prospect
+from utils.deadline import propagate
+from utils.ghl_api import GHL_API
+from utils.prepare_payload import prospect_prepare_payload
+
+
+def submit_prospect(prospect, assign_to_user):
+    """
+    Create one GHL contact. Runs in a worker thread, so it doesn't touch the database.
+    Returns (ghl_location_id, ghl_contact_id); raises on failure.
+    """
+    ghl_location_id = GHL_API.country_to_locationID[prospect["country"]]
+    contact_payload = prospect_prepare_payload.ghl_contact_create(prospect, assign_to_user)
+    logger.debug(f"Location ID: {ghl_location_id}")
+    logger.debug(f"data for GHL contact{contact_payload}")
+
+    contact = GHL_API.create_contact(contact_payload, ghl_location_id)
+    logger.debug(f"GHL contact response: {contact}")
+    contact_id = contact.get("contact", {}).get("id")
+    if not contact_id:
+        raise ValueError(f"GHL did not return a contact id: {contact}")
+    return ghl_location_id, contact_id
+
+
+def submit_prospects_to_ghl(prospects, assign_to_user):
+    """
+    Submit prospects to GHL concurrently (per-location rate limit lives in GHL_API)
+    and store contact ids with one bulk update.
+
+    Returns ({prospect id: (ghl_location_id, ghl_contact_id)}, {prospect id: error message}).
+    """
+    started_at = time.monotonic()
+    created = {}
+    errors = {}
+
+    # Warm the token cache once per location instead of racing every thread for it
+    for location_id in {GHL_API.country_to_locationID.get(prospect.get("country")) for prospect in prospects}:
+        if location_id:
+            try:
+                GHL_API.get_location_access_token(location_id)
+            except Exception as e:
+                logger.error(f"Could not get GHL token for location {location_id}: {e}")
+
+    with ThreadPoolExecutor(max_workers=settings.GHL_SUBMIT_CONCURRENCY) as executor:
+        futures = {
+            prospect["id"]: (prospect, executor.submit(propagate(submit_prospect), prospect, assign_to_user))
+            for prospect in prospects
+        }
+        for prospect_id, (prospect, future) in futures.items():
+            try:
+                created[prospect_id] = future.result()
+                logger.info(f"Prospect {prospect['email']} created successfully")
+            except KeyError as e:
+                errors[prospect_id] = f"Unsupported country: {e}"
+            except Exception as e:
+                logger.error(f"Error creating Prospect[{prospect.get('email')}]: {e}")
+                errors[prospect_id] = str(e)
+
+    db_prospects = Prospect.objects.in_bulk(list(created))
+    for prospect_id, (ghl_location_id, contact_id) in created.items():
+        db_prospect = db_prospects.get(prospect_id)
+        if db_prospect:
+            db_prospect.ghl_location_id = ghl_location_id
+            db_prospect.ghl_contact_id = contact_id
+    Prospect.objects.bulk_update(db_prospects.values(), ["ghl_contact_id", "ghl_location_id"])
+
+    logger.info(
+        f"Submitted {len(prospects)} prospects to GHL in {time.monotonic() - started_at:.2f}s: "
+        f"{len(created)} created, {len(errors)} failed"
+    )
+    return created, errors
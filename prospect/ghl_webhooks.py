@@ -0,0 +1,197 @@
+import base64
+import hashlib
+import json
+from collections import defaultdict
+from datetime import timedelta
+
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from log.logger_config import logger
+from prospect.deals import complete_deals
+from prospect.models import Prospect, GhlWebhookEvent
+from utils.metrics import metrics
+
+# GHL's webhook signing key, parsed once per process
+GHL_PUBLIC_KEY = serialization.load_pem_public_key(b"""-----BEGIN PUBLIC KEY-----
+MIICIjANBgkqhkiG9w0BAQEFAAOCAg8AMIICCgKCAgEAokvo/r9tVgcfZ5DysOSC
+Frm602qYV0MaAiNnX9O8KxMbiyRKWeL9JpCpVpt4XHIcBOK4u3cLSqJGOLaPuXw6
+dO0t6Q/ZVdAV5Phz+ZtzPL16iCGeK9po6D6JHBpbi989mmzMryUnQJezlYJ3DVfB
+csedpinheNnyYeFXolrJvcsjDtfAeRx5ByHQmTnSdFUzuAnC9/GepgLT9SM4nCpv
+uxmZMxrJt5Rw+VUaQ9B8JSvbMPpez4peKaJPZHBbU3OdeCVx5klVXXZQGNHOs8gF
+3kvoV5rTnXV0IknLBXlcKKAQLZcY/Q9rG6Ifi9c+5vqlvHPCUJFT5XUGG5RKgOKU
+J062fRtN+rLYZUV+BjafxQauvC8wSWeYja63VSUruvmNj8xkx2zE/Juc+yjLjTXp
+IocmaiFeAO6fUtNjDeFVkhf5LNb59vECyrHD2SQIrhgXpO4Q3dVNA5rw576PwTzN
+h/AMfHKIjE4xQA1SZuYJmNnmVZLIZBlQAF9Ntd03rfadZ+yDiOXCCs9FkHibELhC
+HULgCsnuDJHcrGNd5/Ddm5hxGQ0ASitgHeMZ0kcIOwKDOzOU53lDza6/Y09T7sYJ
+PQe7z0cvj7aE4B+Ax1ZoZGPzpJlZtGXCsu9aTEGEnKzmsFqwcSsnw3JB31IGKAyk
+T1hhTiaCeIY/OwwwNUY2yvcCAwEAAQ==
+-----END PUBLIC KEY-----""")
+
+CONTACT_DELETE = "ContactDelete"
+OPPORTUNITY_STATUS_UPDATE = "OpportunityStatusUpdate"
+HANDLED_EVENTS = (CONTACT_DELETE, OPPORTUNITY_STATUS_UPDATE)
+
+# A claimed event not finished within this long belongs to a dead worker and is claimed again
+CLAIM_LEASE = timedelta(minutes=10)
+
+
+def verify_signature(raw_body, signature_b64):
+    """
+    Raises ValueError for a malformed signature and cryptography.exceptions.InvalidSignature for a wrong one.
+    """
+    try:
+        signature_bytes = base64.b64decode(signature_b64, validate=True)
+    except Exception:
+        raise ValueError("Invalid signature format")
+    GHL_PUBLIC_KEY.verify(signature_bytes, raw_body, padding.PKCS1v15(), hashes.SHA256())
+
+
+def store_event(raw_body):
+    """
+    Save a verified webhook. Returns (event, created); a redelivered webhook isn't stored twice.
+    Event types without a handler aren't stored: (None, False).
+    Raises ValueError if the body isn't a JSON object.
+    """
+    payload = json.loads(raw_body)
+    if not isinstance(payload, dict):
+        raise ValueError("Webhook body is not a JSON object")
+    event_type = payload.get("type", "")
+    if event_type not in HANDLED_EVENTS:
+        metrics.incr("ghl.webhook.ignored")
+        return None, False
+    webhook_id = payload.get("webhookId") or hashlib.sha256(raw_body).hexdigest()[:64]
+    try:
+        with transaction.atomic():
+            event = GhlWebhookEvent.objects.create(
+                webhook_id=webhook_id,
+                event_type=event_type,
+                location_id=payload.get("locationId") or "",
+                payload=payload,
+            )
+        return event, True
+    except IntegrityError:
+        metrics.incr("ghl.webhook.duplicate")
+        return GhlWebhookEvent.objects.get(webhook_id=webhook_id), False
+
+
+def claim_pending_events(batch_size):
+    """
+    Claim due events as RUNNING. Events of a worker that died are claimed again after
+    CLAIM_LEASE, or given up once they used all attempts.
+    """
+    now = timezone.now()
+    abandoned = Q(status=GhlWebhookEvent.Status.RUNNING, claimed_at__lt=now - CLAIM_LEASE)
+    with transaction.atomic():
+        GhlWebhookEvent.objects.filter(abandoned, attempts__gte=settings.GHL_WEBHOOK_MAX_ATTEMPTS).update(
+            status=GhlWebhookEvent.Status.FAILED, error="Abandoned by a worker on the last attempt"
+        )
+        events = list(
+            GhlWebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(Q(status=GhlWebhookEvent.Status.PENDING, next_attempt_at__lte=now) | abandoned)
+            .order_by("received_at")[:batch_size]
+        )
+        if events:
+            GhlWebhookEvent.objects.filter(id__in=[event.id for event in events]).update(
+                status=GhlWebhookEvent.Status.RUNNING, claimed_at=now, attempts=F("attempts") + 1
+            )
+    for event in events:
+        event.attempts += 1
+    return events
+
+
+def schedule_retry(events, error):
+    """
+    Put failed events back to PENDING with backoff, or FAILED once out of attempts.
+    """
+    now = timezone.now()
+    for event in events:
+        event.error = str(error)[:2000]
+        if event.attempts >= settings.GHL_WEBHOOK_MAX_ATTEMPTS:
+            event.status = GhlWebhookEvent.Status.FAILED
+        else:
+            event.status = GhlWebhookEvent.Status.PENDING
+            event.next_attempt_at = now + timedelta(
+                seconds=settings.GHL_WEBHOOK_RETRY_BASE_SECONDS * 2 ** (event.attempts - 1)
+            )
+    GhlWebhookEvent.objects.bulk_update(events, ["status", "error", "next_attempt_at"])
+
+
+def handle_contact_deletes(events):
+    """Unlink deleted contacts, one UPDATE per location"""
+    contacts_by_location = defaultdict(set)
+    for event in events:
+        contacts_by_location[event.location_id].add(event.payload.get("id"))
+    unlinked = 0
+    for location_id, contact_ids in contacts_by_location.items():
+        unlinked += Prospect.objects.filter(ghl_location_id=location_id, ghl_contact_id__in=contact_ids).update(
+            ghl_contact_id=None, ghl_location_id=None
+        )
+    logger.info(f"GHL ContactDelete: {len(events)} events, {unlinked} prospects unlinked")
+
+
+def handle_opportunity_status_updates(events):
+    """Won opportunities complete the prospect's deal"""
+    won = [
+        (event.payload.get("contactId"), event.location_id)
+        for event in events if event.payload.get("status") == "won"
+    ]
+    complete_deals(won)
+
+
+def process_pending_events(batch_size=None):
+    """
+    Process a batch of stored webhooks grouped by type. A group is marked PROCESSED in the
+    handler's transaction; failed groups are retried until GHL_WEBHOOK_MAX_ATTEMPTS.
+    """
+    events = claim_pending_events(batch_size or settings.GHL_WEBHOOK_BATCH_SIZE)
+    by_type = defaultdict(list)
+    for event in events:
+        by_type[event.event_type].append(event)
+
+    handlers = {
+        CONTACT_DELETE: handle_contact_deletes,
+        OPPORTUNITY_STATUS_UPDATE: handle_opportunity_status_updates,
+    }
+    failed = 0
+    for event_type, type_events in by_type.items():
+        try:
+            with transaction.atomic():
+                handlers[event_type](type_events)
+                GhlWebhookEvent.objects.filter(id__in=[event.id for event in type_events]).update(
+                    status=GhlWebhookEvent.Status.PROCESSED, processed_at=timezone.now(), error=""
+                )
+        except Exception as e:
+            logger.error(f"Processing {len(type_events)} GHL {event_type} webhooks failed: {e}")
+            failed += len(type_events)
+            schedule_retry(type_events, e)
+    metrics.incr("ghl.webhook.processed", len(events) - failed)
+    return {"processed": len(events) - failed, "failed": failed}
+
+
+def delete_old_events(cutoff_date, batch_size=None):
+    """
+    Delete processed and ignored webhooks received before `cutoff_date`, in chunks of one
+    short transaction each. Failed ones are kept for inspection.
+    """
+    batch_size = batch_size or settings.GHL_WEBHOOK_BATCH_SIZE
+    deleted_count = 0
+    while True:
+        batch_ids = list(
+            GhlWebhookEvent.objects.filter(
+                status__in=[GhlWebhookEvent.Status.PROCESSED, GhlWebhookEvent.Status.IGNORED],
+                received_at__lt=cutoff_date,
+            ).values_list("id", flat=True)[:batch_size]
+        )
+        if not batch_ids:
+            break
+        batch_deleted, _ = GhlWebhookEvent.objects.filter(id__in=batch_ids).delete()
+        deleted_count += batch_deleted
+        if len(batch_ids) < batch_size:
+            break
+    logger.info(f"Deleted {deleted_count} GHL webhooks received before {cutoff_date}")
+    return {"deleted": deleted_count}
@@ -0,0 +1,75 @@
+"""
+Reconcile Prospect.ghl_contact_id/ghl_location_id with GHL contacts.
+
+Pages through each location's contacts from the stored cursor (GhlReconcileCursor),
+matches contacts to prospects by id or normalised email and fixes drift in bulk.
+Email only links unlinked prospects; ambiguous and duplicate matches are reported.
+
+    python manage.py reconcile_ghl_contacts --dry-run
+    python manage.py reconcile_ghl_contacts --location dNMN3zCANRj6BuScTLfC --max-pages 20
+    GHL_API_BASE_URL=http://127.0.0.1:8100 python manage.py reconcile_ghl_contacts --reset
+"""
+import json
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from prospect.ghl_reconcile import reconcile_location
+from utils.ghl_api import GHL_API
+
+
+class Command(BaseCommand):
+    help = "Reconcile prospect GHL contact links with GHL"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--location", action="append", dest="locations",
+                            help="Location id, repeatable. Default: all locations")
+        parser.add_argument("--concurrency", type=int, default=3, help="Locations processed in parallel")
+        parser.add_argument("--max-pages", type=int, default=None, help="Pages per location in this run")
+        parser.add_argument("--dry-run", action="store_true", help="Report only, don't update prospects or cursors")
+        parser.add_argument("--reset", action="store_true", help="Start from the beginning of the contact lists")
+        parser.add_argument("--clear-missing", action="store_true",
+                            help="Unlink prospects whose contact no longer exists in GHL")
+        parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+
+    def handle(self, *args, **options):
+        locations = options["locations"] or sorted(set(GHL_API.country_to_locationID.values()))
+
+        with ThreadPoolExecutor(max_workers=max(1, options["concurrency"])) as executor:
+            futures = {
+                location_id: executor.submit(
+                    reconcile_location,
+                    location_id,
+                    max_pages=options["max_pages"],
+                    dry_run=options["dry_run"],
+                    reset=options["reset"],
+                    clear_missing=options["clear_missing"],
+                )
+                for location_id in locations
+            }
+
+        reports = []
+        for location_id, future in futures.items():
+            try:
+                reports.append(future.result())
+            except Exception as e:
+                self.stderr.write(f"{location_id}: failed: {e}")
+                reports.append({"location_id": location_id, "error": str(e)})
+
+        if options["json"]:
+            self.stdout.write(json.dumps(reports, indent=2, default=str))
+            return
+
+        for report in reports:
+            if "error" in report:
+                continue
+            kinds = Counter(discrepancy["type"] for discrepancy in report["discrepancies"])
+            self.stdout.write(
+                f"{report['location_id']}: {report['pages']} pages, "
+                f"matched {report.get('matched_by_id', 0)} by id / {report.get('matched_by_email', 0)} by email, "
+                f"{report['updated']} updated{' (dry run)' if options['dry_run'] else ''}, "
+                f"{'full list read' if report['completed'] else 'cursor saved'}"
+            )
+            for kind, count in kinds.items():
+                self.stdout.write(f"    {kind}: {count}")
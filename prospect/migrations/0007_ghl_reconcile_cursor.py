@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prospect', '0006_ghl_sync_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GhlReconcileCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('location_id', models.CharField(max_length=32, unique=True)),
+                ('start_after_id', models.CharField(blank=True, max_length=32, null=True)),
+                ('start_after', models.BigIntegerField(blank=True, null=True)),
+                ('contacts_seen', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('last_completed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
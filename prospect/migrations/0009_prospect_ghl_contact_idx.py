@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prospect', '0008_ghl_webhook_events'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='prospect',
+            index=models.Index(fields=['ghl_location_id', 'ghl_contact_id'], name='prospect_ghl_contact_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prospect', '0010_ghl_webhook_event_lease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ghlsyncjob',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='ghlsyncjob',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=10),
+        ),
+    ]
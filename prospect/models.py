@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class Prospect(models.Model):
@@ -33,5 +34,120 @@ class Prospect(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Deal completion and GHL webhooks look prospects up by this pair
+            models.Index(fields=["ghl_location_id", "ghl_contact_id"], name="prospect_ghl_contact_idx"),
+        ]
+
     def __str__(self):
         return self.email
+
+
+class GhlSyncJob(models.Model):
+    """
+    Batch of prospects submitted to GHL by staff, processed by the scheduler
+    (`prospect.tasks.process_ghl_sync_jobs`) instead of the web request.
+    A job that keeps failing as a whole is FAILED after GHL_SYNC_JOB_MAX_ATTEMPTS claims.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        COMPLETED = "completed", "Completed"
+        FAILED = "failed", "Failed"
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name="ghl_sync_jobs",
+        null=True,
+        blank=True
+    )
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    total = models.PositiveIntegerField(default=0)
+    succeeded = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "updated_at"], name="ghl_sync_job_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"GHL sync job {self.id} ({self.status}): {self.succeeded + self.failed}/{self.total}"
+
+
+class GhlSyncItem(models.Model):
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        SUCCEEDED = "succeeded", "Succeeded"
+        FAILED = "failed", "Failed"
+
+    job = models.ForeignKey(GhlSyncJob, on_delete=models.CASCADE, related_name="items")
+    prospect = models.ForeignKey(Prospect, on_delete=models.CASCADE, related_name="ghl_sync_items")
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    ghl_contact_id = models.CharField(max_length=32, blank=True, null=True)
+    error = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.prospect_id} ({self.status})"
+
+
+class GhlReconcileCursor(models.Model):
+    """
+    Position of `reconcile_ghl_contacts` in a location's contact list, so a run continues
+    where the previous one stopped. Reset when the end of the list is reached.
+    """
+    location_id = models.CharField(max_length=32, unique=True)
+    start_after_id = models.CharField(max_length=32, blank=True, null=True)
+    start_after = models.BigIntegerField(blank=True, null=True)
+    contacts_seen = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    last_completed_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.location_id}: after {self.start_after_id}"
+
+
+class GhlWebhookEvent(models.Model):
+    """
+    Verified GHL webhook, stored by the endpoint and processed by
+    `prospect.tasks.process_ghl_webhook_events`. Deduplicated by GHL's webhookId.
+    A worker claims events as RUNNING; if it dies they are claimed again after the lease.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        PROCESSED = "processed", "Processed"
+        IGNORED = "ignored", "Ignored"
+        FAILED = "failed", "Failed"
+
+    webhook_id = models.CharField(max_length=64, unique=True)
+    event_type = models.CharField(max_length=64)
+    location_id = models.CharField(max_length=32, blank=True)
+    payload = models.JSONField()
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    received_at = models.DateTimeField(auto_now_add=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(blank=True, null=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "received_at"], name="ghl_webhook_event_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} {self.webhook_id} ({self.status})"
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from prospect.models import Prospect
+from prospect.models import Prospect, GhlSyncJob, GhlSyncItem
 
 
 class ProspectSerializer(serializers.ModelSerializer):
@@ -30,3 +30,61 @@ class ProspectSerializer(serializers.ModelSerializer):
             "ghl_contact_id",
             "claimed"
         )
+
+
+class GhlSubmissionProspectSerializer(serializers.Serializer):
+    """
+    Prospect submitted to GHL by staff. Fields besides the id are kept as sent (job item payload).
+    """
+    id = serializers.IntegerField(min_value=1)
+
+    def to_internal_value(self, data):
+        return {**data, **super().to_internal_value(data)}
+
+
+class GhlSubmissionSerializer(serializers.Serializer):
+    prospects = GhlSubmissionProspectSerializer(many=True)
+
+
+class GhlSyncJobSerializer(serializers.ModelSerializer):
+    pending = serializers.SerializerMethodField()
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = GhlSyncJob
+        fields = (
+            "id",
+            "status",
+            "total",
+            "succeeded",
+            "failed",
+            "pending",
+            "progress",
+            "created_at",
+            "finished_at",
+        )
+
+    def get_pending(self, obj):
+        return obj.total - obj.succeeded - obj.failed
+
+    def get_progress(self, obj):
+        """Processed share of the job, 0-100"""
+        if not obj.total:
+            return 100
+        return round((obj.succeeded + obj.failed) * 100 / obj.total)
+
+
+class GhlSyncItemSerializer(serializers.ModelSerializer):
+    email = serializers.CharField(source="prospect.email", read_only=True)
+
+    class Meta:
+        model = GhlSyncItem
+        fields = (
+            "prospect",
+            "email",
+            "status",
+            "attempts",
+            "ghl_contact_id",
+            "error",
+            "updated_at",
+        )
@@ -0,0 +1,154 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from log.logger_config import logger
+from prospect.ghl_sync import submit_prospects_to_ghl
+from prospect.ghl_webhooks import delete_old_events, process_pending_events
+from prospect.models import GhlSyncJob, GhlSyncItem
+from utils.main_sfo_backend_service import sfo_backend_service
+
+# A running job not updated for this long is considered abandoned by a dead worker and picked up again
+JOB_LEASE = timedelta(minutes=10)
+
+
+def claim_ghl_sync_job():
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            GhlSyncJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=GhlSyncJob.Status.PENDING)
+                | Q(status=GhlSyncJob.Status.RUNNING, updated_at__lt=now - JOB_LEASE)
+            )
+            .select_related("created_by")
+            .order_by("created_at")
+            .first()
+        )
+        if job:
+            job.status = GhlSyncJob.Status.RUNNING
+            job.attempts += 1
+            job.save(update_fields=["status", "attempts", "updated_at"])
+    return job
+
+
+def fail_ghl_sync_job(job, error):
+    """
+    Give up on a job that keeps failing as a whole: its pending items are marked failed,
+    so staff can inspect and retry them.
+    """
+    job.items.filter(status=GhlSyncItem.Status.PENDING).update(
+        status=GhlSyncItem.Status.FAILED, error=str(error)[:2000], updated_at=timezone.now()
+    )
+    refresh_job_counts(job)
+    job.status = GhlSyncJob.Status.FAILED
+    job.save(update_fields=["status", "updated_at"])
+    logger.error(f"GHL sync job {job.id} failed after {job.attempts} attempts: {error}")
+
+
+def refresh_job_counts(job):
+    counts = job.items.aggregate(
+        succeeded=Count("id", filter=Q(status=GhlSyncItem.Status.SUCCEEDED)),
+        failed=Count("id", filter=Q(status=GhlSyncItem.Status.FAILED)),
+        pending=Count("id", filter=Q(status=GhlSyncItem.Status.PENDING)),
+    )
+    job.succeeded = counts["succeeded"]
+    job.failed = counts["failed"]
+    fields = ["succeeded", "failed", "updated_at"]
+    if not counts["pending"]:
+        job.status = GhlSyncJob.Status.COMPLETED
+        job.finished_at = timezone.now()
+        fields += ["status", "finished_at"]
+    job.save(update_fields=fields)
+
+
+def process_ghl_sync_job(job):
+    """
+    Submit the job's pending items. Items that already succeeded are never resubmitted.
+    """
+    items = list(job.items.filter(status=GhlSyncItem.Status.PENDING))
+    if items:
+        try:
+            assign_to_user = sfo_backend_service.get_user_by_email(job.created_by.email) if job.created_by else None
+        except Exception as e:
+            # Without the owner the contacts would be created unassigned; fail the items for a retry
+            logger.error(f"Main backend user of GHL sync job {job.id} not available: {e}")
+            created, errors = {}, {item.prospect_id: f"Main backend user lookup failed: {e}" for item in items}
+        else:
+            prospects = [{**item.payload, "id": item.prospect_id} for item in items]
+            created, errors = submit_prospects_to_ghl(prospects, assign_to_user)
+
+        now = timezone.now()
+        for item in items:
+            item.attempts += 1
+            item.updated_at = now
+            if item.prospect_id in created:
+                item.status = GhlSyncItem.Status.SUCCEEDED
+                item.ghl_contact_id = created[item.prospect_id][1]
+                item.error = ""
+            else:
+                item.status = GhlSyncItem.Status.FAILED
+                item.error = errors.get(item.prospect_id, "Unknown error")
+        GhlSyncItem.objects.bulk_update(items, ["status", "attempts", "ghl_contact_id", "error", "updated_at"])
+
+    refresh_job_counts(job)
+    logger.info(f"GHL sync job {job.id} finished: {job.succeeded} succeeded, {job.failed} failed")
+    return job
+
+
+def process_ghl_sync_jobs():
+    """
+    Scheduled: process queued GHL sync jobs one after another. A job that raises stays
+    RUNNING and is claimed again after JOB_LEASE, up to GHL_SYNC_JOB_MAX_ATTEMPTS times.
+    """
+    processed = failed = 0
+    while job := claim_ghl_sync_job():
+        if job.attempts > settings.GHL_SYNC_JOB_MAX_ATTEMPTS:
+            # The worker running the last attempt died
+            fail_ghl_sync_job(job, "Abandoned by a worker on the last attempt")
+            failed += 1
+            continue
+        try:
+            process_ghl_sync_job(job)
+            processed += 1
+        except Exception as e:
+            failed += 1
+            if job.attempts >= settings.GHL_SYNC_JOB_MAX_ATTEMPTS:
+                fail_ghl_sync_job(job, e)
+            else:
+                logger.error(f"GHL sync job {job.id} attempt {job.attempts} failed: {e}")
+    return {"jobs": processed, "failed": failed}
+
+
+def process_ghl_webhook_events():
+    """
+    Scheduled: drain stored GHL webhooks in batches.
+    """
+    totals = {"processed": 0, "failed": 0}
+    while True:
+        result = process_pending_events()
+        totals["processed"] += result["processed"]
+        totals["failed"] += result["failed"]
+        if result["processed"] + result["failed"] < settings.GHL_WEBHOOK_BATCH_SIZE:
+            return totals
+
+
+def cleanup_ghl_webhook_events():
+    """
+    Scheduled retention of handled GHL webhooks older than GHL_WEBHOOK_RETENTION_DAYS.
+    """
+    return delete_old_events(timezone.now() - timedelta(days=settings.GHL_WEBHOOK_RETENTION_DAYS))
+
+
+def prefetch_staff_backend_users():
+    """
+    Scheduled: keep main backend user mappings of all staff cached,
+    so GHL submissions don't wait for the lookup.
+    """
+    emails = get_user_model().objects.filter(is_staff=True, is_active=True).values_list("email", flat=True)
+    users = sfo_backend_service.prefetch_users(list(emails), refresh=True)
+    return {"staff": len(users), "mapped": sum(1 for user in users.values() if user)}
@@ -1,10 +1,16 @@
 from django.urls import path
 
-from prospect.views import ProspectView, StaffProspectViewSet, CompleteDealView, GhlWebhookView
+from prospect.views import (
+    ProspectView, StaffProspectViewSet, CompleteDealView, BulkCompleteDealView, GhlWebhookView, GhlSyncJobView,
+    GhlSyncJobRetryView,
+)
 
 urlpatterns = [
     path('', ProspectView.as_view(), name='prospect'),
     path('ghl/webhook/', GhlWebhookView.as_view(), name='ghl-webhook-handler'),
     path('deal/complete/', CompleteDealView.as_view(), name='prospect-complete-deal'),
+    path('deal/complete/bulk/', BulkCompleteDealView.as_view(), name='prospect-complete-deal-bulk'),
     path('sales/', StaffProspectViewSet.as_view({'get': 'list', 'post': 'create'}), name='prospect-sales'),
+    path('sales/jobs/<int:job_id>/', GhlSyncJobView.as_view(), name='ghl-sync-job'),
+    path('sales/jobs/<int:job_id>/retry/', GhlSyncJobRetryView.as_view(), name='ghl-sync-job-retry'),
 ]
@@ -1,29 +1,30 @@
-import base64
 from log.logger_config import logger
 
 from django.conf import settings
+from django.db import transaction
 from django.db.models import Q
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 
+from notifications.models import DigestEvent
 from notifications.utils import send_notification
-from prospect.models import Prospect
+from prospect.deals import complete_deals, COMPLETED, NOT_FOUND
+from prospect.ghl_webhooks import verify_signature, store_event
+from prospect.models import Prospect, GhlSyncJob, GhlSyncItem
 from prospect.permissions import IsStaffUser
-from prospect.serializers import ProspectSerializer
+from prospect.serializers import (
+    ProspectSerializer, GhlSubmissionSerializer, GhlSyncJobSerializer, GhlSyncItemSerializer
+)
 from prospect.utils import get_full_downline
-from utils.ghl_api import GHL_API
-from utils.main_sfo_backend_service import sfo_backend_service
-from utils.prepare_payload import prospect_prepare_payload
 from ambassador_program.views import check_auth_key
 
-from cryptography.hazmat.primitives.asymmetric import padding
-from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.exceptions import InvalidSignature
 
-from utils.send_email import send_notification_email, send_html_email
+from utils.send_email import send_notification_email, send_or_digest_html_email
 from utils.send_telegram_notification import send_telegram_notification
 
 
@@ -76,13 +77,15 @@ class ProspectView(APIView):
                     notification_type="prospect"
                 )
 
-            send_html_email( # Email to admins about new prospect
+            send_or_digest_html_email( # Email to admins about new prospect
                 subject="New Prospect registered",
                 recipients=settings.ADMIN_EMAIL_RECIPIENTS,
                 email_body={
                     "prospect": prospect,
                 },
-                template_name="emails/prospect_registered_notification.html"
+                template_name="emails/prospect_registered_notification.html",
+                event_type=DigestEvent.ADMIN_NEW_PROSPECT,
+                summary=f"{prospect.restaurant_organisation_name} - {prospect.email}, invited by {user.email}",
             )
 
             logger.info(f"New Prospect created successfully: {serializer.data}")
@@ -105,67 +108,83 @@ class StaffProspectViewSet(ModelViewSet):
             return Prospect.objects.all().order_by('-id')
         return Prospect.objects.none()
 
-    def create(self, request, *args, **kwargs):  # Overwrite POST method. Submit to GHL logic
+    def create(self, request, *args, **kwargs):  # Overwrite POST method. Queue GHL submission job
         data = request.data
 
         logger.info(f"Received request to submit prospect to GHL: {data}")
 
-        ghl_contacts_id = []
-        error_ghl_contacts = []
+        serializer = GhlSubmissionSerializer(data=data)
+        if not serializer.is_valid():
+            logger.error(f"Invalid GHL submission request: {serializer.errors}")
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            user = request.user
-            assign_to_user = sfo_backend_service.get_user_by_email(user.email)
-            for prospect in data["prospects"]:
-                prospect_email = prospect['email']
-                try:
-
-                    # 1 Prepare GHL data
-                    ghl_location_id = GHL_API.country_to_locationID[prospect["country"]]
-                    contact_payload = prospect_prepare_payload.ghl_contact_create(prospect, assign_to_user)
-
-                    logger.debug(f"Location ID: {ghl_location_id}")
-                    logger.debug(f"data for GHL contact{contact_payload}")
-
-                    # 2 Create contact in GHL
-                    contact = GHL_API.create_contact(contact_payload, ghl_location_id)
-                    logger.debug(f"GHL contact response: {contact}")
-                    contact_id = contact.get("contact", {}).get("id")
-
-                    if not contact_id:
-                        logger.error(f"Could not create GHL contact for prospect: {prospect}")
-                        error_ghl_contacts.append(prospect_email)
-                        continue
-
-                    ghl_contacts_id.append(contact_id)
-
-                    # 4 Update Prospect
-                    db_prospect = Prospect.objects.get(id=prospect["id"])
-                    db_prospect.ghl_contact_id = contact_id
-                    db_prospect.ghl_location_id = ghl_location_id
-                    db_prospect.save(update_fields=["ghl_contact_id", "ghl_location_id"])
-                    logger.info(f"Prospect {prospect_email} created successfully")
-
-                except Exception as e:
-                    logger.error(f"Error creating Prospect[{prospect_email}]: {e}")
-                    error_ghl_contacts.append({"email": prospect["email"], "error": str(e)})
-
-            response = {
-                    "contacts_id": ghl_contacts_id,
-                    "error_contacts": error_ghl_contacts
-                }
-            logger.info(f"Successfully submit all prospects to GHL: {response}")
-            return Response(
-                response, status=status.HTTP_201_CREATED
+        prospects = {prospect["id"]: prospect for prospect in serializer.validated_data["prospects"]}
+        existing_ids = set(Prospect.objects.filter(id__in=list(prospects)).values_list("id", flat=True))
+
+        with transaction.atomic():
+            job = GhlSyncJob.objects.create(created_by=request.user, total=len(existing_ids))
+            GhlSyncItem.objects.bulk_create([
+                GhlSyncItem(job=job, prospect_id=prospect_id, payload=prospect)
+                for prospect_id, prospect in prospects.items() if prospect_id in existing_ids
+            ])
+
+        response = {
+            "job_id": job.id,
+            "status": job.status,
+            "total": job.total,
+            "not_found": [prospect_id for prospect_id in prospects if prospect_id not in existing_ids],
+        }
+        logger.info(f"Queued GHL sync job: {response}")
+        return Response(response, status=status.HTTP_202_ACCEPTED)
+
+
+class GhlSyncJobView(APIView):
+    permission_classes = [IsStaffUser]
+
+    def get(self, request, job_id):
+        """
+        Job progress with per-prospect status. ?status=failed to list only failed items.
+        """
+        job = GhlSyncJob.objects.filter(id=job_id).first()
+        if not job:
+            return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        items = job.items.select_related("prospect").order_by("id")
+        item_status = request.query_params.get("status")
+        if item_status:
+            items = items.filter(status=item_status)
+        return Response({
+            **GhlSyncJobSerializer(job).data,
+            "items": GhlSyncItemSerializer(items, many=True).data,
+        })
+
+
+class GhlSyncJobRetryView(APIView):
+    permission_classes = [IsStaffUser]
+
+    def post(self, request, job_id):
+        """
+        Queue failed items of the job again. Succeeded items are not resubmitted.
+        """
+        with transaction.atomic():
+            job = GhlSyncJob.objects.select_for_update().filter(id=job_id).first()
+            if not job:
+                return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+            if job.status == GhlSyncJob.Status.RUNNING:
+                return Response({"error": "Job is running"}, status=status.HTTP_409_CONFLICT)
+
+            retried = job.items.filter(status=GhlSyncItem.Status.FAILED).update(
+                status=GhlSyncItem.Status.PENDING, updated_at=timezone.now()
             )
+            if retried:
+                job.status = GhlSyncJob.Status.PENDING
+                job.failed = 0
+                job.attempts = 0
+                job.finished_at = None
+                job.save(update_fields=["status", "failed", "attempts", "finished_at", "updated_at"])
 
-        except Exception as e:
-            error_response = {
-                "error": str(e),
-                "successful_contacts": ghl_contacts_id,
-            }
-            logger.error(f"Error submitting prospects: {error_response}")
-            return Response(error_response, status=status.HTTP_400_BAD_REQUEST)
+        logger.info(f"Retry of GHL sync job {job.id}: {retried} items queued")
+        return Response({**GhlSyncJobSerializer(job).data, "retried": retried})
 
 
 class CompleteDealView(APIView):
@@ -179,28 +198,9 @@ class CompleteDealView(APIView):
             contact_id = data.get("ghl_contact_id")
             location_id = data.get("ghl_location_id")
 
-            try:
-                prospect = Prospect.objects.get(ghl_contact_id=contact_id, ghl_location_id=location_id)
-            except Prospect.DoesNotExist:
+            outcome = complete_deals([(contact_id, location_id)])[(contact_id, location_id)]
+            if outcome == NOT_FOUND:
                 return Response({"error": "Prospect not found"}, status=404)
-            prospect.deal_completed = True
-            prospect.save(update_fields=["deal_completed"])
-
-            send_notification(
-                prospect.invited_by_user.id,
-                "Your invited prospect's deal is completed",
-                "info",
-                "Prospect's Deal Completed"
-            )
-            send_html_email(  # Email to ambassador that his prospect deal completed
-                subject="Your Save Fry Oil Prospect's deal is completed",
-                recipients=[prospect.invited_by_user.email],
-                email_body={
-                    "prospect": prospect,
-                    "ambassador": prospect.invited_by_user,
-                },
-                template_name="emails/ambassador_to_claim_a_commission.html"
-            )
 
             return Response({"detail": "deal_completed"})
         except PermissionError as e:
@@ -212,9 +212,53 @@ class CompleteDealView(APIView):
             return Response({"error": str(e)}, status=400)
 
 
+class BulkCompleteDealView(APIView):
+
+    def post(self, request):
+        """
+        Complete many deals at once: {"deals": [{"ghl_contact_id": ..., "ghl_location_id": ...}, ...]}
+        Responds with the outcome of every pair: completed, already_completed or not_found.
+        """
+        headers = request.headers
+        try:
+            check_auth_key(headers)
+            deals = request.data.get("deals")
+            if not isinstance(deals, list):
+                return Response({"error": "deals must be a list"}, status=400)
+            logger.info(f"Bulk deal completion for {len(deals)} deals")
+
+            pairs = [(deal.get("ghl_contact_id"), deal.get("ghl_location_id")) for deal in deals]
+            outcomes = complete_deals(pairs)
+
+            results = [
+                {
+                    "ghl_contact_id": contact_id,
+                    "ghl_location_id": location_id,
+                    "status": outcomes[(contact_id, location_id)],
+                }
+                for contact_id, location_id in pairs
+            ]
+            return Response({
+                "completed": sum(result["status"] == COMPLETED for result in results),
+                "not_found": sum(result["status"] == NOT_FOUND for result in results),
+                "results": results,
+            })
+        except PermissionError as e:
+            logger.error(f"bulk deal completed endpoint permission denied: {e}")
+            return Response({"error": str(e)}, status=403)
+        except Exception as e:
+            send_telegram_notification(f"Error in bulk complete deal endpoint: {e}")
+            logger.error(f"bulk deal completed endpoint error: {e}")
+            return Response({"error": str(e)}, status=400)
+
+
 class GhlWebhookView(APIView):
 
     def post(self, request, *args, **kwargs):
+        """
+        Verify and store the webhook, then acknowledge. Events are processed by the scheduler,
+        so GHL gets a fast 200 and doesn't retry.
+        """
         # 1️⃣ Get raw body (byte-for-byte)
         raw_body = request.body  # important: don’t decode or parse yet
 
@@ -226,61 +270,25 @@ class GhlWebhookView(APIView):
             logger.error("missing x-wh-signature")
             return Response({"error": "Missing signature"}, status=400)
 
+        # 3️⃣ Verify signature
         try:
-            signature_bytes = base64.b64decode(signature_b64)
-        except Exception:
+            verify_signature(raw_body, signature_b64)
+        except ValueError:
             logger.error("invalid signature format")
             return Response({"error": "Invalid signature format"}, status=400)
-
-        # 3️⃣ Load GHL’s public key
-        GHL_PUBLIC_KEY = b"""-----BEGIN PUBLIC KEY-----
-        MIICIjANBgkqhkiG9w0BAQEFAAOCAg8AMIICCgKCAgEAokvo/r9tVgcfZ5DysOSC
-        Frm602qYV0MaAiNnX9O8KxMbiyRKWeL9JpCpVpt4XHIcBOK4u3cLSqJGOLaPuXw6
-        dO0t6Q/ZVdAV5Phz+ZtzPL16iCGeK9po6D6JHBpbi989mmzMryUnQJezlYJ3DVfB
-        csedpinheNnyYeFXolrJvcsjDtfAeRx5ByHQmTnSdFUzuAnC9/GepgLT9SM4nCpv
-        uxmZMxrJt5Rw+VUaQ9B8JSvbMPpez4peKaJPZHBbU3OdeCVx5klVXXZQGNHOs8gF
-        3kvoV5rTnXV0IknLBXlcKKAQLZcY/Q9rG6Ifi9c+5vqlvHPCUJFT5XUGG5RKgOKU
-        J062fRtN+rLYZUV+BjafxQauvC8wSWeYja63VSUruvmNj8xkx2zE/Juc+yjLjTXp
-        IocmaiFeAO6fUtNjDeFVkhf5LNb59vECyrHD2SQIrhgXpO4Q3dVNA5rw576PwTzN
-        h/AMfHKIjE4xQA1SZuYJmNnmVZLIZBlQAF9Ntd03rfadZ+yDiOXCCs9FkHibELhC
-        HULgCsnuDJHcrGNd5/Ddm5hxGQ0ASitgHeMZ0kcIOwKDOzOU53lDza6/Y09T7sYJ
-        PQe7z0cvj7aE4B+Ax1ZoZGPzpJlZtGXCsu9aTEGEnKzmsFqwcSsnw3JB31IGKAyk
-        T1hhTiaCeIY/OwwwNUY2yvcCAwEAAQ==
-        -----END PUBLIC KEY-----"""
-        public_key = serialization.load_pem_public_key(GHL_PUBLIC_KEY)
-
-        # 4️⃣ Verify signature
-        try:
-            public_key.verify(
-                signature_bytes,
-                raw_body,
-                padding.PKCS1v15(),
-                hashes.SHA256(),
-            )
-            verified = True
         except InvalidSignature:
-            verified = False
-
-        if not verified:
             logger.error("❌ Invalid GHL webhook signature.")
             return Response({"error": "Invalid signature"}, status=401)
 
-        # 5️⃣ Parse JSON safely after verification
-        payload = request.data
-        event = payload.get("type")
-        logger.info(f"✅ Valid GHL webhook received: {payload}")
-
-        # 6️⃣ Handle different event types
-        if event == "ContactDelete":
-            contact_id = payload.get("id")
-            location_id = payload.get("locationId")
-            # e.g. mark contact as deleted in your DB
-            prospect = Prospect.objects.get(ghl_contact_id=contact_id, ghl_location_id=location_id)
-            prospect.ghl_contact_id = None
-            prospect.ghl_location_id = None
-            prospect.save(update_fields=["ghl_contact_id", "ghl_location_id"])
-            logger.info(f"Delete prospect's: {prospect.email} GHL opportunity and contact id")
-
-        # 7️⃣ Always return 200 quickly so GHL doesn’t retry
-        logger.info("Success parse GHL webhook")
+        # 4️⃣ Store for processing, duplicates are acknowledged without storing again
+        try:
+            event, created = store_event(raw_body)
+        except ValueError as e:
+            logger.error(f"GHL webhook body is not a valid JSON object: {e}")
+            return Response({"error": "Invalid JSON"}, status=400)
+
+        if event is None:
+            logger.info("GHL webhook of an unhandled type acknowledged without storing")
+        else:
+            logger.info(f"✅ Valid GHL webhook stored: {event}, new: {created}")
         return Response({"detail": "success"}, status=200)
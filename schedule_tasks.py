@@ -1,30 +1,61 @@
-# import time
-# from os import getenv
-#
-# import requests
-# import schedule
-# from dotenv import load_dotenv
-#
-# from utils.ghl_api import GHL_API
-#
-# load_dotenv()
-# SERVER_TYPE = getenv("SERVER_TYPE")
-#
-# def cleanup_notifications():
-#     time.sleep(10)  # 10 seconds delay to wait server to start
-#     requests.get(
-#         f"http://{SERVER_TYPE}:8001/notifications/cleanup/",
-#         headers={
-#             "x-api-key": getenv("ADMIN_API_KEY")
-#         }
-#     )
-#
-#
-# print("Initialize schedule tasks")
-# cleanup_notifications()
-# schedule.every().day.do(cleanup_notifications)
-# # schedule.every(10).seconds.do(refresher)
-#
-# while True:
-#     schedule.run_pending()
-#     time.sleep(1)
+"""
+Background scheduler. Runs every task from SCHEDULED_TASKS in its own thread
+with the given interval in seconds.
+
+Usage: python schedule_tasks.py
+"""
+import os
+import threading
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "ambassador_program.settings")
+django.setup()
+
+from django.db import close_old_connections  # noqa: E402
+
+from log.logger_config import logger  # noqa: E402
+from notifications.tasks import cleanup_read_notifications, send_outbox_emails, send_digests  # noqa: E402
+from prospect.tasks import (  # noqa: E402
+    cleanup_ghl_webhook_events, process_ghl_sync_jobs, process_ghl_webhook_events, prefetch_staff_backend_users
+)
+from user.tasks import provision_qr_codes, sync_mailchimp_contacts  # noqa: E402
+
+SCHEDULED_TASKS = [
+    (cleanup_read_notifications, 60 * 60 * 24),
+    (send_outbox_emails, 5),
+    (send_digests, 300),
+    (process_ghl_sync_jobs, 5),
+    (process_ghl_webhook_events, 2),
+    (cleanup_ghl_webhook_events, 60 * 60 * 24),
+    (prefetch_staff_backend_users, 60 * 60),
+    (provision_qr_codes, 5),
+    (sync_mailchimp_contacts, 60),
+]
+
+
+def run_periodically(task, interval):
+    while True:
+        started_at = time.monotonic()
+        close_old_connections()
+        try:
+            result = task()
+            logger.info(f"Scheduled task {task.__name__} finished: {result}")
+        except Exception as e:
+            logger.error(f"Scheduled task {task.__name__} failed: {e}")
+        finally:
+            close_old_connections()
+        time.sleep(max(0.0, interval - (time.monotonic() - started_at)))
+
+
+if __name__ == "__main__":
+    logger.info("Initialize schedule tasks")
+    threads = [
+        threading.Thread(target=run_periodically, args=(task, interval), name=task.__name__, daemon=True)
+        for task, interval in SCHEDULED_TASKS
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
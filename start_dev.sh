@@ -1,6 +1,7 @@
 #!/bin/bash
 python manage.py migrate
 python manage.py collectstatic --noinput
+python manage.py build_email_templates
 uvicorn ambassador_program.asgi:application \
     --host 0.0.0.0 \
     --port 8001 \
@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.utils.translation import gettext_lazy as _
 
-from .models import User
+from .models import User, QrProvisioningJob, MailchimpSync
 
 
 class EmailUserAdmin(UserAdmin):
@@ -47,3 +47,21 @@ class EmailUserAdmin(UserAdmin):
 
 
 admin.site.register(User, EmailUserAdmin)
+
+
+@admin.register(QrProvisioningJob)
+class QrProvisioningJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'kind', 'bundle_type', 'status', 'attempts', 'qr_id', 'updated_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('user__email', 'qr_id')
+    raw_id_fields = ('user',)
+    readonly_fields = ('created_at', 'updated_at')
+
+
+@admin.register(MailchimpSync)
+class MailchimpSyncAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'status', 'batch_id', 'attempts', 'queued_at', 'synced_at')
+    list_filter = ('status',)
+    search_fields = ('user__email', 'batch_id')
+    raw_id_fields = ('user',)
+    readonly_fields = ('updated_at',)
@@ -0,0 +1,155 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from log.logger_config import logger
+from user.models import User, MailchimpSync
+from utils.MailChimpAPI import mailchimp_api
+from utils.metrics import metrics
+
+# User fields sent to Mailchimp; a change in any of them queues a sync.
+# Only active users are synced, deactivating one leaves its contact as it was.
+SYNCED_FIELDS = ("email", "first_name", "last_name", "phone")
+# A claimed item without a batch id for this long was left by a dead worker
+CLAIM_LEASE = timedelta(minutes=10)
+
+
+def is_test_user(user):
+    return "test" in str(user.email) or "test" in [user.first_name, user.last_name]
+
+
+def enqueue(user):
+    MailchimpSync.objects.update_or_create(
+        user=user,
+        defaults={
+            "status": MailchimpSync.Status.PENDING,
+            "batch_id": "",
+            "attempts": 0,
+            "error": "",
+            "queued_at": timezone.now(),
+        },
+    )
+
+
+def claim_pending(batch_size):
+    now = timezone.now()
+    with transaction.atomic():
+        items = list(
+            MailchimpSync.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=MailchimpSync.Status.PENDING)
+                | Q(status=MailchimpSync.Status.SUBMITTED, batch_id="", updated_at__lt=now - CLAIM_LEASE)
+            )
+            .select_related("user")
+            .order_by("queued_at")[:batch_size]
+        )
+        if items:
+            MailchimpSync.objects.filter(id__in=[item.id for item in items]).update(
+                status=MailchimpSync.Status.SUBMITTED, batch_id="", updated_at=now
+            )
+    return items
+
+
+def submit_pending(batch_size=None):
+    """
+    Send queued contacts to Mailchimp in one batch operations request.
+    """
+    items = claim_pending(batch_size or settings.MAILCHIMP_SYNC_BATCH_SIZE)
+    if not items:
+        return 0
+    # Only rows still claimed by this run; a user saved meanwhile is back to pending
+    claimed = MailchimpSync.objects.filter(
+        id__in=[item.id for item in items], status=MailchimpSync.Status.SUBMITTED, batch_id=""
+    )
+    try:
+        batch_id = mailchimp_api.submit_batch([mailchimp_api.contact_operation(item.user) for item in items])
+    except Exception as e:
+        logger.error(f"MailChimp batch of {len(items)} contacts failed: {e}")
+        for item in items:
+            item.attempts += 1
+            item.error = str(e)[:2000]
+            item.status = (
+                MailchimpSync.Status.FAILED
+                if item.attempts >= settings.MAILCHIMP_SYNC_MAX_ATTEMPTS
+                else MailchimpSync.Status.PENDING
+            )
+            item.updated_at = timezone.now()
+        still_claimed = set(claimed.values_list("id", flat=True))
+        MailchimpSync.objects.bulk_update(
+            [item for item in items if item.id in still_claimed],
+            ["attempts", "error", "status", "updated_at"],
+        )
+        metrics.incr("mailchimp.sync.batch_failed")
+        return 0
+    claimed.update(batch_id=batch_id, updated_at=timezone.now())
+    metrics.incr("mailchimp.sync.submitted", len(items))
+    return len(items)
+
+
+def mark_synced(items):
+    now = timezone.now()
+    MailchimpSync.objects.filter(id__in=[item.id for item in items]).update(
+        status=MailchimpSync.Status.SYNCED, error="", synced_at=now, updated_at=now
+    )
+    # Not user.save(), which would fire the post_save signal again
+    User.objects.filter(id__in=[item.user_id for item in items]).update(in_mail_chimp=True)
+
+
+def collect_batch(batch_id):
+    """
+    Record the results of a finished batch. Returns (synced, failed) counts, None while it runs.
+    """
+    batch = mailchimp_api.get_batch(batch_id)
+    if batch["status"] != "finished":
+        return None
+    items = list(MailchimpSync.objects.filter(batch_id=batch_id, status=MailchimpSync.Status.SUBMITTED))
+    if not batch.get("errored_operations"):
+        mark_synced(items)
+        return len(items), 0
+
+    results = mailchimp_api.get_batch_results(batch["response_body_url"])
+    synced, failed = [], []
+    for item in items:
+        status_code, response = results.get(str(item.user_id), (None, "No result in batch"))
+        if status_code and 200 <= status_code < 300:
+            synced.append(item)
+        else:
+            item.status = MailchimpSync.Status.FAILED
+            item.error = str(response)[:2000]
+            item.updated_at = timezone.now()
+            failed.append(item)
+            logger.error(f"MailChimp sync of user {item.user_id} failed: {item.error}")
+    mark_synced(synced)
+    MailchimpSync.objects.bulk_update(failed, ["status", "error", "updated_at"])
+    return len(synced), len(failed)
+
+
+def collect_submitted():
+    synced = failed = 0
+    batch_ids = (
+        MailchimpSync.objects.filter(status=MailchimpSync.Status.SUBMITTED)
+        .exclude(batch_id="")
+        .values_list("batch_id", flat=True)
+        .distinct()
+    )
+    for batch_id in batch_ids:
+        try:
+            counts = collect_batch(batch_id)
+        except Exception as e:
+            logger.error(f"Reading MailChimp batch {batch_id} failed: {e}")
+            continue
+        if counts:
+            synced += counts[0]
+            failed += counts[1]
+    metrics.incr("mailchimp.sync.synced", synced)
+    metrics.incr("mailchimp.sync.failed", failed)
+    return synced, failed
+
+
+def sync_contacts():
+    synced, failed = collect_submitted()
+    submitted = submit_pending()
+    return {"submitted": submitted, "synced": synced, "failed": failed}
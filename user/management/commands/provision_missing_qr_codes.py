@@ -0,0 +1,41 @@
+"""
+Queue referral QR code provisioning for every active user without a code.
+
+    python manage.py provision_missing_qr_codes --dry-run
+    python manage.py provision_missing_qr_codes --limit 500 --process
+"""
+from django.core.management.base import BaseCommand
+
+from user.models import User, QrProvisioningJob
+from user.qr_provisioning import enqueue_job, process_pending_jobs
+
+
+class Command(BaseCommand):
+    help = "Provision referral QR codes for users missing one"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=None, help="Queue at most this many users")
+        parser.add_argument("--dry-run", action="store_true", help="Only count users missing a code")
+        parser.add_argument("--process", action="store_true",
+                            help="Run the queued jobs now instead of leaving them to the scheduler")
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(is_active=True, referral_qr_code_id="").order_by("id")
+        if options["limit"]:
+            users = users[:options["limit"]]
+        users = list(users)
+        self.stdout.write(f"{len(users)} users without a referral QR code")
+        if options["dry_run"]:
+            return
+
+        queued = sum(enqueue_job(user, QrProvisioningJob.Kind.REFERRAL)[1] for user in users)
+        self.stdout.write(f"Queued {queued} jobs, {len(users) - queued} already in flight")
+
+        if options["process"]:
+            totals = {"completed": 0, "failed": 0, "retrying": 0}
+            while result := process_pending_jobs():
+                if not any(result.values()):
+                    break
+                for key, value in result.items():
+                    totals[key] += value
+            self.stdout.write(self.style.SUCCESS(f"Processed: {totals}"))
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:24
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0009_alter_user_last_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QrProvisioningJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('referral', 'Referral'), ('bundle', 'Bundle')], max_length=10)),
+                ('bundle_type', models.CharField(blank=True, max_length=16)),
+                ('qr_url', models.URLField(max_length=512)),
+                ('qr_frame_text', models.CharField(blank=True, max_length=32)),
+                ('qr_name', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('qr_id', models.CharField(blank=True, max_length=32)),
+                ('qr_code_id', models.CharField(blank=True, max_length=64)),
+                ('moved_to_folder', models.BooleanField(default=False)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='qr_provisioning_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'updated_at'], name='qr_provisioning_status_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'running'])), fields=('user', 'kind', 'bundle_type'), name='unique_in_flight_qr_provisioning')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:28
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0010_qr_provisioning_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MailchimpSync',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('submitted', 'Submitted'), ('synced', 'Synced'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('batch_id', models.CharField(blank=True, max_length=32)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('queued_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('synced_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='mailchimp_sync', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'queued_at'], name='mailchimp_sync_status_idx'), models.Index(fields=['batch_id'], name='mailchimp_sync_batch_idx')],
+            },
+        ),
+    ]
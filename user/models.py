@@ -5,6 +5,7 @@ from django.contrib.auth.base_user import BaseUserManager
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.db.models import Q
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from notifications.utils import send_notification
@@ -128,3 +129,83 @@ class User(AbstractUser):
 
     def __str__(self):
         return self.email
+
+
+class QrProvisioningJob(models.Model):
+    """
+    Creation of a QR Tiger code for a user (create campaign, rename, move to folder),
+    run by the scheduler. Each finished step is saved, so a retry resumes instead of
+    creating another campaign. Only one job per user and code can be in flight.
+    """
+
+    class Kind(models.TextChoices):
+        REFERRAL = "referral", "Referral"
+        BUNDLE = "bundle", "Bundle"
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        COMPLETED = "completed", "Completed"
+        FAILED = "failed", "Failed"
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="qr_provisioning_jobs")
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    bundle_type = models.CharField(max_length=16, blank=True)
+    qr_url = models.URLField(max_length=512)
+    qr_frame_text = models.CharField(max_length=32, blank=True)
+    qr_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    qr_id = models.CharField(max_length=32, blank=True)  # Campaign id, set after create
+    qr_code_id = models.CharField(max_length=64, blank=True)  # Set after rename
+    moved_to_folder = models.BooleanField(default=False)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "kind", "bundle_type"],
+                condition=Q(status__in=["pending", "running"]),
+                name="unique_in_flight_qr_provisioning",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["status", "updated_at"], name="qr_provisioning_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.bundle_type} QR for {self.user_id} ({self.status})"
+
+
+class MailchimpSync(models.Model):
+    """
+    Mailchimp audience sync state of a user. Queued by the User post_save signal when
+    a synced field changes, pushed through Mailchimp batch operations by the scheduler.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        SUBMITTED = "submitted", "Submitted"  # In a Mailchimp batch, waiting for its result
+        SYNCED = "synced", "Synced"
+        FAILED = "failed", "Failed"
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="mailchimp_sync")
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    batch_id = models.CharField(max_length=32, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    queued_at = models.DateTimeField(default=timezone.now)
+    synced_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "queued_at"], name="mailchimp_sync_status_idx"),
+            models.Index(fields=["batch_id"], name="mailchimp_sync_batch_idx"),
+        ]
+
+    def __str__(self):
+        return f"Mailchimp sync of {self.user_id} ({self.status})"
@@ -0,0 +1,157 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from log.logger_config import logger
+from notifications.utils import send_notification
+from user.models import User, QrProvisioningJob
+from utils.qr_code_tiger_api import qrTigerAPI
+
+# A running job not updated for this long was left by a dead worker
+JOB_LEASE = timedelta(minutes=10)
+RETRY_BASE_DELAY = timedelta(seconds=30)
+
+BUNDLES = {
+    "Industry": (
+        "https://savefryoil.retool.com/embedded/public/98912f22-4534-4209-af8e-d6d4e16dc706"
+        "?referral_code={referral_code}"
+    ),
+    "Affinity": "https://savefryoil.retool.com/embedded/public/6330dac3-e5e7-428e-b675-66cf44e65c61",
+    "B2B": "https://savefryoil.retool.com/embedded/public/e556ad0c-c4c0-4eaa-8f5d-b49753bc4f8a",
+}
+
+
+def enqueue_job(user, kind, bundle_type=""):
+    """
+    Queue provisioning of the user's code. Returns (job, created); while a job
+    for the same code is in flight, that job is returned instead of a new one.
+    """
+    if kind == QrProvisioningJob.Kind.REFERRAL:
+        qr_url = f"https://savefryoil.com/ambassador-referrals/?referral_code={user.referral_code}"
+        qr_name = f"ambassador_{user.email}"
+    else:
+        qr_url = BUNDLES[bundle_type].format(referral_code=user.referral_code)
+        qr_name = f"Code Bundle {user.email}"
+
+    try:
+        with transaction.atomic():
+            job = QrProvisioningJob.objects.create(
+                user=user,
+                kind=kind,
+                bundle_type=bundle_type,
+                qr_url=qr_url,
+                qr_frame_text=bundle_type,
+                qr_name=qr_name,
+            )
+        return job, True
+    except IntegrityError:
+        job = QrProvisioningJob.objects.get(
+            user=user, kind=kind, bundle_type=bundle_type,
+            status__in=[QrProvisioningJob.Status.PENDING, QrProvisioningJob.Status.RUNNING],
+        )
+        return job, False
+
+
+def claim_jobs(batch_size):
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            QrProvisioningJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=QrProvisioningJob.Status.PENDING, next_attempt_at__lte=now)
+                | Q(status=QrProvisioningJob.Status.RUNNING, updated_at__lt=now - JOB_LEASE)
+            )
+            .order_by("created_at")[:batch_size]
+        )
+        if jobs:
+            QrProvisioningJob.objects.filter(id__in=[job.id for job in jobs]).update(
+                status=QrProvisioningJob.Status.RUNNING, updated_at=now
+            )
+    return jobs
+
+
+def save_step(job, *fields):
+    job.save(update_fields=[*fields, "updated_at"])
+
+
+def run_steps(job):
+    """
+    QR Tiger calls of the job, skipping steps finished by a previous attempt.
+    """
+    if not job.qr_id:
+        if job.kind == QrProvisioningJob.Kind.REFERRAL:
+            job.qr_id = qrTigerAPI.create_qr_code(job.qr_url)
+        else:
+            job.qr_id = qrTigerAPI.create_qr_code_bundle(job.qr_url, job.qr_frame_text)
+        save_step(job, "qr_id")
+    if not job.qr_code_id:
+        job.qr_code_id = qrTigerAPI.update_qr_code(job.qr_id, job.qr_name)
+        save_step(job, "qr_code_id")
+    if not job.moved_to_folder:
+        qrTigerAPI.move_qr_code_to_folder(job.qr_code_id)
+        job.moved_to_folder = True
+        save_step(job, "moved_to_folder")
+
+
+def finish_job(job):
+    with transaction.atomic():
+        user = User.objects.select_for_update().get(id=job.user_id)
+        if job.kind == QrProvisioningJob.Kind.REFERRAL:
+            qrTigerAPI.invalidate_qr_code(user.referral_qr_code_id)
+            user.referral_qr_code_id = job.qr_id
+            user.save(update_fields=["referral_qr_code_id"])
+        else:
+            qrTigerAPI.invalidate_qr_code(user.qr_code_bundles.get(job.bundle_type))
+            user.qr_code_bundles = {**user.qr_code_bundles, job.bundle_type: job.qr_id}
+            user.save(update_fields=["qr_code_bundles"])
+        job.status = QrProvisioningJob.Status.COMPLETED
+        job.error = ""
+        save_step(job, "status", "error")
+
+    if job.kind == QrProvisioningJob.Kind.REFERRAL:
+        send_notification(
+            job.user_id,
+            "Ambassador QR Code generated successfully",
+            "success",
+            "QR Code Generated",
+        )
+    logger.info(f"QR code {job.qr_id} provisioned for user {job.user_id} ({job.kind} {job.bundle_type})")
+
+
+def process_job(job):
+    try:
+        run_steps(job)
+        finish_job(job)
+    except Exception as e:
+        job.attempts += 1
+        job.error = str(e)[:2000]
+        if job.attempts >= settings.QR_PROVISIONING_MAX_ATTEMPTS:
+            job.status = QrProvisioningJob.Status.FAILED
+        else:
+            job.status = QrProvisioningJob.Status.PENDING
+            job.next_attempt_at = timezone.now() + RETRY_BASE_DELAY * 2 ** (job.attempts - 1)
+        save_step(job, "attempts", "error", "status", "next_attempt_at")
+        logger.error(f"QR provisioning job {job.id} attempt {job.attempts} failed: {e}")
+    finally:
+        connections.close_all()  # Worker thread connection
+    return job.status
+
+
+def process_pending_jobs(batch_size=None):
+    """
+    Run a batch of jobs, several users in parallel.
+    """
+    jobs = claim_jobs(batch_size or settings.QR_PROVISIONING_BATCH_SIZE)
+    if not jobs:
+        return {"completed": 0, "failed": 0, "retrying": 0}
+    with ThreadPoolExecutor(max_workers=settings.QR_TIGER_CONCURRENCY) as executor:
+        statuses = list(executor.map(process_job, jobs))
+    return {
+        "completed": statuses.count(QrProvisioningJob.Status.COMPLETED),
+        "failed": statuses.count(QrProvisioningJob.Status.FAILED),
+        "retrying": statuses.count(QrProvisioningJob.Status.PENDING),
+    }
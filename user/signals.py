@@ -1,23 +1,39 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_init, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from log.logger_config import logger
 
-from utils.MailChimpAPI import mailchimp_api
+from user.mailchimp_sync import SYNCED_FIELDS, enqueue, is_test_user
+from user.models import MailchimpSync
 
 User = get_user_model()
 
 
+def synced_values(instance):
+    # __dict__ so deferred fields aren't loaded
+    return {field: instance.__dict__.get(field) for field in SYNCED_FIELDS}
+
+
+@receiver(post_init, sender=User)
+def remember_synced_fields(sender, instance, **kwargs):
+    instance._mailchimp_values = synced_values(instance)
+
 
 @receiver(post_save, sender=User)
-def trigger_new_user_logic(sender, instance, created, **kwargs):
+def trigger_new_user_logic(sender, instance, created, update_fields=None, **kwargs):
     """
     This function runs EVERY time a User is saved.
-    The 'created' boolean tells us if it's a brand new user or just an update.
+    Queues a Mailchimp sync when a field sent to Mailchimp changed,
+    the scheduler sends it (user.tasks.sync_mailchimp_contacts).
+    Only active users are synced; an activated user not in Mailchimp yet is queued.
     """
-    if instance.is_active and not instance.in_mail_chimp and "test" not in str(instance.email):
-        logger.info("New user created: ", instance.id)
-        mailchimp_api.add_contact_to_audience(instance)
-        logger.debug("User added to Mailchimp")
-        instance.in_mail_chimp = True
-        instance.save()
+    previous, instance._mailchimp_values = instance._mailchimp_values, synced_values(instance)
+    if not instance.is_active or is_test_user(instance):
+        return
+    if update_fields is not None and not set(update_fields) & set(SYNCED_FIELDS):
+        changed = False
+    else:
+        changed = created or previous != instance._mailchimp_values
+    if changed or (not instance.in_mail_chimp and not MailchimpSync.objects.filter(user=instance).exists()):
+        logger.info(f"Queue Mailchimp sync of user {instance.id}")
+        enqueue(instance)
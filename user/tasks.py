@@ -0,0 +1,16 @@
+from user.mailchimp_sync import sync_contacts
+from user.qr_provisioning import process_pending_jobs
+
+
+def provision_qr_codes():
+    """
+    Scheduled: run queued QR code provisioning jobs.
+    """
+    return process_pending_jobs()
+
+
+def sync_mailchimp_contacts():
+    """
+    Scheduled: record finished Mailchimp batches and submit queued contacts.
+    """
+    return sync_contacts()
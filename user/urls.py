@@ -11,6 +11,7 @@ from .views import (
     ResetPasswordView,
     QrCodeView,
     StaffQrCodeView,
+    QrProvisioningJobView,
     StaffAmbassadorView,
     AdminAmbassadorView,
     GoogleLoginView,
@@ -44,4 +45,5 @@ urlpatterns = [
     path("profile/", ProfileView.as_view(), name="profile"),
     path("profile/qr_codes/", QrCodeView.as_view(), name="qr-codes"),
     path("profile/qr_codes/bundle/", StaffQrCodeView.as_view(), name="bundle-qr-codes"),
+    path("profile/qr_codes/jobs/<int:job_id>/", QrProvisioningJobView.as_view(), name="qr-code-job"),
 ]
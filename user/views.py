@@ -1,7 +1,4 @@
 from log.logger_config import logger
-import requests
-import jwt
-from jwt.algorithms import RSAAlgorithm
 import time
 
 from django.contrib.auth import get_user_model, update_session_auth_hash
@@ -18,15 +15,17 @@ from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.core.signing import TimestampSigner, BadSignature, SignatureExpired
 from django.conf import settings
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
 
 from notifications.utils import send_notification
 from prospect.models import Prospect
 from prospect.permissions import IsStaffUser, IsSuperUser
 from utils.qr_code_tiger_api import qrTigerAPI
+from utils.qr_mirror import with_local_images
 from utils.send_telegram_notification import send_telegram_notification
+from utils.signing_keys import verify_apple_identity_token, verify_google_id_token
 from .auth_backends import verify_ambassador_login_salt
+from .models import QrProvisioningJob
+from .qr_provisioning import enqueue_job, BUNDLES
 from .serializers import (
     UserSerializer,
     TokenObtainPairSerializer,
@@ -108,9 +107,7 @@ class GoogleLoginView(APIView):
 
             # Verify Google ID token
             logger.info("Start google's token verification")
-            id_info = id_token.verify_oauth2_token(
-                google_id_token, google_requests.Request(), client_id
-            )
+            id_info = verify_google_id_token(google_id_token, client_id)
 
             email = id_info.get("email")
             email_verified = id_info.get("email_verified", False)
@@ -273,35 +270,9 @@ class AppleSignInView(APIView):
         """
         Verify Apple's identity token
         """
-        # Get Apple's public keys
-        apple_keys_url = "https://appleid.apple.com/auth/keys"
-        response = requests.get(apple_keys_url)
-        apple_keys = response.json()
-        logger.info(f"Apple keys: {apple_keys}")
-
-        # Decode token header to get the key id (kid)
-        header = jwt.get_unverified_header(identity_token)
-        logger.info(f"header from identity token: {header}")
-        kid = header.get("kid")
-
-        # Find the matching public key
-        public_key = None
-        for key in apple_keys["keys"]:
-            if key["kid"] == kid:
-                public_key = RSAAlgorithm.from_jwk(key)
-                break
-
-        logger.info(f"Public key: {public_key}")
-        if not public_key:
-            raise ValueError("Unable to find matching public key")
-
-        # Verify and decode the token
-        decoded = jwt.decode(
+        decoded = verify_apple_identity_token(
             identity_token,
-            public_key,
-            algorithms=["RS256"],
             audience="com.savefryoil.ambassador",  # Replace with your iOS app bundle ID
-            issuer="https://appleid.apple.com",
         )
         logger.info(f"decoded JWT: {decoded}")
 
@@ -666,27 +637,12 @@ class QrCodeView(APIView):
     def post(self, request):
         user = request.user
 
-        try:
-            logger.info("Received request to generate ambassador referral QR code")
-            qr_url = f"https://savefryoil.com/ambassador-referrals/?referral_code={user.referral_code}"
-            qr_name = f"ambassador_{user.email}"
-            qr_id = qrTigerAPI.create_qr_code_with_name(qr_url, qr_name)
-            user.referral_qr_code_id = qr_id
-            user.save()
-            send_notification(
-                request.user.id,
-                "Ambassador QR Code generated successfully",
-                "success",
-                "QR Code Generated",
-            )
-
-            logger.info(
-                f"Ambassador QR Code generated successfully with qr id: {qr_id}"
-            )
-            return Response({"detail": "success"}, status=status.HTTP_200_OK)
-        except Exception as e:
-            logger.error(f"Error generating ambassador QR code: {e}")
-            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        logger.info("Received request to generate ambassador referral QR code")
+        job, created = enqueue_job(user, QrProvisioningJob.Kind.REFERRAL)
+        logger.info(f"Ambassador QR Code provisioning job {job.id} {'queued' if created else 'already in flight'}")
+        return Response(
+            {"detail": "queued", "job_id": job.id, "status": job.status}, status=status.HTTP_202_ACCEPTED
+        )
 
     def get(self, request):
         user = request.user
@@ -696,10 +652,28 @@ class QrCodeView(APIView):
             return Response(
                 {"error": "No QR code found."}, status=status.HTTP_400_BAD_REQUEST
             )
-        qr_code_data = qrTigerAPI.get_qr_code_by_id(qr_id)
+        qr_code_data = with_local_images(request, qr_id, qrTigerAPI.get_qr_code_by_id(qr_id))
         return Response(qr_code_data, status=status.HTTP_200_OK)
 
 
+class QrProvisioningJobView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        job = QrProvisioningJob.objects.filter(id=job_id, user=request.user).first()
+        if not job:
+            return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response({
+            "job_id": job.id,
+            "kind": job.kind,
+            "bundle_type": job.bundle_type,
+            "status": job.status,
+            "attempts": job.attempts,
+            "qr_id": job.qr_id,
+            "error": job.error,
+        })
+
+
 class StaffQrCodeView(APIView):
     permission_classes = [
         IsStaffUser,
@@ -713,39 +687,18 @@ class StaffQrCodeView(APIView):
             logger.info(f"Received request to generate Staff QR code Bundle {data}")
 
             code_bundle_type = data["code_bundle_type"]
-            if code_bundle_type not in ["Industry", "Affinity", "B2B"]:
+            if code_bundle_type not in BUNDLES:
                 logger.error(f"Wrong code bundle type: {code_bundle_type}")
                 return Response(
                     {"error": "code_bundle_type is not valid."},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            qr_url = None
-            qr_frame_text = None
-            if code_bundle_type == "Industry":
-                qr_url = (
-                    f"https://savefryoil.retool.com/embedded/public/98912f22-4534-4209-af8e-d6d4e16dc706"
-                    f"?referral_code={user.referral_code}"
-                )
-                qr_frame_text = "Industry"
-            if code_bundle_type == "Affinity":
-                qr_url = "https://savefryoil.retool.com/embedded/public/6330dac3-e5e7-428e-b675-66cf44e65c61"
-                qr_frame_text = "Affinity"
-            if code_bundle_type == "B2B":
-                qr_url = "https://savefryoil.retool.com/embedded/public/e556ad0c-c4c0-4eaa-8f5d-b49753bc4f8a"
-                qr_frame_text = "B2B"
-
-            qr_name = f"Code Bundle {user.email}"
-
-            qr_id = qrTigerAPI.create_bundle_qr_code_with_name(
-                qr_url, qr_frame_text, qr_name
-            )
-            bundle_dict = user.qr_code_bundles
-            bundle_dict[code_bundle_type] = qr_id
-            user.qr_code_bundles = bundle_dict
-            user.save()
-            logger.info("Successfully generated Staff QR code")
-            return Response({"detail": "success"}, status=status.HTTP_200_OK)
+            job, created = enqueue_job(user, QrProvisioningJob.Kind.BUNDLE, code_bundle_type)
+            logger.info(f"Staff QR code provisioning job {job.id} {'queued' if created else 'already in flight'}")
+            return Response(
+                {"detail": "queued", "job_id": job.id, "status": job.status}, status=status.HTTP_202_ACCEPTED
+            )
         except Exception as e:
             logger.error(f"Error generating Staff QR code: {e}")
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -760,9 +713,10 @@ class StaffQrCodeView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        qr_codes_data = {}
-        for qr_name, qr_code_id in qr_code_bundles_id.items():
-            qr_code_data = qrTigerAPI.get_qr_code_by_id(qr_code_id)
-            qr_codes_data[qr_name] = qr_code_data
+        qr_codes = qrTigerAPI.get_qr_codes_by_ids(list(qr_code_bundles_id.values()))
+        qr_codes_data = {
+            qr_name: with_local_images(request, qr_code_id, qr_codes[qr_code_id])
+            for qr_name, qr_code_id in qr_code_bundles_id.items()
+        }
 
         return Response(qr_codes_data, status=status.HTTP_200_OK)
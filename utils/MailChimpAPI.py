@@ -1,8 +1,13 @@
+import io
+import json
+import tarfile
+
 from log.logger_config import logger
 from os import getenv
-import requests
+from django.conf import settings
 
 from user.models import User
+from utils.http_client import IntegrationSession
 
 MAIL_CHIMP_API_KEY = getenv("MAIL_CHIMP_API_KEY")
 
@@ -11,35 +16,71 @@ class MailChimpAPI:
         self.api_key = api_key
         self.dc = dc
         self.audience_id = audience_id
+        self.base_url = settings.MAILCHIMP_API_BASE_URL
+        self.session = IntegrationSession("mailchimp", timeout=settings.MAILCHIMP_TIMEOUT)
+        self.session.auth = ("anystring", api_key)
+        # Batch results are on a signed storage url, requested without the API key
+        self.results_session = IntegrationSession("mailchimp", timeout=settings.MAILCHIMP_TIMEOUT)
+
+    @staticmethod
+    def contact_payload(user: User):
+        return {
+            "language": "en",
+            "email_channel": {
+                "email": user.email,
+                "marketing_consent": {"status": "confirmed"},
+            },
+            "merge_fields": {
+                "FNAME": user.first_name,
+                "LNAME": user.last_name,
+                "PHONE": user.phone
+            },
+        }
+
+    def contact_operation(self, user: User):
+        """
+        Batch operation adding or updating the user's audience contact; operation_id is the user id.
+        """
+        return {
+            "method": "POST",
+            "path": f"/audiences/{self.audience_id}/contacts",
+            "params": {"merge_field_validation_mode": "strict", "data_mode": "live"},
+            "body": json.dumps(self.contact_payload(user)),
+            "operation_id": str(user.id),
+        }
+
+    def submit_batch(self, operations):
+        """
+        Start a batch of operations, Mailchimp runs it in the background. Returns the batch id.
+        """
+        response = self.session.post(
+            f"{self.base_url}/batches",
+            json={"operations": operations},
+        )
+        response.raise_for_status()
+        batch = response.json()
+        logger.info(f"MailChimp batch {batch['id']} submitted with {len(operations)} operations")
+        return batch["id"]
+
+    def get_batch(self, batch_id):
+        response = self.session.get(f"{self.base_url}/batches/{batch_id}")
+        response.raise_for_status()
+        return response.json()
 
-    def add_contact_to_audience(
-        self, user: User
-    ):
-        if "test" in [user.email, user.first_name, user.last_name]:
-            logger.warning(f"Skipping adding user to Mailchimp due to test: {user.email}")
-            return
-        try:
-            payload = {
-                "language": "en",
-                "email_channel": {
-                    "email": user.email,
-                    "marketing_consent": {"status": "confirmed"},
-                },
-                "merge_fields": {
-                    "FNAME": user.first_name,
-                    "LNAME": user.last_name,
-                    "PHONE": user.phone
-                },
-            }
-            req = requests.post(
-                url=f"https://us11.api.mailchimp.com/3.0/audiences/{self.audience_id}/contacts",
-                params={"merge_field_validation_mode": "strict", "data_mode": "live"},
-                auth=("anystring", MAIL_CHIMP_API_KEY),
-                json=payload,
-            )
-            logger.info(f"MailChimp response{req.json()}")
-        except Exception as e:
-            logger.error(f"MailChimp Error {str(e)}")
+    def get_batch_results(self, response_body_url):
+        """
+        {operation_id: (status_code, response)} of a finished batch, read from its results archive.
+        """
+        response = self.results_session.get(response_body_url)
+        response.raise_for_status()
+        results = {}
+        with tarfile.open(fileobj=io.BytesIO(response.content), mode="r:gz") as archive:
+            for member in archive.getmembers():
+                if not member.isfile():
+                    continue
+                for result in json.load(archive.extractfile(member)):
+                    results[result["operation_id"]] = (result["status_code"], result.get("response", ""))
+        return results
 
 
 
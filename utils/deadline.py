@@ -0,0 +1,178 @@
+"""
+Request deadlines: an overall time budget that outbound calls (integrations, SMTP, channel
+layer) respect by shrinking their own timeouts, and fail fast once it's spent.
+
+DeadlineMiddleware sets one per request from REQUEST_DEADLINES (by url name) or
+REQUEST_DEADLINE_DEFAULT. Code outside a request can use `with deadline(seconds, name)`.
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from django.conf import settings
+from django.http import JsonResponse
+from django.urls import Resolver404, resolve
+
+from log.logger_config import logger
+from utils.metrics import metrics
+
+# Below this, a call couldn't complete anyway
+MIN_TIMEOUT = 0.05
+
+_current = contextvars.ContextVar("deadline", default=None)
+
+
+class Deadline:
+    def __init__(self, seconds, name=""):
+        self.name = name
+        self.budget = seconds
+        self.expires_at = time.monotonic() + seconds
+        self.spent = {}  # dependency -> seconds
+        self._lock = threading.Lock()  # Pooled calls (propagate) add to spent concurrently
+
+    def remaining(self):
+        return self.expires_at - time.monotonic()
+
+    def add_spent(self, dependency, seconds):
+        with self._lock:
+            self.spent[dependency] = self.spent.get(dependency, 0) + seconds
+
+    def spent_summary(self):
+        spent = sorted(self.spent.items(), key=lambda item: item[1], reverse=True)
+        return ", ".join(f"{dependency} {seconds:.2f}s" for dependency, seconds in spent) or "nothing tracked"
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """
+    The request's time budget ran out before or during a call to `dependency`.
+    """
+
+    def __init__(self, current: Deadline, dependency):
+        self.deadline = current
+        self.dependency = dependency
+        super().__init__(
+            f"Deadline of {current.budget}s for {current.name or 'the request'} exceeded at {dependency} "
+            f"(spent: {current.spent_summary()})"
+        )
+
+
+def get_deadline() -> Deadline:
+    return _current.get()
+
+
+@contextmanager
+def deadline(seconds, name=""):
+    """
+    Run the block with a time budget. Nested budgets can only shorten the outer one.
+    """
+    current = Deadline(seconds, name)
+    outer = _current.get()
+    if outer is not None:
+        current.expires_at = min(current.expires_at, outer.expires_at)
+        current.spent, current._lock = outer.spent, outer._lock
+    token = _current.set(current)
+    try:
+        yield current
+    finally:
+        _current.reset(token)
+
+
+def timeout_for(dependency, timeout):
+    """
+    `timeout` (seconds or a (connect, read) tuple) shrunk to the remaining budget.
+    Raises DeadlineExceeded if the budget is spent. Unchanged outside a deadline.
+    """
+    current = _current.get()
+    if current is None:
+        return timeout
+    remaining = current.remaining()
+    if remaining < MIN_TIMEOUT:
+        metrics.incr(f"deadline.exceeded.{dependency}")
+        raise DeadlineExceeded(current, dependency)
+    if timeout is None:
+        return remaining
+    if isinstance(timeout, tuple):
+        return tuple(remaining if part is None else min(part, remaining) for part in timeout)
+    return min(timeout, remaining)
+
+
+def propagate(fn):
+    """
+    `fn` bound to the caller's deadline, for thread pools: workers don't inherit context
+    variables. Each call runs in its own copy, a context can't be entered by two threads.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+
+    return run
+
+
+@contextmanager
+def track(dependency):
+    """
+    Count the block's time against `dependency`, for the report when the deadline is exceeded.
+    """
+    current = _current.get()
+    started_at = time.monotonic()
+    try:
+        yield
+    finally:
+        if current is not None:
+            current.add_spent(dependency, time.monotonic() - started_at)
+
+
+async def wait_for(dependency, awaitable, timeout):
+    """
+    Await with `timeout` shrunk to the remaining budget (e.g. channel layer calls).
+    """
+    try:
+        timeout = timeout_for(dependency, timeout)
+    except DeadlineExceeded:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise
+    with track(dependency):
+        try:
+            return await asyncio.wait_for(awaitable, timeout)
+        except asyncio.TimeoutError:
+            current = _current.get()
+            if current is not None and current.remaining() < MIN_TIMEOUT:
+                metrics.incr(f"deadline.exceeded.{dependency}")
+                raise DeadlineExceeded(current, dependency) from None
+            raise
+
+
+class DeadlineMiddleware:
+    """
+    Gives every request a deadline and answers 504 when a view lets DeadlineExceeded through.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # Set and reset in this frame: under ASGI each sync middleware hook runs in its own
+        # copied context, so a deadline set in process_view couldn't be reset here
+        seconds = settings.REQUEST_DEADLINES.get(self.view_name(request), settings.REQUEST_DEADLINE_DEFAULT)
+        if not seconds:
+            return self.get_response(request)
+        with deadline(seconds, f"{request.method} {request.path}"):
+            return self.get_response(request)
+
+    @staticmethod
+    def view_name(request):
+        try:
+            return resolve(request.path_info, getattr(request, "urlconf", None)).view_name
+        except Resolver404:
+            return None
+
+    def process_exception(self, request, exception):
+        if not isinstance(exception, DeadlineExceeded):
+            return None
+        logger.error(str(exception))
+        return JsonResponse({"error": f"Request timed out waiting for {exception.dependency}"}, status=504)
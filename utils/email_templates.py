@@ -0,0 +1,47 @@
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.template import engines
+from django.template.loader import get_template
+
+from log.logger_config import logger
+
+
+class EmailTemplates:
+    """
+    In-memory cache of email templates built by `manage.py build_email_templates`
+    (CSS inlined, markup minified). Falls back to the source template when no build exists.
+    """
+
+    def __init__(self, build_dir):
+        self.build_dir = Path(build_dir)
+        self._templates = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        engine = engines["django"]
+        templates = {}
+        for path in self.build_dir.rglob("*.html"):
+            template_name = path.relative_to(self.build_dir).as_posix()
+            templates[template_name] = engine.from_string(path.read_text(encoding="utf-8"))
+        with self._lock:
+            self._templates = templates
+        logger.info(f"Loaded {len(templates)} compiled email templates")
+        return len(templates)
+
+    def get(self, template_name):
+        template = self._templates.get(template_name)
+        if template is None:
+            template = get_template(template_name)
+        return template
+
+    def render(self, template_name, context=None):
+        return self.get(template_name).render({
+            "current_year": datetime.now().year,
+            **(context or {}),
+        })
+
+
+email_templates = EmailTemplates(settings.EMAIL_TEMPLATES_BUILD_DIR)
@@ -0,0 +1,412 @@
+"""
+Local stand-ins for the third party APIs we call, for load tests and offline development.
+
+One ASGI app answers the endpoints our clients use, each integration under its own prefix:
+/stripe, /ghl, /sfo (main backend), /qrtiger, /qrtiger-web, /mailchimp, /telegram, /expo,
+/apple and /google. It doesn't need Django settings.
+
+    uvicorn utils.fake_integrations:app --port 8900      # on localhost
+    url, server = start_in_thread()                       # in-process, on a free port
+
+Point the app at them with FAKE_INTEGRATIONS_URL=http://127.0.0.1:8900 (see settings).
+
+Behaviour comes from the environment, FAKE_<INTEGRATION>_<OPTION> overriding FAKE_<OPTION>
+(e.g. FAKE_GHL_RATE_LIMIT=10):
+    LATENCY_MS  added to every response          JITTER_MS   random extra latency
+    ERROR_RATE  share of requests answered 503   RATE_LIMIT  requests per second, then 429
+    FAKE_SEED   random seed, for repeatable runs
+"""
+import asyncio
+import base64
+import io
+import itertools
+import json
+import os
+import random
+import struct
+import tarfile
+import threading
+import time
+import uuid
+import zlib
+from dataclasses import dataclass
+from urllib.parse import parse_qs
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+INTEGRATIONS = (
+    "stripe", "ghl", "sfo", "qrtiger", "qrtiger-web", "mailchimp", "telegram", "expo", "apple", "google",
+)
+SIGN_IN_ISSUERS = {"apple": "https://appleid.apple.com", "google": "https://accounts.google.com"}
+
+
+@dataclass
+class FakeConfig:
+    latency_ms: float = 0
+    jitter_ms: float = 0
+    error_rate: float = 0
+    rate_limit: float = 0  # Requests per second, 0 for no limit
+
+    @classmethod
+    def from_env(cls, integration):
+        def option(name, default):
+            prefix = f"FAKE_{integration.upper().replace('-', '_')}_"
+            return float(os.getenv(prefix + name, os.getenv(f"FAKE_{name}", default)))
+
+        return cls(
+            latency_ms=option("LATENCY_MS", 0),
+            jitter_ms=option("JITTER_MS", 0),
+            error_rate=option("ERROR_RATE", 0),
+            rate_limit=option("RATE_LIMIT", 0),
+        )
+
+
+def tiny_png(text):
+    """A valid 1x1 PNG carrying `text`, so each fake QR image has its own content."""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0))
+        + chunk(b"tEXt", b"Comment\x00" + text.encode())
+        + chunk(b"IDAT", zlib.compress(b"\x00\xff\xff\xff"))
+        + chunk(b"IEND", b"")
+    )
+
+
+def fake_jwt(claims):
+    """Unsigned JWT, enough for clients that only read the claims (GHL location tokens)."""
+    def encode(part):
+        return base64.urlsafe_b64encode(json.dumps(part).encode()).rstrip(b"=").decode()
+
+    return f"{encode({'alg': 'none', 'typ': 'JWT'})}.{encode(claims)}.sig"
+
+
+class FakeIntegrations:
+    """
+    The stand-in servers with their in-memory state. Configs default to the environment.
+    """
+
+    def __init__(self, configs=None, seed=None):
+        self.configs = {name: FakeConfig.from_env(name) for name in INTEGRATIONS}
+        self.configs.update(configs or {})
+        seed = os.getenv("FAKE_SEED") if seed is None else seed
+        self.random = random.Random(seed)
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.windows = {}  # integration -> (second, requests in it)
+        self.requests = []  # (integration, method, path), for assertions in tests
+        self.contacts = {}  # GHL location -> contacts, oldest first
+        self.qr_codes = {}
+        self.stripe_accounts = {}
+        self.batches = {}
+        self.messages = []  # Telegram messages and Expo pushes
+        self.signing_keys = {
+            provider: rsa.generate_private_key(public_exponent=65537, key_size=2048)
+            for provider in SIGN_IN_ISSUERS
+        }
+
+    def new_id(self, prefix):
+        return f"{prefix}{next(self.ids):06d}"
+
+    def sign_id_token(self, provider, audience, **claims):
+        """
+        Identity token of `provider` ("apple" or "google") accepted by the app while it uses these fakes.
+        """
+        now = int(time.time())
+        payload = {"iss": SIGN_IN_ISSUERS[provider], "aud": audience, "iat": now, "exp": now + 600, **claims}
+        return jwt.encode(
+            payload, self.signing_keys[provider], algorithm="RS256", headers={"kid": f"fake-{provider}"}
+        )
+
+    # ASGI
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while (await receive())["type"] != "lifespan.shutdown":
+                await send({"type": "lifespan.startup.complete"})
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        integration, _, path = scope["path"].lstrip("/").partition("/")
+        status, payload, headers = await self.handle(scope, integration, "/" + path, body)
+        if isinstance(payload, bytes):
+            content = payload
+        else:
+            content = json.dumps(payload).encode()
+            headers = {"Content-Type": "application/json", **headers}
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(k.lower().encode(), str(v).encode()) for k, v in headers.items()],
+        })
+        await send({"type": "http.response.body", "body": content})
+
+    async def handle(self, scope, integration, path, body):
+        config = self.configs.get(integration)
+        if config is None:
+            return 404, {"error": f"Unknown integration {integration}"}, {}
+        with self.lock:
+            self.requests.append((integration, scope["method"], path))
+            throttled = self.is_throttled(integration, config)
+            failed = self.random.random() < config.error_rate
+            delay = (config.latency_ms + self.random.random() * config.jitter_ms) / 1000
+        if delay:
+            await asyncio.sleep(delay)
+        if throttled:
+            return 429, {"error": "Too many requests"}, {"Retry-After": 1}
+        if failed:
+            return 503, {"error": "Fake outage"}, {}
+
+        handler = getattr(self, integration.replace("-", "_"))
+        request = {
+            "method": scope["method"],
+            "path": path,
+            "query": {k: v[0] for k, v in parse_qs(scope.get("query_string", b"").decode()).items()},
+            "headers": {k.decode().lower(): v.decode() for k, v in scope.get("headers", [])},
+            "data": self.parse_body(scope, body),
+            "base_url": self.base_url(scope) + f"/{integration}",
+        }
+        with self.lock:
+            result = handler(request)
+        if result is None:
+            return 404, {"error": f"No fake for {scope['method']} {path}"}, {}
+        return result if len(result) == 3 else (*result, {})
+
+    def is_throttled(self, integration, config):
+        if not config.rate_limit:
+            return False
+        second = int(time.monotonic())
+        window, count = self.windows.get(integration, (second, 0))
+        if window != second:
+            window, count = second, 0
+        self.windows[integration] = (window, count + 1)
+        return count + 1 > config.rate_limit
+
+    @staticmethod
+    def parse_body(scope, body):
+        if not body:
+            return {}
+        content_type = dict(scope.get("headers", [])).get(b"content-type", b"").decode()
+        if "application/x-www-form-urlencoded" in content_type:  # Stripe SDK
+            return {k: v[0] for k, v in parse_qs(body.decode()).items()}
+        try:
+            return json.loads(body)
+        except ValueError:
+            return {}
+
+    @staticmethod
+    def base_url(scope):
+        host = dict(scope.get("headers", [])).get(b"host", b"127.0.0.1").decode()
+        return f"{scope.get('scheme', 'http')}://{host}"
+
+    # Integrations: each returns (status, payload[, headers]) or None for an unknown endpoint
+
+    def stripe(self, request):
+        method, path, data = request["method"], request["path"], request["data"]
+        if (method, path) == ("POST", "/v1/accounts"):
+            account_id = self.new_id("acct_fake")
+            self.stripe_accounts[account_id] = data
+            return 200, {"id": account_id, "object": "account", "type": data.get("type"), "email": data.get("email")}
+        if (method, path) == ("POST", "/v1/transfers"):
+            return 200, {
+                "id": self.new_id("tr_fake"), "object": "transfer", "amount": int(data.get("amount", 0)),
+                "currency": data.get("currency"), "destination": data.get("destination"),
+            }
+        if (method, path) == ("POST", "/v2/core/accounts"):
+            account_id = self.new_id("acct_fake")
+            self.stripe_accounts[account_id] = data
+            return 200, {"id": account_id, "object": "v2.core.account", **data}
+        if method == "GET" and path.startswith("/v2/core/accounts/"):
+            account_id = path.rsplit("/", 1)[1]
+            return 200, {
+                "id": account_id,
+                "object": "v2.core.account",
+                "configuration": {"recipient": {
+                    "capabilities": {"bank_accounts": {"local": {"status": "active"}}},
+                    "default_outbound_destination": {"id": f"bank_{account_id}", "type": "bank_account"},
+                }},
+            }
+        if (method, path) == ("POST", "/v2/core/account_links"):
+            return 200, {"url": f"{request['base_url']}/onboarding/{data.get('account')}"}
+        if (method, path) == ("POST", "/v2/money_management/outbound_payment_quotes"):
+            return 200, {"id": self.new_id("quote_fake"), "amount": data.get("amount")}
+        if (method, path) == ("GET", "/v2/money_management/payout_methods"):
+            return 200, {"data": [{
+                "id": self.new_id("pm_fake"),
+                "bank_account": {"supported_currencies": ["aud", "cad", "eur", "gbp", "nzd", "usd"]},
+            }]}
+        if (method, path) == ("POST", "/v2/money_management/outbound_payments"):
+            return 200, {"id": self.new_id("obp_fake"), "status": "processing", "amount": data.get("amount")}
+        return None
+
+    def ghl(self, request):
+        method, path = request["method"], request["path"]
+        if (method, path) == ("POST", "/contacts"):
+            location = request["data"].get("locationId")
+            contact = {
+                **request["data"],
+                "id": self.new_id("contact"),
+                "dateAdded": int(time.time() * 1000),
+            }
+            self.contacts.setdefault(location, []).append(contact)
+            return 201, {"contact": contact}
+        if (method, path) == ("GET", "/contacts/"):
+            query = request["query"]
+            contacts = self.contacts.get(query.get("locationId"), [])
+            start = 0
+            if query.get("startAfterId"):
+                ids = [contact["id"] for contact in contacts]
+                start = ids.index(query["startAfterId"]) + 1 if query["startAfterId"] in ids else len(ids)
+            page = contacts[start:start + int(query.get("limit", 100))]
+            meta = {"total": len(contacts)}
+            if page:
+                meta.update(startAfterId=page[-1]["id"], startAfter=page[-1]["dateAdded"])
+            return 200, {"contacts": page, "meta": meta}
+        return None
+
+    def sfo(self, request):
+        method, path = request["method"], request["path"]
+        if (method, path) == ("POST", "/ghl/token"):
+            location = request["data"].get("location_id")
+            return 200, fake_jwt({"location": location, "exp": int(time.time()) + 3600})
+        if (method, path) == ("GET", "/rm-dashboard/users"):
+            email = request["query"].get("email", "")
+            return 200, [{"email": email, "ghl_user_id": f"ghl_user_{zlib.crc32(email.encode()):08x}"}]
+        return None
+
+    def qrtiger(self, request):
+        method, path, base_url = request["method"], request["path"], request["base_url"]
+        if path.startswith("/images/"):
+            name = path.rsplit("/", 1)[1]
+            qr_id, _, extension = name.partition(".")
+            if extension == "svg":
+                svg = f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 1 1"><desc>{qr_id}</desc></svg>'
+                return 200, svg.encode(), {"Content-Type": "image/svg+xml"}
+            return 200, tiny_png(qr_id), {"Content-Type": "image/png"}
+        if (method, path) == ("POST", "/campaign/"):
+            qr_id = self.new_id("qr")
+            self.qr_codes[qr_id] = {
+                "qrId": qr_id,
+                "qrName": request["data"].get("qrName"),
+                "qrUrl": request["data"].get("qrUrl"),
+                "qrImage": f"{base_url}/images/{qr_id}.png",
+                "svgImage": f"{base_url}/images/{qr_id}.svg",
+            }
+            return 200, {"qrId": qr_id}
+        if method == "POST" and path.startswith("/campaign/edit/"):
+            qr_id = path.strip("/").rsplit("/", 1)[1]
+            if qr_id not in self.qr_codes:
+                return 404, {"error": "QR code not found"}
+            self.qr_codes[qr_id]["qrName"] = request["data"].get("qrName")
+            return 200, {"data": {"id": f"code_{qr_id}"}}
+        if method == "GET" and path.startswith("/data/"):
+            qr_code = self.qr_codes.get(path.rsplit("/", 1)[1])
+            return (200, {"data": qr_code}) if qr_code else (404, {"error": "QR code not found"})
+        if (method, path) == ("GET", "/campaign/"):
+            return 200, {"data": list(self.qr_codes.values())[:int(request["query"].get("limit", 100))]}
+        if (method, path) == ("POST", "/qr/static"):
+            qr_id = self.new_id("static")
+            return 200, {"data": {"qrImage": f"{base_url}/images/{qr_id}.png"}}
+        return None
+
+    def qrtiger_web(self, request):
+        if request["method"] == "POST" and request["path"].startswith("/folder/move/"):
+            return 200, {"success": True}
+        return None
+
+    def mailchimp(self, request):
+        method, path = request["method"], request["path"]
+        if (method, path) == ("POST", "/batches"):
+            batch_id = self.new_id("batch")
+            results = []
+            for operation in request["data"].get("operations", []):
+                email = json.loads(operation.get("body") or "{}").get("email_channel", {}).get("email", "")
+                # Addresses containing "invalid" fail, to exercise error handling
+                status_code = 400 if "invalid" in email else 200
+                results.append({"operation_id": operation.get("operation_id"), "status_code": status_code,
+                                "response": json.dumps({"email": email})})
+            self.batches[batch_id] = results
+            return 200, {"id": batch_id, "status": "pending", "total_operations": len(results)}
+        if method == "GET" and path.startswith("/batches/"):
+            batch_id = path.rsplit("/", 1)[1]
+            results = self.batches.get(batch_id)
+            if results is None:
+                return 404, {"detail": "Batch not found"}
+            return 200, {
+                "id": batch_id,
+                "status": "finished",
+                "total_operations": len(results),
+                "errored_operations": sum(1 for result in results if result["status_code"] >= 400),
+                "response_body_url": f"{request['base_url']}/batch-results/{batch_id}.tar.gz",
+            }
+        if method == "GET" and path.startswith("/batch-results/"):
+            results = self.batches.get(path.rsplit("/", 1)[1].split(".")[0])
+            if results is None:
+                return 404, {"detail": "Batch not found"}
+            buffer = io.BytesIO()
+            with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+                content = json.dumps(results).encode()
+                member = tarfile.TarInfo("results.json")
+                member.size = len(content)
+                archive.addfile(member, io.BytesIO(content))
+            return 200, buffer.getvalue(), {"Content-Type": "application/gzip"}
+        return None
+
+    def telegram(self, request):
+        if request["method"] == "POST" and request["path"].endswith("/sendMessage"):
+            self.messages.append(("telegram", request["data"]))
+            return 200, {"ok": True, "result": {"message_id": next(self.ids), "text": request["data"].get("text")}}
+        return None
+
+    def expo(self, request):
+        if (request["method"], request["path"]) == ("POST", "/--/api/v2/push/send"):
+            self.messages.append(("expo", request["data"]))
+            return 200, {"data": {"status": "ok", "id": str(uuid.uuid4())}}
+        return None
+
+    def jwks(self, provider):
+        key = json.loads(RSAAlgorithm.to_jwk(self.signing_keys[provider].public_key()))
+        key.update(kid=f"fake-{provider}", use="sig", alg="RS256")
+        return 200, {"keys": [key]}, {"Cache-Control": "public, max-age=3600"}
+
+    def apple(self, request):
+        if (request["method"], request["path"]) == ("GET", "/auth/keys"):
+            return self.jwks("apple")
+        return None
+
+    def google(self, request):
+        if (request["method"], request["path"]) == ("GET", "/oauth2/v3/certs"):
+            return self.jwks("google")
+        return None
+
+
+def start_in_thread(app=None, host="127.0.0.1", port=0):
+    """
+    Serve the fakes from a background thread. Returns (base url, uvicorn server);
+    set `server.should_exit = True` to stop it.
+    """
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app or FakeIntegrations(), host=host, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="fake-integrations", daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("Fake integrations server failed to start")
+        time.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    return f"http://{host}:{port}", server
+
+
+app = FakeIntegrations()
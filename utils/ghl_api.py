@@ -1,20 +1,41 @@
+import base64
 import json
+import time
 from log.logger_config import logger
 from datetime import datetime, timedelta
 from os import getenv
 from pathlib import Path
 
-import requests
+from django.conf import settings
+from django.core.cache import cache
+
+from utils.http_client import IntegrationSession
+from utils.rate_limit import RedisTokenBucket
+from utils.single_flight import single_flight
 
 CLIENT_ID = getenv("CLIENT_ID")
 CLIENT_SECRET = getenv("CLIENT_SECRET")
 SFO_BACKEND_API_KEY = getenv("SFO_BACKEND_API_KEY")
 
+# Refresh cached location tokens this long before they expire
+TOKEN_EXPIRY_MARGIN = 60
 
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 
+def get_token_expiry(access_token):
+    """
+    `exp` claim of a JWT access token, read without verification. None if it isn't a JWT.
+    """
+    try:
+        payload = access_token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
 class GoHighLevelAPI:
     def __init__(self):
         self.headers = {
@@ -22,7 +43,7 @@ class GoHighLevelAPI:
             "Content-Type": "application/json",
             "Authorization": "Bearer ",
         }
-        self.base_url = "https://services.leadconnectorhq.com"
+        self.base_url = settings.GHL_API_BASE_URL
         self.country_to_locationID = {
             "GB": "dNMN3zCANRj6BuScTLfC",
             "AU": "4Nh160QNZTSu12oiCecp",
@@ -31,6 +52,12 @@ class GoHighLevelAPI:
             "NZ": "jQZrYYLodjByNxqCrehy",
             "US": "EhYpQQPMMPBIvrlubdE4"
         }
+        # Shared by submission threads: keep-alive connections sized to the pool
+        self.session = IntegrationSession("ghl", pool_maxsize=settings.GHL_SUBMIT_CONCURRENCY)
+        self.sfo_backend_session = IntegrationSession("sfo_backend")
+        self.location_rate_limit = RedisTokenBucket(
+            "ghl.location", settings.GHL_LOCATION_RATE_LIMIT, settings.GHL_LOCATION_BURST
+        )
 
     @staticmethod
     def create_headers(access_token: str) -> dict:
@@ -41,9 +68,26 @@ class GoHighLevelAPI:
         }
 
     @staticmethod
-    def get_location_access_token(location_id):
-        response = requests.post(
-            url=f"https://api.savefryoil.com/ghl/token",
+    def location_token_cache_key(location_id):
+        return f"ghl:location_token:{location_id}"
+
+    def get_location_access_token(self, location_id, refresh=False):
+        """
+        Location access token from the main backend, cached until shortly before it expires.
+        """
+        cache_key = self.location_token_cache_key(location_id)
+        if not refresh:
+            access_token = cache.get(cache_key)
+            if access_token:
+                return access_token
+        # Parallel submissions for a location (and their 401 refreshes) share one token request
+        return single_flight.do(
+            cache_key, lambda: self.fetch_location_access_token(location_id), distributed=True
+        )
+
+    def fetch_location_access_token(self, location_id):
+        response = self.sfo_backend_session.post(
+            url=f"{settings.SFO_BACKEND_BASE_URL}/ghl/token",
             headers={
                 "x-api-key": SFO_BACKEND_API_KEY
             },
@@ -52,18 +96,40 @@ class GoHighLevelAPI:
             }
         )
         logger.info(f"Sent request to retrieve location token")
-        return response.json()
+        response.raise_for_status()
+        access_token = response.json()
+
+        expires_at = get_token_expiry(access_token)
+        timeout = settings.GHL_TOKEN_CACHE_TTL
+        if expires_at:
+            timeout = min(timeout, expires_at - time.time() - TOKEN_EXPIRY_MARGIN)
+        if timeout > 0:
+            cache.set(self.location_token_cache_key(location_id), access_token, timeout)
+        return access_token
 
+    def location_request(self, method, path, location_id, **kwargs):
+        """
+        Request to GHL with the location's cached token and rate limit.
+        A 401 means the token was revoked before expiry: refresh it and retry once.
+        """
+        access_token = self.get_location_access_token(location_id)
+        self.location_rate_limit.acquire(location_id)
+        response = self.session.request(
+            method, f"{self.base_url}{path}", headers=self.create_headers(access_token), **kwargs
+        )
+        if response.status_code == 401:
+            logger.warning(f"GHL rejected cached token of location {location_id}, refreshing")
+            access_token = self.get_location_access_token(location_id, refresh=True)
+            self.location_rate_limit.acquire(location_id)
+            response = self.session.request(
+                method, f"{self.base_url}{path}", headers=self.create_headers(access_token), **kwargs
+            )
+        return response
 
     def create_contact(self, data, location_id):
         try:
-            access_token = self.get_location_access_token(location_id)
             data["locationId"] = location_id
-            request = requests.post(
-                f"{self.base_url}/contacts",
-                headers=self.create_headers(access_token),  # Create header with location access token
-                json=data
-            )
+            request = self.location_request("POST", "/contacts", location_id, json=data)
             response = request.json()
 
             if request.status_code != 201:
@@ -75,5 +141,18 @@ class GoHighLevelAPI:
             logger.error(f"Error creating contact: {ex}")
             raise ex
 
+    def list_contacts(self, location_id, start_after_id=None, start_after=None, limit=100):
+        """
+        One page of the location's contacts, oldest first.
+        Pass `meta.startAfterId`/`meta.startAfter` of the previous page to get the next one.
+        """
+        params = {"locationId": location_id, "limit": limit}
+        if start_after_id:
+            params["startAfterId"] = start_after_id
+            params["startAfter"] = start_after
+        response = self.location_request("GET", "/contacts/", location_id, params=params)
+        response.raise_for_status()
+        return response.json()
+
 
 GHL_API = GoHighLevelAPI()
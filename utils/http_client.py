@@ -0,0 +1,171 @@
+"""
+Shared HTTP sessions for third party integrations: keep-alive pools, default timeouts,
+retries, a circuit breaker and latency/error counters per integration.
+"""
+import threading
+import time
+from contextlib import nullcontext
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from log.logger_config import logger
+from utils.deadline import timeout_for, track
+from utils.metrics import metrics
+from utils.rate_limit import RateLimitExceeded
+
+# Responses retried for idempotent methods; POSTs are only retried when the connection failed
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """
+    Raised instead of calling an integration whose breaker is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures, then fails fast for `reset_timeout`
+    seconds. After that one trial request is let through: success closes the breaker,
+    failure opens it again. State is per worker process.
+    """
+
+    def __init__(self, name, failure_threshold, reset_timeout):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return "open"
+        return "half-open"
+
+    def before_request(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return
+            if state == "half-open" and not self.trial_running:
+                self.trial_running = True
+                return
+        metrics.incr(f"http.{self.name}.circuit_open")
+        raise CircuitOpenError(f"{self.name} is unavailable, circuit breaker is open")
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info(f"Circuit breaker of {self.name} closed")
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.error(f"Circuit breaker of {self.name} opened after {self.failures} failures")
+                self.opened_at = time.monotonic()
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name):
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(
+                name, settings.HTTP_BREAKER_FAILURES, settings.HTTP_BREAKER_RESET_TIMEOUT
+            )
+        return _breakers[name]
+
+
+class IntegrationSession(requests.Session):
+    """
+    requests.Session for one integration. Sessions with the same name share a breaker.
+
+    `rate_limit` (RedisTokenBucket) and `concurrency_limit` (RedisConcurrencyLimiter) are
+    shared by all workers, keyed by `limit_key(method, url, headers)` (e.g. Stripe account).
+    A request waits up to RATE_LIMIT_MAX_WAIT for them, then raises RateLimitExceeded.
+    Within a request deadline (utils.deadline) waits and timeouts are cut to the remaining budget.
+
+    Metrics: http.<name>.latency, http.<name>.status.<N>xx, http.<name>.error, http.<name>.circuit_open
+    """
+
+    def __init__(
+        self, name, timeout=None, retries=None, pool_maxsize=10,
+        rate_limit=None, concurrency_limit=None, limit_key=None,
+    ):
+        super().__init__()
+        self.name = name
+        self.rate_limit = rate_limit
+        self.concurrency_limit = concurrency_limit
+        self.limit_key = limit_key
+        self.timeout = timeout or (settings.HTTP_CONNECT_TIMEOUT, settings.HTTP_READ_TIMEOUT)
+        self.breaker = get_breaker(name)
+        retries = settings.HTTP_RETRIES if retries is None else retries
+        adapter = HTTPAdapter(
+            pool_maxsize=pool_maxsize,
+            max_retries=Retry(
+                total=retries,
+                connect=retries,
+                read=0,  # The request may have been processed
+                status=retries,
+                status_forcelist=RETRY_STATUSES,
+                backoff_factor=settings.HTTP_RETRY_BACKOFF,
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            ),
+        )
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def request(self, method, url, *args, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        key = "default"
+        if self.limit_key:
+            key = self.limit_key(method, url, {**self.headers, **(kwargs.get("headers") or {})})
+        max_wait = timeout_for(self.name, settings.RATE_LIMIT_MAX_WAIT)
+        if self.rate_limit and not self.rate_limit.acquire(key, timeout=max_wait):
+            raise RateLimitExceeded(f"{self.name} rate limit for {key} not available within {max_wait:.2f}s")
+        slot = self.concurrency_limit.slot(key, max_wait) if self.concurrency_limit else nullcontext()
+        with slot:
+            kwargs["timeout"] = timeout_for(self.name, kwargs["timeout"])
+            with track(self.name):
+                try:
+                    return self.send_request(method, url, *args, **kwargs)
+                except requests.exceptions.RequestException:
+                    # A call cut short by the deadline is reported as DeadlineExceeded
+                    timeout_for(self.name, None)
+                    raise
+
+    def send_request(self, method, url, *args, **kwargs):
+        self.breaker.before_request()
+        started_at = time.monotonic()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except Exception:
+            metrics.incr(f"http.{self.name}.error")
+            self.breaker.record_failure()
+            raise
+        finally:
+            metrics.observe(f"http.{self.name}.latency", time.monotonic() - started_at)
+        metrics.incr(f"http.{self.name}.status.{response.status_code // 100}xx")
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
@@ -1,31 +1,108 @@
+from concurrent.futures import ThreadPoolExecutor
 from os import getenv
 
 from dotenv import load_dotenv
-import requests
+from django.conf import settings
+from django.core.cache import cache
 
 from log.logger_config import logger
+from utils.deadline import propagate
+from utils.http_client import IntegrationSession
+from utils.metrics import metrics
+from utils.single_flight import single_flight
 
 load_dotenv()
 
 SFO_BACKEND_API_KEY = getenv("SFO_BACKEND_API_KEY")
 
+# Cached for emails the main backend doesn't know, so they aren't looked up on every request
+NOT_FOUND = {}
+
+
 class MainSfoBackendService:
 
     def __init__(self):
-        self.base_url = "https://api.savefryoil.com"
+        self.base_url = settings.SFO_BACKEND_BASE_URL
         self.headers = {
             "x-api-key": SFO_BACKEND_API_KEY
         }
+        self.session = IntegrationSession(
+            "sfo_backend",
+            timeout=settings.SFO_BACKEND_TIMEOUT,
+            pool_maxsize=settings.SFO_BACKEND_PREFETCH_CONCURRENCY,
+        )
+        self.session.headers.update(self.headers)
 
-    def get_user_by_email(self, email):
+    @staticmethod
+    def user_cache_key(email):
+        return f"sfo_backend:user:{email.strip().lower()}"
+
+    def fetch_user_by_email(self, email):
         logger.info(f"Sending main api request to get user by email: {email}")
-        response = requests.get(
-            f"{self.base_url}/rm-dashboard/users?email={email}",
-            headers=self.headers
-        )
+        with metrics.timer("sfo_backend.get_user.latency"):
+            response = self.session.get(
+                f"{self.base_url}/rm-dashboard/users",
+                params={"email": email},
+            )
+        response.raise_for_status()
         data = response.json()
         if not data:
             return None
         return data[0]
 
+    def cache_user(self, email, user):
+        if user:
+            cache.set(self.user_cache_key(email), user, settings.SFO_BACKEND_USER_CACHE_TTL)
+        else:
+            cache.set(self.user_cache_key(email), NOT_FOUND, settings.SFO_BACKEND_NEGATIVE_CACHE_TTL)
+
+    def get_user_by_email(self, email):
+        """
+        Main backend user (with its ghl_user_id) for the email, or None. Cached, including misses.
+        """
+        user = cache.get(self.user_cache_key(email))
+        if user is not None:
+            metrics.incr("sfo_backend.get_user.cache_hit")
+            return user or None
+
+        metrics.incr("sfo_backend.get_user.cache_miss")
+        return single_flight.do(self.user_cache_key(email), lambda: self._fetch_and_cache(email), distributed=True)
+
+    def _fetch_and_cache(self, email):
+        user = self.fetch_user_by_email(email)
+        self.cache_user(email, user)
+        return user
+
+    def prefetch_users(self, emails, refresh=False):
+        """
+        Warm the cache for many emails, fetching the uncached ones concurrently.
+        Returns {email: user or None}.
+        """
+        emails = list(dict.fromkeys(emails))
+        users = {}
+        if not refresh:
+            cached = cache.get_many([self.user_cache_key(email) for email in emails])
+            for email in emails:
+                user = cached.get(self.user_cache_key(email))
+                if user is not None:
+                    users[email] = user or None
+
+        missing = [email for email in emails if email not in users]
+        if missing:
+            with ThreadPoolExecutor(max_workers=settings.SFO_BACKEND_PREFETCH_CONCURRENCY) as executor:
+                fetched = dict(zip(missing, executor.map(propagate(self._fetch_or_none), missing)))
+            for email, user in fetched.items():
+                if user is not False:  # Failed lookups aren't cached
+                    self.cache_user(email, user)
+                    users[email] = user
+        return users
+
+    def _fetch_or_none(self, email):
+        try:
+            return self.fetch_user_by_email(email)
+        except Exception as e:
+            logger.error(f"Main backend lookup of {email} failed: {e}")
+            return False
+
+
 sfo_backend_service = MainSfoBackendService()
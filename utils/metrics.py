@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+
+def percentile(sorted_values, percent):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(percent / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Metrics:
+    """
+    In-process counters, timings and event rates.
+    Values are collected per worker process and reset on restart.
+    """
+
+    def __init__(self, max_samples: int = 1024, rate_window: int = 60):
+        self.rate_window = rate_window
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._counters = defaultdict(int)
+        self._timings = defaultdict(lambda: deque(maxlen=max_samples))
+        self._events = defaultdict(deque)
+
+    def incr(self, name: str, value: int = 1):
+        with self._lock:
+            self._counters[name] += value
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            self._timings[name].append(seconds)
+
+    def mark(self, name: str):
+        """Count an event and keep its timestamp to report the rate per second."""
+        now = time.monotonic()
+        with self._lock:
+            self._counters[name] += 1
+            events = self._events[name]
+            events.append(now)
+            self._prune(events, now)
+
+    @contextmanager
+    def timer(self, name: str):
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started_at)
+
+    def _prune(self, events, now):
+        while events and now - events[0] > self.rate_window:
+            events.popleft()
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            counters = dict(self._counters)
+            timings = {name: sorted(values) for name, values in self._timings.items()}
+            rates = {}
+            for name, events in self._events.items():
+                self._prune(events, now)
+                rates[name] = round(len(events) / self.rate_window, 3)
+
+        return {
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "counters": counters,
+            "rates_per_second": rates,
+            "timings_ms": {
+                name: {
+                    "count": len(values),
+                    "avg": round(sum(values) / len(values) * 1000, 3) if values else None,
+                    "p50": round(percentile(values, 50) * 1000, 3) if values else None,
+                    "p95": round(percentile(values, 95) * 1000, 3) if values else None,
+                    "p99": round(percentile(values, 99) * 1000, 3) if values else None,
+                    "max": round(values[-1] * 1000, 3) if values else None,
+                }
+                for name, values in timings.items()
+            },
+        }
+
+
+metrics = Metrics()
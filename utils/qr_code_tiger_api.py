@@ -1,18 +1,33 @@
 import os
-import requests
+from concurrent.futures import ThreadPoolExecutor
 
+from django.conf import settings
+from django.core.cache import cache
 from dotenv import load_dotenv
 
+from log.logger_config import logger
+from utils.deadline import propagate
+from utils.http_client import IntegrationSession
+from utils.rate_limit import RedisConcurrencyLimiter, RedisTokenBucket
+from utils.single_flight import single_flight
+
 
 class QRCodeTigerAPI:
     def __init__(self):
         load_dotenv()
-        self.BASE_URL = "https://api.qrtiger.com/api/"
+        self.BASE_URL = settings.QR_TIGER_API_BASE_URL.rstrip("/") + "/"
         self.API_KEY = os.getenv("QR_CODE_TIGER_API_KEY")
         self.HEADERS = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.API_KEY}",
         }
+        self.session = IntegrationSession(
+            "qr_tiger",
+            timeout=settings.QR_TIGER_TIMEOUT,
+            pool_maxsize=settings.QR_TIGER_CONCURRENCY,
+            rate_limit=RedisTokenBucket("qr_tiger", settings.QR_TIGER_RATE_LIMIT, settings.QR_TIGER_BURST),
+            concurrency_limit=RedisConcurrencyLimiter("qr_tiger", settings.QR_TIGER_MAX_IN_FLIGHT),
+        )
 
     @staticmethod
     def prepare_dynamic_qr_code_payload(qr_url):
@@ -94,21 +109,63 @@ class QRCodeTigerAPI:
         return data
 
     def list_qr_codes(self, limit: int = 100):
-        response = requests.get(
+        response = self.session.get(
             self.BASE_URL + f"campaign/?limit={limit}",
-            headers=self.HEADERS
+            headers=self.HEADERS,
         )
         return response.json()
 
-    def get_qr_code_by_id(self, qr_id):
-        response = requests.get(
+    @staticmethod
+    def qr_code_cache_key(qr_id):
+        return f"qr_tiger:qr:{qr_id}"
+
+    @staticmethod
+    def mirror_cache_key(qr_id):
+        return f"qr_tiger:mirror:{qr_id}"
+
+    def fetch_qr_code_by_id(self, qr_id):
+        response = self.session.get(
             self.BASE_URL + f"data/{qr_id}",
-            headers=self.HEADERS
+            headers=self.HEADERS,
         )
-        return response.json()
+        data = response.json()
+        if response.ok:  # Errors aren't cached
+            cache.set(self.qr_code_cache_key(qr_id), data, settings.QR_TIGER_CACHE_TTL)
+        return data
+
+    def get_qr_code_by_id(self, qr_id):
+        """
+        QR code metadata and image urls, cached for QR_TIGER_CACHE_TTL.
+        """
+        data = cache.get(self.qr_code_cache_key(qr_id))
+        if data is None:
+            data = single_flight.do(
+                self.qr_code_cache_key(qr_id), lambda: self.fetch_qr_code_by_id(qr_id), distributed=True
+            )
+        return data
+
+    def get_qr_codes_by_ids(self, qr_ids):
+        """
+        {qr_id: data} for many codes. Cache misses are fetched concurrently.
+        """
+        cached = cache.get_many([self.qr_code_cache_key(qr_id) for qr_id in qr_ids])
+        qr_codes = {
+            qr_id: cached[self.qr_code_cache_key(qr_id)]
+            for qr_id in qr_ids if self.qr_code_cache_key(qr_id) in cached
+        }
+        missing = [qr_id for qr_id in qr_ids if qr_id not in qr_codes]
+        if missing:
+            with ThreadPoolExecutor(max_workers=settings.QR_TIGER_CONCURRENCY) as executor:
+                qr_codes.update(zip(missing, executor.map(propagate(self.fetch_qr_code_by_id), missing)))
+        return qr_codes
+
+    def invalidate_qr_code(self, qr_id):
+        if qr_id:
+            logger.info(f"Invalidate cached QR code {qr_id}")
+            cache.delete_many([self.qr_code_cache_key(qr_id), self.mirror_cache_key(qr_id)])
 
     def create_qr_code(self, url):
-        response = requests.post(
+        response = self.session.post(
             self.BASE_URL + "campaign/",
             headers=self.HEADERS,
             json=self.prepare_dynamic_qr_code_payload(url)
@@ -116,7 +173,7 @@ class QRCodeTigerAPI:
         return response.json()["qrId"]
 
     def create_qr_code_bundle(self, url, qr_frame_text):
-        response = requests.post(
+        response = self.session.post(
             self.BASE_URL + "campaign/",
             headers=self.HEADERS,
             json=self.prepare_dynamic_qr_code_bundle_payload(url, qr_frame_text)
@@ -124,7 +181,7 @@ class QRCodeTigerAPI:
         return response.json()["qrId"]
 
     def create_static_qr_code(self, url, color: str = "rgb(0,0,0)"):
-        response = requests.post(
+        response = self.session.post(
             self.BASE_URL + "qr/static",
             headers=self.HEADERS,
             json=self.prepare_static_qr_code_payload(url, color)
@@ -132,16 +189,17 @@ class QRCodeTigerAPI:
         return response.json()
 
     def update_qr_code(self, qr_id, qr_name):
-        response = requests.post(
+        response = self.session.post(
             self.BASE_URL + f"campaign/edit/{qr_id}/",
             headers=self.HEADERS,
             json={"qrName": qr_name},
         )
+        self.invalidate_qr_code(qr_id)
         return response.json()["data"]["id"]
 
     def move_qr_code_to_folder(self, qr_id, folder_id: str = "68cadd04644bfd9d85a5f29b"):
-        requests.post(
-            f"https://qrtiger.com/folder/move/{folder_id}",
+        self.session.post(
+            f"{settings.QR_TIGER_WEB_BASE_URL}/folder/move/{folder_id}",
             headers=self.HEADERS,
             json={"qrIds": [qr_id]},
         )
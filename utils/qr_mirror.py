@@ -0,0 +1,79 @@
+"""
+Local copies of QR Tiger images, served by `qr/files/<name>` with immutable cache headers.
+
+Files are named by a hash of their content; the mapping from a QR code's image urls
+to local files is kept in the cache for QR_MIRROR_CACHE_TTL and dropped when the code
+is regenerated. A mapped file missing from QR_CODE_DIR is downloaded again.
+"""
+import copy
+import hashlib
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+
+from log.logger_config import logger
+from utils.qr_code_tiger_api import qrTigerAPI
+from utils.qr_renderer import write_atomic
+from utils.single_flight import single_flight
+
+IMAGE_FIELDS = {"qrImage": "png", "svgImage": "svg"}
+
+
+def find_images(data):
+    """The dict of a QR Tiger response that holds the image urls (top level or under "data")."""
+    for candidate in (data, data.get("data") if isinstance(data, dict) else None):
+        if isinstance(candidate, dict) and any(field in candidate for field in IMAGE_FIELDS):
+            return candidate
+    return None
+
+
+def download(url, extension):
+    response = qrTigerAPI.session.get(url)
+    response.raise_for_status()
+    name = f"{hashlib.sha256(response.content).hexdigest()[:32]}.{extension}"
+    path = Path(settings.QR_CODE_DIR) / name
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(path, response.content)
+    return name
+
+
+def mirror_images(qr_id, images):
+    """
+    {source url: local file name} for the code's images, downloading urls not seen before
+    and those whose file is gone (e.g. a new host without the QR_CODE_DIR volume).
+    """
+    mirrored = cache.get(qrTigerAPI.mirror_cache_key(qr_id)) or {}
+    changed = False
+    for field, extension in IMAGE_FIELDS.items():
+        url = images.get(field)
+        if url and (url not in mirrored or not (Path(settings.QR_CODE_DIR) / mirrored[url]).exists()):
+            mirrored[url] = download(url, extension)
+            changed = True
+    if changed:
+        cache.set(qrTigerAPI.mirror_cache_key(qr_id), mirrored, settings.QR_MIRROR_CACHE_TTL)
+    return mirrored
+
+
+def with_local_images(request, qr_id, data):
+    """
+    QR code data with image urls pointing to our copies. Falls back to QR Tiger urls on failure.
+    """
+    images = find_images(data)
+    if not images:
+        return data
+    try:
+        mirrored = single_flight.do(f"qr_tiger:mirror:{qr_id}", lambda: mirror_images(qr_id, images))
+    except Exception as e:
+        logger.error(f"Mirroring images of QR code {qr_id} failed: {e}")
+        return data
+
+    data = copy.deepcopy(data)
+    images = find_images(data)
+    for field in IMAGE_FIELDS:
+        name = mirrored.get(images.get(field))
+        if name:
+            images[field] = request.build_absolute_uri(reverse("qr-file", args=[name]))
+    return data
@@ -0,0 +1,192 @@
+"""
+Local QR code rendering (segno + Pillow) with an on-disk content-addressed cache.
+
+Files are named by a hash of the encoded url and the style, so a file never changes
+once written and can be served with immutable cache headers.
+"""
+import base64
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+from dataclasses import dataclass, asdict
+from pathlib import Path
+
+import segno
+from django.conf import settings
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+
+from utils.metrics import metrics
+
+FILE_NAME_RE = re.compile(r"^[0-9a-f]{32}\.(png|svg)$")
+
+SCALE = 10
+BORDER = 4
+FRAME_WIDTH = 3  # In modules
+FRAME_TEXT_HEIGHT = 10  # In modules
+LOGO_RATIO = 0.22  # Logo width / QR width, safe with error correction level H
+
+
+@dataclass(frozen=True)
+class QRStyle:
+    color: str = "rgb(0,0,0)"
+    background: str = "rgb(255,255,255)"
+    frame_text: str = ""
+    frame_color: str = "#054080"
+    logo: bool = True
+
+    def key(self, data):
+        logo_path = settings.QR_LOGO_PATH if self.logo else None
+        logo_mtime = os.path.getmtime(logo_path) if logo_path and os.path.exists(logo_path) else None
+        payload = json.dumps({"data": data, "style": asdict(self), "logo": logo_mtime}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+def to_rgb(color):
+    return ImageColor.getrgb(color)[:3]
+
+
+def to_hex(color):
+    return "#{:02x}{:02x}{:02x}".format(*to_rgb(color))
+
+
+def load_logo():
+    if not settings.QR_LOGO_PATH or not os.path.exists(settings.QR_LOGO_PATH):
+        return None
+    return Image.open(settings.QR_LOGO_PATH).convert("RGBA")
+
+
+def load_font(size):
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1 has a fixed size default font
+        return ImageFont.load_default()
+
+
+def make_qr(data, style):
+    # Error correction H keeps the code readable under the logo
+    return segno.make(data, error="h" if style.logo and settings.QR_LOGO_PATH else "m", micro=False)
+
+
+def render_png(data, style: QRStyle) -> bytes:
+    qr = make_qr(data, style)
+    buffer = io.BytesIO()
+    qr.save(buffer, kind="png", scale=SCALE, border=BORDER, dark=to_rgb(style.color), light=to_rgb(style.background))
+    image = Image.open(io.BytesIO(buffer.getvalue())).convert("RGB")
+
+    logo = load_logo() if style.logo else None
+    if logo:
+        logo_width = int(image.width * LOGO_RATIO)
+        logo = logo.resize((logo_width, int(logo.height * logo_width / logo.width)), Image.LANCZOS)
+        padding = SCALE
+        box = Image.new("RGB", (logo.width + 2 * padding, logo.height + 2 * padding), to_rgb(style.background))
+        box.paste(logo, (padding, padding), logo)
+        image.paste(box, ((image.width - box.width) // 2, (image.height - box.height) // 2))
+
+    if style.frame_text:
+        frame = FRAME_WIDTH * SCALE
+        text_height = FRAME_TEXT_HEIGHT * SCALE
+        framed = Image.new("RGB", (image.width + 2 * frame, image.height + 2 * frame + text_height), to_rgb(style.frame_color))
+        framed.paste(image, (frame, frame))
+        draw = ImageDraw.Draw(framed)
+        font = load_font(int(text_height * 0.6))
+        draw.text(
+            (framed.width // 2, image.height + frame + (frame + text_height) // 2),
+            style.frame_text,
+            fill=(255, 255, 255),
+            font=font,
+            anchor="mm",
+        )
+        image = framed
+
+    output = io.BytesIO()
+    image.save(output, format="PNG", optimize=True)
+    return output.getvalue()
+
+
+def render_svg(data, style: QRStyle) -> bytes:
+    qr = make_qr(data, style)
+    buffer = io.BytesIO()
+    qr.save(
+        buffer, kind="svg", scale=SCALE, border=BORDER, dark=to_hex(style.color), light=to_hex(style.background),
+        xmldecl=False, svgns=True, nl=False,
+    )
+    qr_svg = buffer.getvalue().decode()
+    size = qr.symbol_size(scale=SCALE, border=BORDER)[0]
+
+    elements = [qr_svg]
+    logo = load_logo() if style.logo else None
+    if logo:
+        logo_png = io.BytesIO()
+        logo.save(logo_png, format="PNG")
+        logo_width = size * LOGO_RATIO
+        logo_height = logo.height * logo_width / logo.width
+        x, y = (size - logo_width) / 2, (size - logo_height) / 2
+        elements.append(
+            f'<rect x="{x - SCALE}" y="{y - SCALE}" width="{logo_width + 2 * SCALE}" '
+            f'height="{logo_height + 2 * SCALE}" fill="{to_hex(style.background)}"/>'
+            f'<image x="{x}" y="{y}" width="{logo_width}" height="{logo_height}" '
+            f'href="data:image/png;base64,{base64.b64encode(logo_png.getvalue()).decode()}"/>'
+        )
+
+    width = height = size
+    offset = 0
+    frame_elements = ""
+    if style.frame_text:
+        offset = FRAME_WIDTH * SCALE
+        text_height = FRAME_TEXT_HEIGHT * SCALE
+        width = size + 2 * offset
+        height = size + 2 * offset + text_height
+        text = style.frame_text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+        frame_elements = (
+            f'<rect width="{width}" height="{height}" rx="{SCALE}" fill="{to_hex(style.frame_color)}"/>'
+            f'<text x="{width / 2}" y="{size + offset + (offset + text_height) / 2}" fill="#ffffff" '
+            f'font-family="Arial, sans-serif" font-size="{int(text_height * 0.6)}" font-weight="bold" '
+            f'text-anchor="middle" dominant-baseline="middle">{text}</text>'
+        )
+
+    svg = (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">'
+        f'{frame_elements}<g transform="translate({offset},{offset})">{"".join(elements)}</g></svg>'
+    )
+    return svg.encode()
+
+
+def write_atomic(path: Path, content: bytes):
+    """
+    Write through a uniquely named temp file in the same directory, so concurrent writers
+    of the same path (other workers) never replace it with a torn file.
+    """
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f".{path.name}.", delete=False) as tmp:
+        try:
+            tmp.write(content)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+            os.chmod(tmp.name, 0o644)  # NamedTemporaryFile creates it owner-only
+        except BaseException:
+            os.unlink(tmp.name)
+            raise
+    os.replace(tmp.name, path)
+
+
+def get_or_render(data, style: QRStyle = QRStyle()):
+    """
+    Render PNG and SVG of the QR code unless they're already in QR_CODE_DIR.
+    Returns {"key", "png", "svg"} with file names relative to QR_CODE_DIR.
+    """
+    directory = Path(settings.QR_CODE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    key = style.key(data)
+    files = {"key": key}
+    for kind, render in (("png", render_png), ("svg", render_svg)):
+        name = f"{key}.{kind}"
+        path = directory / name
+        if path.exists():
+            metrics.incr("qr.render.cache_hit")
+        else:
+            with metrics.timer(f"qr.render.{kind}"):
+                write_atomic(path, render(data, style))
+        files[kind] = name
+    return files
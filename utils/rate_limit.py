@@ -0,0 +1,248 @@
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import redis
+import requests
+
+from log.logger_config import logger
+from utils.metrics import metrics
+from utils.redis_client import get_redis
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, up to `capacity` at once.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def try_acquire(self, tokens: int = 1) -> float:
+        """
+        Take tokens if available. Returns 0 on success, otherwise seconds until they would be.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: int = 1, timeout: float = None) -> bool:
+        """
+        Block until tokens are available. Returns False if `timeout` runs out first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(tokens)
+            if not wait:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class KeyedTokenBuckets:
+    """
+    One TokenBucket per key (e.g. per GHL location), created on first use.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def get(self, key) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.capacity)
+            return bucket
+
+    def acquire(self, key, tokens: int = 1, timeout: float = None) -> bool:
+        return self.get(key).acquire(tokens, timeout)
+
+
+class RateLimitExceeded(requests.exceptions.RequestException):
+    """
+    Raised when a request couldn't get a rate limit token or concurrency slot in time.
+    """
+
+
+# KEYS[1] bucket; ARGV rate, capacity, tokens. Returns seconds to wait, "0" when taken.
+# Redis' clock is used so all workers agree on refill time.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= requested then
+    tokens = tokens - requested
+else
+    wait = (requested - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+# KEYS[1] holders sorted set; ARGV limit, lease seconds, holder token. Returns 1 when a slot is taken.
+# Holders expire after the lease, so a crashed worker can't keep its slots.
+CONCURRENCY_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local lease = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZCARD', KEYS[1]) < limit then
+    redis.call('ZADD', KEYS[1], now + lease, ARGV[3])
+    redis.call('EXPIRE', KEYS[1], math.ceil(lease) + 1)
+    return 1
+end
+return 0
+"""
+
+
+class RedisTokenBucket:
+    """
+    Token buckets shared by all workers through Redis, one per key (e.g. per GHL location).
+    `rate` tokens per second, up to `capacity` at once. If Redis is unavailable, a
+    per-process bucket is used instead, so an outage doesn't stop the integrations.
+
+    Metrics: ratelimit.<name>.wait (queueing time), ratelimit.<name>.throttled,
+    ratelimit.<name>.rejected, ratelimit.<name>.redis_error
+    """
+
+    def __init__(self, name, rate: float, capacity: int):
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self._script = None
+        self._fallback = KeyedTokenBuckets(rate, capacity)
+
+    def redis_key(self, key):
+        return f"ratelimit:{self.name}:{key}"
+
+    def try_acquire(self, key="default", tokens: int = 1) -> float:
+        """
+        Take tokens if available. Returns 0 on success, otherwise seconds until they would be.
+        """
+        try:
+            if self._script is None:
+                self._script = get_redis().register_script(TOKEN_BUCKET_SCRIPT)
+            return float(self._script(keys=[self.redis_key(key)], args=[self.rate, self.capacity, tokens]))
+        except redis.RedisError as e:
+            logger.warning(f"Rate limiter {self.name} falls back to local bucket: {e}")
+            metrics.incr(f"ratelimit.{self.name}.redis_error")
+            return self._fallback.get(key).try_acquire(tokens)
+
+    def acquire(self, key="default", tokens: int = 1, timeout: float = None) -> bool:
+        """
+        Block until tokens are available. Returns False if `timeout` runs out first.
+        """
+        started_at = time.monotonic()
+        deadline = None if timeout is None else started_at + timeout
+        try:
+            while True:
+                wait = self.try_acquire(key, tokens)
+                if not wait:
+                    return True
+                metrics.incr(f"ratelimit.{self.name}.throttled")
+                if deadline is not None and time.monotonic() + wait > deadline:
+                    metrics.incr(f"ratelimit.{self.name}.rejected")
+                    return False
+                time.sleep(wait)
+        finally:
+            metrics.observe(f"ratelimit.{self.name}.wait", time.monotonic() - started_at)
+
+
+class RedisConcurrencyLimiter:
+    """
+    At most `limit` requests in flight per key across all workers. A slot is held until
+    released or for `lease` seconds. Fails open if Redis is unavailable.
+
+    Metrics: concurrency.<name>.wait (queueing time), concurrency.<name>.rejected,
+    concurrency.<name>.redis_error
+    """
+
+    POLL_INTERVAL = 0.05
+    MAX_POLL_INTERVAL = 0.5
+
+    def __init__(self, name, limit: int, lease: float = 60):
+        self.name = name
+        self.limit = limit
+        self.lease = lease
+        self._script = None
+
+    def redis_key(self, key):
+        return f"concurrency:{self.name}:{key}"
+
+    def try_acquire(self, key="default"):
+        """
+        Take a slot if one is free. Returns the holder token to release it with, or None.
+        """
+        token = uuid.uuid4().hex
+        try:
+            if self._script is None:
+                self._script = get_redis().register_script(CONCURRENCY_SCRIPT)
+            taken = self._script(keys=[self.redis_key(key)], args=[self.limit, self.lease, token])
+        except redis.RedisError as e:
+            logger.warning(f"Concurrency limiter {self.name} is off, Redis unavailable: {e}")
+            metrics.incr(f"concurrency.{self.name}.redis_error")
+            return token
+        return token if int(taken) else None
+
+    def acquire(self, key="default", timeout: float = None):
+        """
+        Block until a slot is free. Returns the holder token, or None if `timeout` runs out first.
+        """
+        started_at = time.monotonic()
+        deadline = None if timeout is None else started_at + timeout
+        interval = self.POLL_INTERVAL
+        try:
+            while True:
+                token = self.try_acquire(key)
+                if token:
+                    return token
+                if deadline is not None and time.monotonic() + interval > deadline:
+                    metrics.incr(f"concurrency.{self.name}.rejected")
+                    return None
+                time.sleep(interval)
+                interval = min(interval * 2, self.MAX_POLL_INTERVAL)
+        finally:
+            metrics.observe(f"concurrency.{self.name}.wait", time.monotonic() - started_at)
+
+    def release(self, key, token):
+        try:
+            get_redis().zrem(self.redis_key(key), token)
+        except redis.RedisError as e:
+            # The slot frees itself when its lease runs out
+            logger.warning(f"Releasing {self.name} concurrency slot failed: {e}")
+
+    @contextmanager
+    def slot(self, key="default", timeout: float = None):
+        token = self.acquire(key, timeout)
+        if token is None:
+            raise RateLimitExceeded(f"No free {self.name} slot for {key} within {timeout}s")
+        try:
+            yield
+        finally:
+            self.release(key, token)
@@ -0,0 +1,39 @@
+import asyncio
+import weakref
+
+import redis
+import redis.asyncio as async_redis
+from django.conf import settings
+
+_sync_client = None
+_async_clients = weakref.WeakKeyDictionary()  # event loop -> client
+
+
+def get_redis() -> redis.Redis:
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_connect_timeout=2,
+            socket_timeout=2,
+            decode_responses=True,
+        )
+    return _sync_client
+
+
+def get_async_redis() -> async_redis.Redis:
+    """
+    asyncio Redis connections are bound to the event loop they were opened on,
+    so one client is kept per running loop.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = async_redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_connect_timeout=2,
+            socket_timeout=2,
+            decode_responses=True,
+        )
+        _async_clients[loop] = client
+    return client
@@ -1,45 +1,56 @@
 from log.logger_config import logger
-from datetime import datetime
-
-from django.core.mail import EmailMessage
-from django.template.loader import render_to_string
 from django.conf import settings
 
+from notifications.digests import add_digest_entries, get_digest_frequencies
+from notifications.models import DigestEvent, OutgoingEmail
+from utils.email_templates import email_templates
+
 FROM_EMAIL = settings.DEFAULT_FROM_EMAIL
 
 
+def queue_email(subject: str, html_content: str, recipients: list):
+    """
+    Put email to the outbox. It's saved in the caller's transaction and sent by the outbox worker.
+    """
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        body=html_content,
+        content_subtype="html",
+        from_email=FROM_EMAIL,
+        recipients=list(recipients),
+    )
+
+
 def send_email(user, url, email_type: str = "confirm"):
     to = [user.email]
 
     if email_type == 'confirm':
         subject = "Confirm your SaveFryOil Ambassador account"
-        html_content = render_to_string("emails/confirm_email.html", {"user": user, "confirm_url": url})
+        html_content = email_templates.render("emails/confirm_email.html", {"user": user, "confirm_url": url})
 
     if email_type == 'reset':
         subject = "Reset password for your SaveFryOil Ambassador account"
-        html_content = render_to_string(
+        html_content = email_templates.render(
             "emails/reset_password.html",
             {
                 "user": user,
                 "reset_url": url,
-                "current_year": datetime.now().year,
             }
         )
 
     if email_type == 'user_registered_notification':
         subject = "New Ambassador registered by you referral code"
-        html_content = render_to_string(
+        html_content = email_templates.render(
             "emails/reset_password.html",
             {
                 "user": user,
                 "reset_url": url,
-                "current_year": datetime.now().year,
             }
         )
 
     if email_type == 'stripe_onboarding':
         subject = "Complete your Stripe onboarding"
-        html_content = render_to_string(
+        html_content = email_templates.render(
             "emails/stripe_onboarding.html",
             {
                 "user": user,
@@ -49,55 +60,65 @@ def send_email(user, url, email_type: str = "confirm"):
 
     if email_type == 'stripe_account_update':
         subject = "Update your Stripe recipient account"
-        html_content = render_to_string(
+        html_content = email_templates.render(
             "emails/stripe_account_update.html",
             {
                 "user": user,
                 "onboarding_url": url,
             }
         )
-    # Build email
-    email = EmailMessage(subject, html_content, FROM_EMAIL, to)
-    email.content_subtype = "html"  # Important → tells Django it's HTML
-    email.send()
+    queue_email(subject, html_content, to)
 
 
 def send_notification_email(to_user, notification_object, notification_type):
 
-    to = [to_user.email]
     if notification_type == "user":
-        subject = "New Ambassador registered by you referral code"
-        html_content = render_to_string(
-            "emails/user_registered_notification.html",
-            {
+        send_or_digest_html_email(
+            recipients=[to_user.email],
+            subject="New Ambassador registered by you referral code",
+            email_body={
                 "user": notification_object,
                 "inviter_user": to_user,
-            }
+            },
+            template_name="emails/user_registered_notification.html",
+            event_type=DigestEvent.NEW_AMBASSADOR,
+            summary=f"{notification_object.first_name} {notification_object.last_name} ({notification_object.email})",
         )
 
     if notification_type == "prospect":
-        subject = "Your Ambassador register the Prospect"
-        html_content = render_to_string(
-            "emails/prospect_registered_notification.html",
-            {
+        send_or_digest_html_email(
+            recipients=[to_user.email],
+            subject="Your Ambassador register the Prospect",
+            email_body={
                 "prospect": notification_object,
                 "inviter_user": to_user,
-            }
+            },
+            template_name="emails/prospect_registered_notification.html",
+            event_type=DigestEvent.NEW_PROSPECT,
+            summary=f"{notification_object.restaurant_organisation_name} - {notification_object.email}",
         )
-    # Build email
-    email = EmailMessage(subject, html_content, FROM_EMAIL, to)
-    email.content_subtype = "html"  # Important → tells Django it's HTML
-    email.send()
+
 
 def send_html_email(recipients: list, subject: str, email_body: dict, template_name: str):
     to = recipients
 
-    html_content = render_to_string(
-        template_name=template_name,
-        context=email_body
-    )
-    # Build email
-    email = EmailMessage(subject, html_content, FROM_EMAIL, to)
-    email.content_subtype = "html"
-    logger.debug(f"Send email to: {to}, template: {template_name}")
-    email.send()
\ No newline at end of file
+    html_content = email_templates.render(template_name, email_body)
+    logger.debug(f"Queue email to: {to}, template: {template_name}")
+    queue_email(subject, html_content, to)
+
+
+def send_or_digest_html_email(
+        recipients: list, subject: str, email_body: dict, template_name: str, event_type: str, summary: str
+):
+    """
+    Send the email now to recipients with immediate delivery of `event_type`,
+    add `summary` line to the next digest for the others.
+    """
+    frequencies = get_digest_frequencies(recipients, event_type)
+    immediate = add_digest_entries(frequencies, event_type, summary)
+    if immediate:
+        send_html_email(immediate, subject, email_body, template_name)
+
+
+def send_digest_email(email: str, subject: str, context: dict):
+    send_html_email([email], subject, context, "emails/notification_digest.html")
@@ -1,14 +1,18 @@
 from os import getenv
 
-import requests
+from django.conf import settings
 from dotenv import load_dotenv
 
+from utils.http_client import IntegrationSession
+
 TELEGRAM_TOKEN = getenv("TELEGRAM_NOTIFICATION_TOKEN")
 TELEGRAM_CHAT_ID = getenv("TELEGRAM_NOTIFICATION_CHAT_ID")
 
+telegram_session = IntegrationSession("telegram")
+
 
 def send_telegram_notification(message):
-    requests.post(
-        f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage",
+    telegram_session.post(
+        f"{settings.TELEGRAM_API_BASE_URL}/bot{TELEGRAM_TOKEN}/sendMessage",
         json={"chat_id": TELEGRAM_CHAT_ID, "text": message}
     )
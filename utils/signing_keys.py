@@ -0,0 +1,93 @@
+"""
+Cached JWKS signing keys of the social sign-in providers, parsed once and kept in memory.
+"""
+import re
+import threading
+import time
+
+import jwt
+from django.conf import settings
+from jwt.algorithms import RSAAlgorithm
+
+from log.logger_config import logger
+from utils.http_client import IntegrationSession
+from utils.metrics import metrics
+
+PROVIDERS = {
+    "apple": "APPLE_KEYS_URL",
+    "google": "GOOGLE_CERTS_URL",
+}  # Provider -> setting with its JWKS url
+GOOGLE_ISSUERS = ["accounts.google.com", "https://accounts.google.com"]
+APPLE_ISSUER = "https://appleid.apple.com"
+MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+class SigningKeyCache:
+    """
+    Public keys by provider and kid. Keys are refreshed when the provider's Cache-Control
+    max-age runs out, or on an unknown kid at most once per SIGNING_KEYS_MIN_REFRESH_INTERVAL.
+    Concurrent misses wait on a per-provider lock, so only one of them fetches.
+    """
+
+    def __init__(self):
+        self.session = IntegrationSession("signing_keys", timeout=settings.SIGNING_KEYS_TIMEOUT)
+        self.keys = {provider: {} for provider in PROVIDERS}
+        self.expires_at = {provider: 0 for provider in PROVIDERS}
+        self.fetched_at = {provider: 0 for provider in PROVIDERS}
+        self.locks = {provider: threading.Lock() for provider in PROVIDERS}
+
+    @staticmethod
+    def max_age(response):
+        match = MAX_AGE_RE.search(response.headers.get("Cache-Control", ""))
+        return int(match.group(1)) if match else settings.SIGNING_KEYS_DEFAULT_TTL
+
+    def refresh(self, provider):
+        with metrics.timer(f"signing_keys.{provider}.fetch.latency"):
+            response = self.session.get(getattr(settings, PROVIDERS[provider]))
+        response.raise_for_status()
+        keys = {key["kid"]: RSAAlgorithm.from_jwk(key) for key in response.json()["keys"]}
+        now = time.monotonic()
+        self.keys[provider] = keys
+        self.fetched_at[provider] = now
+        self.expires_at[provider] = now + self.max_age(response)
+        logger.info(f"Refreshed {provider} signing keys: {list(keys)}")
+
+    def is_fresh(self, provider, kid):
+        now = time.monotonic()
+        if now >= self.expires_at[provider]:
+            return False
+        # An unknown kid may mean the provider rotated its keys
+        return kid in self.keys[provider] or now - self.fetched_at[provider] < settings.SIGNING_KEYS_MIN_REFRESH_INTERVAL
+
+    def get_key(self, provider, kid):
+        if not self.is_fresh(provider, kid):
+            metrics.incr(f"signing_keys.{provider}.miss")
+            with self.locks[provider]:
+                # Another thread may have refreshed while this one waited
+                if not self.is_fresh(provider, kid):
+                    try:
+                        self.refresh(provider)
+                    except Exception as e:
+                        # Stale keys are still good for tokens signed before a rotation
+                        if not self.keys[provider]:
+                            raise
+                        logger.error(f"Refreshing {provider} signing keys failed: {e}")
+        key = self.keys[provider].get(kid)
+        if key is None:
+            raise ValueError("Unable to find matching public key")
+        return key
+
+    def decode(self, provider, token, **kwargs):
+        kid = jwt.get_unverified_header(token).get("kid")
+        return jwt.decode(token, self.get_key(provider, kid), algorithms=["RS256"], **kwargs)
+
+
+signing_keys = SigningKeyCache()
+
+
+def verify_google_id_token(token, client_id):
+    return signing_keys.decode("google", token, audience=client_id, issuer=GOOGLE_ISSUERS)
+
+
+def verify_apple_identity_token(token, audience):
+    return signing_keys.decode("apple", token, audience=audience, issuer=APPLE_ISSUER)
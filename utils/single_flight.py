@@ -0,0 +1,123 @@
+"""
+Request coalescing: concurrent calls with the same key share one execution and its result.
+"""
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from log.logger_config import logger
+from utils.deadline import DeadlineExceeded, get_deadline, timeout_for
+from utils.metrics import metrics
+
+POLL_INTERVAL = 0.05
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    `do(key, fn)` runs fn once per key at a time in this process; threads arriving while
+    it runs wait and get its result or exception.
+
+    With `distributed=True` the leading thread also coordinates with other workers through
+    the cache (Redis): one worker runs fn and stores the result for SINGLE_FLIGHT_RESULT_TTL,
+    the others wait for it. If the leader fails or the cache is unavailable, a waiting
+    worker runs fn itself.
+
+    Metrics: single_flight.shared, single_flight.shared_remote
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, distributed=False):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            metrics.incr("single_flight.shared")
+            if not call.done.wait(timeout_for("single_flight", None)):
+                raise DeadlineExceeded(get_deadline(), "single_flight")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._do_distributed(key, fn) if distributed else fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    @staticmethod
+    def _do_distributed(key, fn):
+        lock_key = f"singleflight:lock:{key}"
+        result_key = f"singleflight:result:{key}"
+        flight_id = uuid.uuid4().hex
+        try:
+            leader = cache.add(lock_key, flight_id, settings.SINGLE_FLIGHT_LOCK_TIMEOUT)
+            if not leader:
+                flight_id = cache.get(lock_key)
+        except Exception as e:
+            logger.warning(f"Single flight of {key} runs locally, cache unavailable: {e}")
+            return fn()
+
+        if leader:
+            try:
+                result = fn()
+            except Exception:
+                cache.delete(lock_key)
+                raise
+            try:
+                # Tagged with the flight, so waiters don't take the result of an earlier one
+                cache.set(result_key, (flight_id, result), settings.SINGLE_FLIGHT_RESULT_TTL)
+                cache.delete(lock_key)
+            except Exception as e:
+                logger.warning(f"Single flight result of {key} not shared, cache unavailable: {e}")
+            return result
+
+        try:
+            result = SingleFlight._wait_for_leader(lock_key, result_key, flight_id)
+        except Exception as e:
+            logger.warning(f"Single flight of {key} runs locally, cache unavailable: {e}")
+            result = None
+        if result is None:
+            return fn()
+        metrics.incr("single_flight.shared_remote")
+        return result[0]
+
+    @staticmethod
+    def _wait_for_leader(lock_key, result_key, flight_id):
+        """
+        (result,) stored by the leading worker, None if it failed or took too long.
+        """
+        deadline = time.monotonic() + timeout_for("single_flight", settings.SINGLE_FLIGHT_LOCK_TIMEOUT)
+        while flight_id and time.monotonic() < deadline:
+            stored = cache.get(result_key)
+            if stored and stored[0] == flight_id:
+                return (stored[1],)
+            if cache.get(lock_key) != flight_id:
+                # The leader finished; without a stored result it failed
+                stored = cache.get(result_key)
+                return (stored[1],) if stored and stored[0] == flight_id else None
+            time.sleep(POLL_INTERVAL)
+        return None
+
+
+single_flight = SingleFlight()
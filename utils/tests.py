@@ -0,0 +1,92 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.testing import ApplicationCommunicator
+from django.core.handlers.asgi import ASGIHandler
+from django.http import JsonResponse
+from django.test import SimpleTestCase, override_settings
+from django.urls import path
+
+from utils.deadline import deadline, get_deadline, propagate, timeout_for, track
+
+
+def remaining_view(request):
+    return JsonResponse({"remaining": get_deadline().remaining()})
+
+
+def slow_view(request):
+    time.sleep(0.1)
+    timeout_for("stripe", 5)
+    return JsonResponse({})
+
+
+def no_deadline_view(request):
+    return JsonResponse({"deadline": get_deadline() is not None})
+
+
+urlpatterns = [
+    path("remaining/", remaining_view, name="deadline-remaining"),
+    path("slow/", slow_view, name="deadline-slow"),
+    path("none/", no_deadline_view, name="deadline-none"),
+]
+
+
+@override_settings(
+    ROOT_URLCONF=__name__,
+    REQUEST_DEADLINE_DEFAULT=20,
+    REQUEST_DEADLINES={"deadline-slow": 0.05, "deadline-none": 0},
+)
+class DeadlineMiddlewareTests(SimpleTestCase):
+    async def get(self, url):
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": url,
+            "query_string": b"",
+            "headers": [(b"host", b"testserver")],
+            "server": ("testserver", 80),
+        }
+        communicator = ApplicationCommunicator(ASGIHandler(), scope)
+        await communicator.send_input({"type": "http.request", "body": b""})
+        start = await communicator.receive_output(timeout=5)
+        body = await communicator.receive_output(timeout=5)
+        await communicator.wait(timeout=5)
+        return start["status"], json.loads(body["body"])
+
+    async def test_view_runs_within_deadline(self):
+        status, body = await self.get("/remaining/")
+        self.assertEqual(status, 200)
+        self.assertTrue(19 < body["remaining"] <= 20)
+        self.assertIsNone(get_deadline())
+
+    async def test_spent_deadline_answers_504(self):
+        status, body = await self.get("/slow/")
+        self.assertEqual(status, 504)
+        self.assertIn("stripe", body["error"])
+
+    async def test_zero_disables_deadline(self):
+        status, body = await self.get("/none/")
+        self.assertEqual(status, 200)
+        self.assertFalse(body["deadline"])
+
+
+class DeadlinePropagationTests(SimpleTestCase):
+    @staticmethod
+    def pooled_call(seconds):
+        with track("qr_tiger"):
+            time.sleep(seconds)
+        return timeout_for("qr_tiger", 10)
+
+    def test_pooled_calls_respect_deadline(self):
+        with deadline(5) as current, ThreadPoolExecutor(max_workers=2) as executor:
+            timeouts = list(executor.map(propagate(self.pooled_call), [0.05, 0.05]))
+        self.assertTrue(all(timeout <= 5 for timeout in timeouts))
+        self.assertGreaterEqual(current.spent["qr_tiger"], 0.1)
+
+    def test_pool_without_propagate_has_no_deadline(self):
+        with deadline(5), ThreadPoolExecutor(max_workers=1) as executor:
+            self.assertIsNone(executor.submit(get_deadline).result())